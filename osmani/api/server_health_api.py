@@ -44,6 +44,9 @@ def get_server_health():
         # Bench Processes
         bench_processes = get_bench_processes()
         
+        # Account Freeze hook instrumentation
+        freeze_checks = get_freeze_checks_info()
+        
         # Additional Disk Partitions
         disk_partitions = []
         for partition in psutil.disk_partitions():
@@ -105,7 +108,8 @@ def get_server_health():
             },
             'database': db_connections,
             'sites': sites_info,
-            'processes': bench_processes
+            'processes': bench_processes,
+            'freeze_checks': freeze_checks
         }
         
     except Exception as e:
@@ -157,6 +161,16 @@ def get_database_connections():
         }
 
 
+def get_freeze_checks_info():
+    """Get Account Freeze GL Entry hook counters and latency histogram"""
+    try:
+        from osmani.osmani.utils.account_freeze_stats import get_freeze_check_summary
+        return get_freeze_check_summary()
+    except Exception as e:
+        frappe.logger().error(f"Error getting freeze check stats: {str(e)}")
+        return {}
+
+
 def get_sites_info():
     """Get information about all sites in the bench"""
     try:
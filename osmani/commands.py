@@ -0,0 +1,107 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+import click
+import frappe
+from frappe.commands import get_site, pass_context
+
+
+@click.command("benchmark-user-filters")
+@click.option("--output", default="user_filter_benchmark.json", help="File to write the results to")
+@click.option("--compare", "baseline", help="Baseline results file to compare against")
+@click.option("--invoices", default=100000, help="Synthetic Sales Invoices to insert")
+@click.option("--gl-entries", default=200000, help="Synthetic GL Entries to insert")
+@click.option("--iterations", default=50, help="Runs per measurement")
+@click.option("--skip-setup", is_flag=True, help="Reuse benchmark data from a previous run")
+@click.option("--keep-data", is_flag=True, help="Keep the benchmark data for a later --skip-setup run")
+@pass_context
+def benchmark_user_filters(context, output, baseline, invoices, gl_entries, iterations, skip_setup, keep_data):
+	"""Measure the User Record Filter permission query overhead (developer_mode or allow_tests sites only)"""
+	from osmani.osmani.utils.user_filter_benchmark import (
+		cleanup_benchmark,
+		compare_results,
+		ensure_benchmark_site,
+		load_results,
+		run_benchmark,
+		write_results,
+	)
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		ensure_benchmark_site()
+		try:
+			results = run_benchmark(invoices, gl_entries, iterations, setup=not skip_setup)
+			write_results(results, output)
+			click.echo(f"Results written to {output}")
+
+			if baseline:
+				regressions = 0
+				for row in compare_results(load_results(baseline), results):
+					regressions += row["regression"]
+					click.echo(
+						f"{row['profile']:<12} {row['doctype']:<14} {row['metric']:<16} "
+						f"{row['baseline_ms']:>10.4f} -> {row['current_ms']:>10.4f} ms "
+						f"({row['change']:+.1%}){' REGRESSION' if row['regression'] else ''}"
+					)
+				click.echo(f"{regressions} regression(s)")
+		finally:
+			if not keep_data:
+				frappe.db.rollback()
+				cleanup_benchmark()
+	finally:
+		frappe.destroy()
+
+
+@click.command("backfill-user-activity-rollup")
+@click.option("--doctype", "doctypes", multiple=True, help="Tracked DocType to recount, all by default")
+@click.option("--from-date", help="Recount documents created on or after this date")
+@click.option("--window-days", default=31, help="Days of documents recounted per transaction")
+@pass_context
+def backfill_user_activity_rollup(context, doctypes, from_date, window_days):
+	"""Recount the User Activity Rollup from the tracked DocTypes"""
+	from osmani.osmani.doctype.user_activity_rollup.user_activity_rollup import backfill_rollup
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		backfill_rollup(doctypes or None, from_date, window_days)
+		click.echo("User Activity Rollup backfilled")
+	finally:
+		frappe.destroy()
+
+
+@click.command("check-user-activity-indexes")
+@click.option("--user", help="User whose activity is explained, the Administrator by default")
+@click.option("--from-date", help="Start of the creation range, 30 days ago by default")
+@click.option("--to-date", help="End of the creation range, today by default")
+@pass_context
+def check_user_activity_indexes(context, user, from_date, to_date):
+	"""Print the EXPLAIN plans of the user activity queries and whether they use the (owner, creation) index"""
+	from osmani.osmani.doctype.user_activity_rollup.user_activity_rollup import ROLLUP_DOCTYPES
+	from osmani.osmani.utils.user_activity_index import ACTIVITY_INDEX, explain_activity_queries, get_index_columns
+
+	frappe.init(site=get_site(context))
+	frappe.connect()
+	try:
+		for doctype in ROLLUP_DOCTYPES:
+			if frappe.db.table_exists(doctype):
+				columns = get_index_columns(doctype)
+				click.echo(f"{doctype:<18} {ACTIVITY_INDEX}: {', '.join(columns) if columns else 'MISSING'}")
+
+		missing = 0
+		for result in explain_activity_queries(user, from_date, to_date):
+			missing += not result["uses_index"]
+			click.echo(f"\n{result['query']}: {'uses' if result['uses_index'] else 'DOES NOT USE'} {ACTIVITY_INDEX}")
+			for row in result["plan"]:
+				click.echo(
+					f"  {row.get('id')!s:<3} {row.get('select_type')!s:<14} {row.get('table')!s:<12} "
+					f"{row.get('type')!s:<8} {row.get('key')!s:<20} {row.get('rows')!s:>10}  {row.get('Extra') or ''}"
+				)
+
+		click.echo(f"\n{missing} quer{'y' if missing == 1 else 'ies'} not using {ACTIVITY_INDEX}")
+	finally:
+		frappe.destroy()
+
+
+commands = [benchmark_user_filters, backfill_user_activity_rollup, check_user_activity_indexes]
@@ -26,7 +26,10 @@ app_license = "mit"
 
 # include js, css files in header of desk.html
 app_include_css = "/assets/osmani/css/osmani_theme.css"
-app_include_js = "/assets/osmani/js/hide_report_filters.js"
+app_include_js = [
+	"/assets/osmani/js/hide_report_filters.js",
+	"/assets/osmani/js/account_freeze.js"
+]
 
 # include js, css files in header of web template
 # web_include_css = "/assets/osmani/css/osmani.css"
@@ -85,7 +88,7 @@ fixtures = ["Client Script"]
 # ------------
 
 # before_install = "osmani.install.before_install"
-# after_install = "osmani.install.after_install"
+after_install = "osmani.install.after_install"
 
 # Uninstallation
 # ------------
@@ -120,14 +123,14 @@ fixtures = ["Client Script"]
 # Permissions evaluated in scripted ways
 
 permission_query_conditions = {
+	# Resolved at request time from the User Record Filter Registry
 	"*": "osmani.osmani.doctype.user_record_filter.user_record_filter.permission_query_all",
-	"Purchase Invoice": "osmani.osmani.doctype.purchase_invoice_filter.purchase_invoice_filter.get_permission_query_conditions_purchase_invoice",
-	"Sales Order": "osmani.osmani.doctype.sales_order_filter.sales_order_filter.get_permission_query_conditions_sales_order",
 }
 
-# has_permission = {
-# 	"Event": "frappe.desk.doctype.event.event.has_permission",
-# }
+# Same User Record Filter rules as the "*" query condition, evaluated against the opened document
+has_permission = {
+	"*": "osmani.osmani.doctype.user_record_filter.user_record_filter.has_permission",
+}
 
 # DocType Class
 # ---------------
@@ -154,11 +157,44 @@ permission_query_conditions = {
 #     }
 # }
 
+# User Activity Rollup, kept current by the tracked DocTypes
+_user_activity_rollup_events = {
+	"after_insert": "osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.after_insert",
+	"on_update": "osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.on_update",
+	"on_submit": "osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.on_submit",
+	"on_cancel": "osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.on_cancel",
+	"on_trash": "osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.on_trash"
+}
+
 # Account Freeze Validation for GL Entry
+# GL rows posted while their voucher is submitted/cancelled are checked once per voucher
 doc_events = {
+	"*": {
+		"before_submit": "osmani.osmani.utils.account_freeze_validation.begin_voucher_freeze_check",
+		"before_cancel": "osmani.osmani.utils.account_freeze_validation.begin_voucher_freeze_check",
+		"on_submit": "osmani.osmani.utils.account_freeze_validation.end_voucher_freeze_check",
+		"on_cancel": "osmani.osmani.utils.account_freeze_validation.end_voucher_freeze_check"
+	},
 	"GL Entry": {
 		"validate": "osmani.osmani.utils.account_freeze_validation.validate_frozen_account"
-	}
+	},
+	# Record filter conditions can resolve the user's roles (session_user_roles)
+	"User": {
+		"on_update": "osmani.osmani.utils.user_filter_cache.clear_filter_cache"
+	},
+	# Freeze rules on group accounts are indexed by lft/rgt, rebuild when the tree changes
+	"Account": {
+		"on_update": "osmani.osmani.utils.account_freeze_index.clear_freeze_index",
+		"on_trash": "osmani.osmani.utils.account_freeze_index.clear_freeze_index",
+		"after_rename": "osmani.osmani.utils.account_freeze_index.clear_freeze_index"
+	},
+	"Purchase Invoice": _user_activity_rollup_events,
+	"Sales Order": _user_activity_rollup_events,
+	"Sales Invoice": _user_activity_rollup_events,
+	"Payment Entry": _user_activity_rollup_events,
+	"Journal Entry": _user_activity_rollup_events,
+	"Employee Advance": _user_activity_rollup_events,
+	"Expense Claim": _user_activity_rollup_events
 }
 
 fixtures = [
@@ -179,23 +215,12 @@ fixtures = [
 # Scheduled Tasks
 # ---------------
 
-# scheduler_events = {
-# 	"all": [
-# 		"osmani.tasks.all"
-# 	],
-# 	"daily": [
-# 		"osmani.tasks.daily"
-# 	],
-# 	"hourly": [
-# 		"osmani.tasks.hourly"
-# 	],
-# 	"weekly": [
-# 		"osmani.tasks.weekly"
-# 	],
-# 	"monthly": [
-# 		"osmani.tasks.monthly"
-# 	],
-# }
+scheduler_events = {
+	# Runs the User Activity Rollup backfill flagged by the migration patch
+	"hourly": [
+		"osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.enqueue_pending_backfill"
+	],
+}
 
 # Testing
 # -------
@@ -234,12 +259,18 @@ fixtures = [
 # Request Events
 # ----------------
 # before_request = ["osmani.utils.before_request"]
-# after_request = ["osmani.utils.after_request"]
+after_request = ["osmani.osmani.utils.account_freeze_stats.flush_freeze_stats"]
+
+# Session Events
+# ----------------
+on_session_creation = [
+	"osmani.osmani.doctype.user_record_filter.user_record_filter.warm_user_filter_cache"
+]
 
 # Job Events
 # ----------
 # before_job = ["osmani.utils.before_job"]
-# after_job = ["osmani.utils.after_job"]
+after_job = ["osmani.osmani.utils.account_freeze_stats.flush_freeze_stats"]
 
 # User Data Protection
 # --------------------
@@ -0,0 +1,10 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+from osmani.osmani.utils.user_activity_index import add_activity_indexes
+from osmani.osmani.utils.user_filter_integration import register_common_erpnext_doctypes
+
+
+def after_install():
+	register_common_erpnext_doctypes()
+	add_activity_indexes()
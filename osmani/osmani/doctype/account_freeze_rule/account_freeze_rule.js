@@ -2,7 +2,33 @@
 // For license information, please see license.txt
 
 frappe.ui.form.on("Account Freeze Rule", {
+	setup(frm) {
+		frappe.realtime.on("account_freeze_rule_scan_complete", (data) => {
+			if (data.name === frm.doc.name) {
+				frm.reload_doc();
+			}
+		});
+	},
+	
 	refresh(frm) {
+		if (!frm.is_new() && !["Queued", "Running"].includes(frm.doc.scan_status)) {
+			frm.add_custom_button(__("Scan Existing Postings"), () => {
+				frm.call("enqueue_existing_postings_scan").then(() => {
+					frappe.show_alert({message: __("Scan queued"), indicator: "blue"});
+					frm.reload_doc();
+				});
+			});
+		}
+		
+		if (frm.doc.existing_gl_entries) {
+			frm.dashboard.add_comment(
+				__("{0} GL Entries were already posted inside this frozen window", [frm.doc.existing_gl_entries]),
+				"orange",
+				true
+			);
+		}
+		
+
 		// Add custom buttons or indicators
 		if (!frm.is_new() && frm.doc.active) {
 			frm.set_indicator(__("Active"), "green");
@@ -11,7 +37,14 @@ frappe.ui.form.on("Account Freeze Rule", {
 		}
 		
 		// Show warning message
-		if (frm.doc.active) {
+		if (frm.doc.active && frm.doc.freeze_scope === "Company") {
+			frm.dashboard.add_comment(
+				__("Warning: This lock will block all transactions of company {0} from {1} to {2}", 
+				[frm.doc.company || "...", frm.doc.from_date || "...", frm.doc.to_date || "..."]),
+				"yellow",
+				true
+			);
+		} else if (frm.doc.active) {
 			frm.dashboard.add_comment(
 				__("Warning: This freeze rule will block all transactions posting to account {0} from {1} to {2}", 
 				[frm.doc.account || "...", frm.doc.from_date || "...", frm.doc.to_date || "..."]),
@@ -32,6 +65,12 @@ frappe.ui.form.on("Account Freeze Rule", {
 		}
 	},
 	
+	freeze_scope(frm) {
+		if (frm.doc.freeze_scope === "Company") {
+			frm.set_value("account", "");
+		}
+	},
+	
 	from_date(frm) {
 		validate_date_range(frm);
 	},
@@ -4,7 +4,32 @@
 import frappe
 from frappe import _
 from frappe.model.document import Document
-from frappe.utils import getdate
+from frappe.utils import flt, getdate, now_datetime
+
+from osmani.osmani.utils.account_freeze_index import clear_freeze_index
+
+# Composite index serving the queries that run: the active rule load (active), the
+# overlap checks (active, company, date range) and the company lock check
+FREEZE_RULE_INDEX = "active_company_dates"
+FREEZE_RULE_INDEX_FIELDS = ["active", "company", "from_date", "to_date"]
+
+# GL Entries fetched per keyset page by the existing postings scan
+GL_SCAN_CHUNK_SIZE = 5000
+
+# Active rule on the same account, an ancestor or a descendant whose dates overlap
+OVERLAPPING_RULE_QUERY = """
+	SELECT r.name, r.account, r.from_date, r.to_date
+	FROM `tabAccount Freeze Rule` r
+	INNER JOIN `tabAccount` a ON a.name = r.account
+	INNER JOIN `tabAccount` s ON s.name = %(account)s
+	WHERE r.company = %(company)s
+		AND r.active = 1
+		AND r.from_date <= %(to_date)s
+		AND r.to_date >= %(from_date)s
+		AND r.name != %(name)s
+		AND ((a.lft <= s.lft AND a.rgt >= s.rgt) OR (a.lft >= s.lft AND a.rgt <= s.rgt))
+	LIMIT 1
+"""
 
 
 class AccountFreezeRule(Document):
@@ -13,6 +38,35 @@ class AccountFreezeRule(Document):
 		self.validate_account()
 		self.check_overlapping_rules()
 	
+	def after_insert(self):
+		self.queue_existing_postings_scan()
+	
+	def on_update(self):
+		clear_freeze_index()
+	
+	def on_trash(self):
+		clear_freeze_index()
+	
+	def after_rename(self, old, new, merge=False):
+		clear_freeze_index()
+	
+	@frappe.whitelist()
+	def enqueue_existing_postings_scan(self):
+		"""Rescan from the form; run_doc_method only checks read permission"""
+		self.check_permission("write")
+		self.queue_existing_postings_scan()
+	
+	def queue_existing_postings_scan(self):
+		"""Scan GL Entry for postings already inside the frozen window in the background"""
+		self.db_set("scan_status", "Queued", update_modified=False)
+		frappe.enqueue(
+			"osmani.osmani.doctype.account_freeze_rule.account_freeze_rule.scan_existing_gl_entries",
+			queue="long",
+			timeout=3600,
+			enqueue_after_commit=True,
+			rule_name=self.name
+		)
+	
 	def validate_dates(self):
 		"""Validate that from_date is before to_date"""
 		if self.from_date and self.to_date:
@@ -21,6 +75,12 @@ class AccountFreezeRule(Document):
 	
 	def validate_account(self):
 		"""Validate that the account exists and belongs to the company"""
+		if self.freeze_scope == "Company":
+			if not self.company:
+				frappe.throw(_("Company is required for a company-wide lock"))
+			self.account = None
+			return
+		
 		if self.account and self.company:
 			account_company = frappe.db.get_value("Account", self.account, "company")
 			if account_company != self.company:
@@ -29,32 +89,27 @@ class AccountFreezeRule(Document):
 				))
 	
 	def check_overlapping_rules(self):
-		"""Check if there's an overlapping freeze rule for the same account"""
+		"""Check if there's an overlapping freeze rule for the same account, its ancestors or descendants"""
+		if self.freeze_scope == "Company":
+			self.check_overlapping_company_locks()
+			return
+		
 		if not self.account or not self.from_date or not self.to_date:
 			return
 		
-		filters = {
+		# A rule on a group account applies to all its descendants, so rules on
+		# ancestors and descendants of this account conflict as well
+		overlapping = frappe.db.sql(OVERLAPPING_RULE_QUERY, {
 			"account": self.account,
 			"company": self.company,
-			"active": 1,
-			"name": ["!=", self.name]
-		}
-		
-		existing_rules = frappe.get_all(
-			"Account Freeze Rule",
-			filters=filters,
-			fields=["name", "from_date", "to_date"]
-		)
+			"name": self.name,
+			"from_date": self.from_date,
+			"to_date": self.to_date
+		}, as_dict=True)
 		
-		from_date = getdate(self.from_date)
-		to_date = getdate(self.to_date)
-		
-		for rule in existing_rules:
-			rule_from = getdate(rule.from_date)
-			rule_to = getdate(rule.to_date)
-			
-			# Check for overlap
-			if (from_date <= rule_to and to_date >= rule_from):
+		if overlapping:
+			rule = overlapping[0]
+			if rule.account == self.account:
 				frappe.throw(
 					_("Account {0} already has an overlapping freeze rule {1} from {2} to {3}").format(
 						frappe.bold(self.account),
@@ -63,3 +118,159 @@ class AccountFreezeRule(Document):
 						frappe.bold(rule.to_date)
 					)
 				)
+			
+			frappe.throw(
+				_("Account {0} overlaps freeze rule {1} on related account {2} from {3} to {4}").format(
+					frappe.bold(self.account),
+					frappe.bold(rule.name),
+					frappe.bold(rule.account),
+					frappe.bold(rule.from_date),
+					frappe.bold(rule.to_date)
+				)
+			)
+	
+	def check_overlapping_company_locks(self):
+		"""Check if there's an overlapping company-wide lock for the same company"""
+		if not self.from_date or not self.to_date:
+			return
+		
+		overlapping = frappe.get_all(
+			"Account Freeze Rule",
+			filters={
+				"freeze_scope": "Company",
+				"company": self.company,
+				"active": 1,
+				"name": ["!=", self.name],
+				"from_date": ["<=", self.to_date],
+				"to_date": [">=", self.from_date]
+			},
+			fields=["name", "from_date", "to_date"],
+			limit=1
+		)
+		
+		if overlapping:
+			rule = overlapping[0]
+			frappe.throw(
+				_("Company {0} already has an overlapping lock {1} from {2} to {3}").format(
+					frappe.bold(self.company),
+					frappe.bold(rule.name),
+					frappe.bold(rule.from_date),
+					frappe.bold(rule.to_date)
+				)
+			)
+
+
+def get_rule_accounts(rule):
+	"""Return the leaf accounts a freeze rule applies to, sorted by name"""
+	if rule.freeze_scope == "Company":
+		return frappe.get_all(
+			"Account",
+			filters={"company": rule.company, "is_group": 0},
+			order_by="name",
+			pluck="name"
+		)
+	
+	lft, rgt = frappe.db.get_value("Account", rule.account, ["lft", "rgt"]) or (None, None)
+	if lft is None:
+		return [rule.account]
+	
+	return frappe.get_all(
+		"Account",
+		filters={"company": rule.company, "is_group": 0, "lft": [">=", lft], "rgt": ["<=", rgt]},
+		order_by="name",
+		pluck="name"
+	)
+
+
+def scan_existing_gl_entries(rule_name):
+	"""
+	Count and total the GL Entries already posted inside a freeze rule's window.
+	Runs as a background job; GL Entry is read per account in keyset-paginated
+	chunks on (posting_date, name) so no single query scans the whole table.
+	"""
+	rule = frappe.get_doc("Account Freeze Rule", rule_name)
+	frappe.db.set_value("Account Freeze Rule", rule_name, "scan_status", "Running", update_modified=False)
+	frappe.db.commit()
+	
+	try:
+		accounts = get_rule_accounts(rule)
+		count, debit, credit = 0, 0.0, 0.0
+		
+		for idx, account in enumerate(accounts):
+			last_key = None
+			while True:
+				keyset_condition = ""
+				params = {
+					"account": account,
+					"company": rule.company,
+					"from_date": rule.from_date,
+					"to_date": rule.to_date,
+					"chunk_size": GL_SCAN_CHUNK_SIZE
+				}
+				if last_key:
+					keyset_condition = """
+						AND (posting_date > %(last_date)s
+							OR (posting_date = %(last_date)s AND name > %(last_name)s))
+					"""
+					params.update({"last_date": last_key[0], "last_name": last_key[1]})
+				
+				rows = frappe.db.sql(f"""
+					SELECT name, posting_date, debit, credit
+					FROM `tabGL Entry`
+					WHERE account = %(account)s
+						AND company = %(company)s
+						AND is_cancelled = 0
+						AND posting_date BETWEEN %(from_date)s AND %(to_date)s
+						{keyset_condition}
+					ORDER BY posting_date, name
+					LIMIT %(chunk_size)s
+				""", params, as_dict=True)
+				
+				for row in rows:
+					count += 1
+					debit += flt(row.debit)
+					credit += flt(row.credit)
+				
+				if len(rows) < GL_SCAN_CHUNK_SIZE:
+					break
+				last_key = (rows[-1].posting_date, rows[-1].name)
+			
+			frappe.publish_progress(
+				(idx + 1) * 100 / len(accounts),
+				title=_("Scanning existing GL Entries"),
+				doctype="Account Freeze Rule",
+				docname=rule_name,
+				description=account
+			)
+		
+		frappe.db.set_value("Account Freeze Rule", rule_name, {
+			"existing_gl_entries": count,
+			"existing_debit": debit,
+			"existing_credit": credit,
+			"scan_status": "Completed",
+			"last_scanned_on": now_datetime()
+		}, update_modified=False)
+		frappe.db.commit()
+	
+	except Exception:
+		frappe.db.rollback()
+		frappe.db.set_value("Account Freeze Rule", rule_name, "scan_status", "Failed", update_modified=False)
+		frappe.db.commit()
+		frappe.log_error(title=_("Account Freeze Rule scan failed for {0}").format(rule_name))
+		raise
+	
+	frappe.publish_realtime(
+		"account_freeze_rule_scan_complete",
+		{"name": rule_name, "existing_gl_entries": count},
+		doctype="Account Freeze Rule",
+		docname=rule_name
+	)
+
+
+def on_doctype_update():
+	add_freeze_rule_index()
+
+
+def add_freeze_rule_index():
+	"""Create the composite index used by freeze rule lookups, if missing"""
+	frappe.db.add_index("Account Freeze Rule", FREEZE_RULE_INDEX_FIELDS, FREEZE_RULE_INDEX)
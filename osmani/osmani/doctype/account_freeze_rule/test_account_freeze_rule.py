@@ -5,6 +5,8 @@ import frappe
 from frappe.tests.utils import FrappeTestCase
 from frappe.utils import today, add_days, getdate
 
+from osmani.osmani.utils.account_freeze_index import get_freeze_index, invalidate_freeze_index
+
 
 class TestAccountFreezeRule(FrappeTestCase):
 	def setUp(self):
@@ -31,6 +33,7 @@ class TestAccountFreezeRule(FrappeTestCase):
 			WHERE company = %s
 		""", self.test_company)
 		frappe.db.commit()
+		invalidate_freeze_index()
 	
 	def get_or_create_test_account(self):
 		"""Get or create a test account"""
@@ -204,3 +207,378 @@ class TestAccountFreezeRule(FrappeTestCase):
 			add_days(today(), 20)
 		)
 		self.assertFalse(result["is_frozen"])
+	
+	def test_validate_frozen_account(self):
+		"""Test the GL Entry hook against the in-memory rule index"""
+		from osmani.osmani.utils.account_freeze_validation import validate_frozen_account
+		
+		freeze_rule = frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1,
+			"reason": "Test freeze"
+		})
+		freeze_rule.insert()
+		
+		gl_entry = frappe._dict({
+			"account": self.test_account,
+			"company": self.test_company,
+			"posting_date": today(),
+			"docstatus": 1
+		})
+		
+		with self.assertRaises(frappe.ValidationError):
+			validate_frozen_account(gl_entry)
+		
+		# Dates outside the frozen window are allowed
+		gl_entry.posting_date = add_days(today(), 11)
+		validate_frozen_account(gl_entry)
+		
+		# Deactivating the rule invalidates the index
+		freeze_rule.active = 0
+		freeze_rule.save()
+		gl_entry.posting_date = today()
+		validate_frozen_account(gl_entry)
+	
+	def test_freeze_index_intervals(self):
+		"""Test bisect lookup across several rules for one account"""
+		for from_days, to_days in ((-60, -40), (-30, -10), (5, 15)):
+			frappe.get_doc({
+				"doctype": "Account Freeze Rule",
+				"account": self.test_account,
+				"company": self.test_company,
+				"from_date": add_days(today(), from_days),
+				"to_date": add_days(today(), to_days),
+				"active": 1
+			}).insert()
+		
+		index = get_freeze_index()
+		
+		self.assertTrue(index.find_rule(self.test_company, self.test_account, add_days(today(), -60)))
+		self.assertTrue(index.find_rule(self.test_company, self.test_account, add_days(today(), -20)))
+		self.assertTrue(index.find_rule(self.test_company, self.test_account, add_days(today(), 15)))
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, add_days(today(), -61)))
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, add_days(today(), -35)))
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, today()))
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, add_days(today(), 16)))
+	
+	def test_voucher_scoped_validation(self):
+		"""Test that GL rows of a voucher being submitted are checked once, at the end"""
+		from osmani.osmani.utils.account_freeze_validation import (
+			begin_voucher_freeze_check,
+			end_voucher_freeze_check,
+			validate_frozen_account,
+		)
+		
+		frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		}).insert()
+		
+		voucher = frappe._dict({"doctype": "Journal Entry", "name": "_Test Freeze JV"})
+		begin_voucher_freeze_check(voucher)
+		
+		for _ in range(3):
+			# Deferred while the voucher scope is open
+			validate_frozen_account(frappe._dict({
+				"account": self.test_account,
+				"company": self.test_company,
+				"posting_date": today(),
+				"voucher_type": voucher.doctype,
+				"voucher_no": voucher.name,
+				"docstatus": 1
+			}))
+		
+		with self.assertRaises(frappe.ValidationError):
+			end_voucher_freeze_check(voucher)
+		
+		# Scope is closed, nothing left to validate
+		end_voucher_freeze_check(voucher)
+	
+	def test_get_frozen_gl_entries(self):
+		"""Test batched freeze resolution over a GL map"""
+		from osmani.osmani.utils.account_freeze_validation import get_frozen_gl_entries
+		
+		frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		}).insert()
+		
+		gl_map = [
+			{"account": self.test_account, "company": self.test_company, "posting_date": today()},
+			{"account": self.test_account, "company": self.test_company, "posting_date": today()},
+			{"account": self.test_account, "company": self.test_company, "posting_date": add_days(today(), 20)},
+		]
+		
+		frozen = get_frozen_gl_entries(gl_map)
+		self.assertEqual(len(frozen), 1)
+		self.assertEqual(frozen[0][0], self.test_account)
+	
+	def test_bulk_freeze_status_and_calendar(self):
+		"""Test the batched status API and the etag-guarded frozen calendar"""
+		from osmani.osmani.utils.account_freeze_validation import (
+			check_account_freeze_status_bulk,
+			get_frozen_calendar,
+		)
+		
+		frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		}).insert()
+		
+		results = check_account_freeze_status_bulk(self.test_company, [
+			[self.test_account, today()],
+			{"account": self.test_account, "posting_date": add_days(today(), 20)},
+		])
+		self.assertEqual([r["is_frozen"] for r in results], [True, False])
+		
+		calendar = get_frozen_calendar(self.test_company)
+		self.assertEqual(
+			calendar["accounts"][self.test_account],
+			[[str(getdate(add_days(today(), -10))), str(getdate(add_days(today(), 10)))]]
+		)
+		
+		self.assertEqual(calendar["groups"], [])
+		self.assertEqual(calendar["company_lock"], [])
+		
+		# Unchanged rules return not_modified for the same etag
+		self.assertTrue(get_frozen_calendar(self.test_company, etag=calendar["etag"])["not_modified"])
+		
+		# The calendar is per company
+		with self.assertRaises(frappe.ValidationError):
+			get_frozen_calendar(None)
+	
+	def get_or_create_group_with_child(self):
+		"""Get or create a group account with one leaf account under it"""
+		group_name = "Test Frozen Group - TC"
+		child_name = "Test Frozen Child - TC"
+		
+		if not frappe.db.exists("Account", group_name):
+			parent_account = frappe.db.get_value(
+				"Account", {"company": self.test_company, "is_group": 1, "root_type": "Expense"}, "name"
+			)
+			frappe.get_doc({
+				"doctype": "Account",
+				"account_name": "Test Frozen Group",
+				"company": self.test_company,
+				"parent_account": parent_account,
+				"root_type": "Expense",
+				"report_type": "Profit and Loss",
+				"is_group": 1
+			}).insert(ignore_permissions=True)
+		
+		if not frappe.db.exists("Account", child_name):
+			frappe.get_doc({
+				"doctype": "Account",
+				"account_name": "Test Frozen Child",
+				"company": self.test_company,
+				"parent_account": group_name,
+				"root_type": "Expense",
+				"report_type": "Profit and Loss",
+				"account_type": "Expense Account",
+				"is_group": 0
+			}).insert(ignore_permissions=True)
+		
+		return group_name, child_name
+	
+	def test_group_rule_applies_to_descendants(self):
+		"""Test that a rule on a group account freezes its descendants"""
+		group_account, child_account = self.get_or_create_group_with_child()
+		
+		frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": group_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		}).insert()
+		
+		index = get_freeze_index()
+		rule = index.find_rule(self.test_company, child_account, today())
+		self.assertTrue(rule)
+		self.assertEqual(rule.account, group_account)
+		self.assertIsNone(index.find_rule(self.test_company, child_account, add_days(today(), 20)))
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, today()))
+		
+		# The calendar sends the group rule as its lft/rgt range, not one entry per descendant
+		from osmani.osmani.utils.account_freeze_validation import get_frozen_calendar
+		
+		calendar = get_frozen_calendar(self.test_company)
+		lft, rgt = frappe.db.get_value("Account", group_account, ["lft", "rgt"])
+		self.assertNotIn(child_account, calendar["accounts"])
+		self.assertEqual(calendar["groups"], [{
+			"account": group_account,
+			"lft": lft,
+			"rgt": rgt,
+			"intervals": [[str(getdate(add_days(today(), -10))), str(getdate(add_days(today(), 10)))]]
+		}])
+		child_lft = frappe.db.get_value("Account", child_account, "lft")
+		self.assertTrue(lft <= child_lft <= rgt)
+		
+		# A rule on the descendant overlapping the group rule is rejected
+		with self.assertRaises(frappe.ValidationError):
+			frappe.get_doc({
+				"doctype": "Account Freeze Rule",
+				"account": child_account,
+				"company": self.test_company,
+				"from_date": today(),
+				"to_date": add_days(today(), 5),
+				"active": 1
+			}).insert()
+	
+	def test_company_lock(self):
+		"""Test that a company-wide lock freezes every account of the company"""
+		from osmani.osmani.utils.account_freeze_validation import get_frozen_accounts_for_date
+		
+		lock = frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"freeze_scope": "Company",
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1,
+			"reason": "Month-end close"
+		})
+		lock.insert()
+		
+		index = get_freeze_index()
+		self.assertEqual(index.find_rule(self.test_company, self.test_account, today()).name, lock.name)
+		self.assertIsNone(index.find_rule(self.test_company, self.test_account, add_days(today(), 20)))
+		self.assertEqual([r.name for r in get_frozen_accounts_for_date(self.test_company, today())], [lock.name])
+		
+		# Overlapping company locks are rejected
+		with self.assertRaises(frappe.ValidationError):
+			frappe.get_doc({
+				"doctype": "Account Freeze Rule",
+				"freeze_scope": "Company",
+				"company": self.test_company,
+				"from_date": today(),
+				"to_date": add_days(today(), 30),
+				"active": 1
+			}).insert()
+	
+	def test_freeze_rule_index_is_used(self):
+		"""Test via EXPLAIN that the rule load and overlap queries read the composite index"""
+		from osmani.osmani.doctype.account_freeze_rule.account_freeze_rule import (
+			FREEZE_RULE_INDEX,
+			OVERLAPPING_RULE_QUERY,
+		)
+		from osmani.osmani.utils.account_freeze_index import ACTIVE_RULES_QUERY
+		from osmani.patches.v1_0.add_account_freeze_rule_index import execute
+		
+		execute()
+		self.assertTrue(frappe.db.has_index("tabAccount Freeze Rule", FREEZE_RULE_INDEX))
+		
+		# Enough inactive history that active = 1 is selective, as on a real site
+		timestamp = frappe.utils.now()
+		frappe.db.bulk_insert(
+			"Account Freeze Rule",
+			["name", "creation", "modified", "owner", "modified_by", "freeze_scope", "company",
+				"account", "from_date", "to_date", "active"],
+			[
+				(f"_Test Inactive Freeze {i:04d}", timestamp, timestamp, "Administrator", "Administrator",
+					"Account", self.test_company, self.test_account,
+					add_days(today(), -400 - i), add_days(today(), -400 - i), 0)
+				for i in range(500)
+			]
+		)
+		frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		}).insert()
+		frappe.db.sql("ANALYZE TABLE `tabAccount Freeze Rule`")
+		
+		overlap_params = {
+			"account": self.test_account,
+			"company": self.test_company,
+			"name": "",
+			"from_date": today(),
+			"to_date": today()
+		}
+		
+		for query, params in ((ACTIVE_RULES_QUERY, None), (OVERLAPPING_RULE_QUERY, overlap_params)):
+			plan = frappe.db.sql("EXPLAIN " + query, params, as_dict=True)
+			rule_rows = [row for row in plan if row.table == "r"]
+			self.assertTrue(rule_rows)
+			self.assertEqual(rule_rows[0].key, FREEZE_RULE_INDEX)
+	
+	def test_scan_existing_gl_entries(self):
+		"""Test the background scan of GL Entries already inside the frozen window"""
+		from osmani.osmani.doctype.account_freeze_rule.account_freeze_rule import scan_existing_gl_entries
+		
+		freeze_rule = frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		})
+		freeze_rule.insert()
+		self.assertEqual(freeze_rule.scan_status, "Queued")
+		
+		scan_existing_gl_entries(freeze_rule.name)
+		freeze_rule.reload()
+		
+		expected = frappe.db.count("GL Entry", {
+			"account": self.test_account,
+			"company": self.test_company,
+			"is_cancelled": 0,
+			"posting_date": ["between", [freeze_rule.from_date, freeze_rule.to_date]]
+		})
+		self.assertEqual(freeze_rule.scan_status, "Completed")
+		self.assertEqual(freeze_rule.existing_gl_entries, expected)
+	
+	def test_freeze_check_stats(self):
+		"""Test that checks, rejections and latency are counted"""
+		from osmani.osmani.utils.account_freeze_stats import get_freeze_check_summary, reset_freeze_check_stats
+		from osmani.osmani.utils.account_freeze_validation import validate_frozen_account
+		
+		freeze_rule = frappe.get_doc({
+			"doctype": "Account Freeze Rule",
+			"account": self.test_account,
+			"company": self.test_company,
+			"from_date": add_days(today(), -10),
+			"to_date": add_days(today(), 10),
+			"active": 1
+		})
+		freeze_rule.insert()
+		reset_freeze_check_stats()
+		
+		gl_entry = frappe._dict({
+			"account": self.test_account,
+			"company": self.test_company,
+			"posting_date": add_days(today(), 20),
+			"docstatus": 1
+		})
+		validate_frozen_account(gl_entry)
+		
+		gl_entry.posting_date = today()
+		with self.assertRaises(frappe.ValidationError):
+			validate_frozen_account(gl_entry)
+		
+		stats = get_freeze_check_summary()
+		self.assertEqual(stats["checks"], 2)
+		self.assertEqual(stats["rejected"], 1)
+		self.assertEqual(stats["rejected_by_rule"], [{"rule": freeze_rule.name, "count": 1}])
+		self.assertEqual(sum(b["count"] for b in stats["latency_histogram"]), 2)
@@ -1,8 +1,75 @@
 // Copyright (c) 2026, Ubaid Ali and contributors
 // For license information, please see license.txt
 
-// frappe.ui.form.on("Daily Transaction Log", {
-// 	refresh(frm) {
+frappe.ui.form.on("Daily Transaction Log", {
+	onload(frm) {
+		// Rows are checked locally against the frozen calendar, no per-row server calls
+		osmani.account_freeze.prepare(get_accounts(frm));
+	},
 
-// 	},
-// });
+	validate(frm) {
+		// Returned so the save waits for the accounts' companies and their calendars
+		return osmani.account_freeze.prepare(get_accounts(frm)).then(() => {
+			let frozen = get_frozen_rows(frm);
+			if (frozen.length) {
+				frappe.validated = false;
+				frappe.msgprint({
+					title: __("Account Frozen"),
+					indicator: "red",
+					message: __("The following accounts are frozen on {0}:", [frm.doc.posting_date]) +
+						"<br>" + frozen.join("<br>"),
+				});
+			}
+		});
+	},
+});
+
+frappe.ui.form.on("Transaction Log Detail", {
+	from_account(frm, cdt, cdn) {
+		warn_if_frozen(frm, locals[cdt][cdn].from_account);
+	},
+
+	to_account(frm, cdt, cdn) {
+		warn_if_frozen(frm, locals[cdt][cdn].to_account);
+	},
+});
+
+function get_accounts(frm) {
+	let accounts = new Set();
+	(frm.doc.transactions || []).forEach((row) => {
+		["from_account", "to_account"].forEach((fieldname) => {
+			if (row[fieldname]) {
+				accounts.add(row[fieldname]);
+			}
+		});
+	});
+	return [...accounts];
+}
+
+function get_frozen_rows(frm) {
+	let frozen = [];
+	(frm.doc.transactions || []).forEach((row) => {
+		["from_account", "to_account"].forEach((fieldname) => {
+			// Company locks apply through the company of the row's account
+			if (osmani.account_freeze.is_frozen(row[fieldname], frm.doc.posting_date)) {
+				frozen.push(__("Row {0}: {1}", [row.idx, row[fieldname]]));
+			}
+		});
+	});
+	return frozen;
+}
+
+function warn_if_frozen(frm, account) {
+	if (!account) {
+		return;
+	}
+
+	osmani.account_freeze.prepare([account]).then(() => {
+		if (osmani.account_freeze.is_frozen(account, frm.doc.posting_date)) {
+			frappe.show_alert({
+				message: __("Account {0} is frozen on {1}", [account, frm.doc.posting_date]),
+				indicator: "red",
+			});
+		}
+	});
+}
@@ -0,0 +1,149 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+import copy
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_days, flt
+
+from osmani.osmani.doctype.user_activity_rollup import user_activity_rollup as rollup
+from osmani.osmani.doctype.user_activity_rollup.user_activity_rollup import (
+	get_user_activity_counts,
+	rebuild_window,
+)
+
+TEST_OWNER = "test-activity-rollup@example.com"
+TEST_DOCTYPE = "Journal Entry"
+
+# A day no real document is created on, since rebuild_window recounts the whole day
+TEST_DATE = "2000-01-03"
+
+
+class FakeDoc(frappe._dict):
+	"""Stand-in for a Journal Entry passed to the document events, backed by a raw row"""
+
+	def get_doc_before_save(self):
+		return self.get("_before")
+
+
+class TestUserActivityRollup(FrappeTestCase):
+	def setUp(self):
+		"""Start from an empty rollup day"""
+		self.delete_test_rows()
+
+	def tearDown(self):
+		"""Clean up test data"""
+		self.delete_test_rows()
+		frappe.db.commit()
+
+	def delete_test_rows(self):
+		frappe.db.sql(f"DELETE FROM `tab{TEST_DOCTYPE}` WHERE owner = %s", TEST_OWNER)
+		frappe.db.sql("""
+			DELETE FROM `tabUser Activity Rollup`
+			WHERE reference_doctype = %s AND activity_date = %s
+		""", (TEST_DOCTYPE, TEST_DATE))
+
+	# Each step changes the raw row and fires the events Frappe fires for that action
+
+	def insert(self, name, amount):
+		doc = FakeDoc(
+			doctype=TEST_DOCTYPE, name=name, owner=TEST_OWNER,
+			creation=f"{TEST_DATE} 10:00:00", docstatus=0, total_debit=amount
+		)
+		frappe.db.sql(f"""
+			INSERT INTO `tab{TEST_DOCTYPE}` (name, creation, modified, owner, modified_by, docstatus, total_debit)
+			VALUES (%(name)s, %(creation)s, %(creation)s, %(owner)s, %(owner)s, 0, %(total_debit)s)
+		""", doc)
+		rollup.on_update(doc)
+		rollup.after_insert(doc)
+		return doc
+
+	def save(self, doc, **changes):
+		doc._before = copy.copy(doc)
+		doc.update(changes)
+		self.update_row(doc)
+		rollup.on_update(doc)
+
+	def submit(self, doc, **changes):
+		# Submitting is a save too: on_update sees the draft before on_submit moves it
+		self.save(doc, docstatus=1, **changes)
+		rollup.on_submit(doc)
+
+	def cancel(self, doc):
+		doc.docstatus = 2
+		self.update_row(doc)
+		rollup.on_cancel(doc)
+
+	def trash(self, doc):
+		rollup.on_trash(doc)
+		frappe.db.sql(f"DELETE FROM `tab{TEST_DOCTYPE}` WHERE name = %s", doc.name)
+
+	def update_row(self, doc):
+		frappe.db.sql(f"""
+			UPDATE `tab{TEST_DOCTYPE}` SET docstatus = %(docstatus)s, total_debit = %(total_debit)s
+			WHERE name = %(name)s
+		""", {"name": doc.name, "docstatus": doc.docstatus, "total_debit": doc.total_debit})
+
+	def get_rollup_rows(self):
+		"""(name, status, count, amount) of the test day, without rows every change has cancelled out"""
+		rows = frappe.db.sql("""
+			SELECT name, document_status, entry_count, total_amount
+			FROM `tabUser Activity Rollup`
+			WHERE user = %s AND reference_doctype = %s AND activity_date = %s
+		""", (TEST_OWNER, TEST_DOCTYPE, TEST_DATE), as_dict=True)
+
+		return sorted(
+			(row.name, row.document_status, row.entry_count, flt(row.total_amount, 2))
+			for row in rows
+			if row.entry_count or flt(row.total_amount, 2)
+		)
+
+	def assert_matches_recount(self):
+		"""The rollup kept by the events equals a recount of the source rows"""
+		incremental = self.get_rollup_rows()
+		rebuild_window(TEST_DOCTYPE, TEST_DATE, add_days(TEST_DATE, 1))
+		self.assertEqual(incremental, self.get_rollup_rows())
+		return incremental
+
+	def test_insert(self):
+		"""Test that a new document is counted as Draft"""
+		self.insert("UAR-TEST-1", 100)
+
+		rows = self.assert_matches_recount()
+		self.assertEqual([row[1:] for row in rows], [(0, 1, 100)])
+
+	def test_document_lifecycle(self):
+		"""Test that inserts, amount edits, submits, cancels and deletes match the recount"""
+		submitted = self.insert("UAR-TEST-1", 100)
+		self.save(submitted, total_debit=150)
+		self.submit(submitted)
+
+		cancelled = self.insert("UAR-TEST-2", 200)
+		self.submit(cancelled)
+		self.cancel(cancelled)
+
+		# Amount changed in the same save that submits it
+		edited = self.insert("UAR-TEST-3", 300)
+		self.submit(edited, total_debit=350)
+		self.cancel(edited)
+		self.trash(edited)
+
+		draft = self.insert("UAR-TEST-4", 400)
+		self.save(draft, total_debit=50)
+		self.insert("UAR-TEST-5", 500)
+		self.trash(draft)
+
+		rows = self.assert_matches_recount()
+		self.assertEqual(sorted(row[1:] for row in rows), [(0, 1, 500), (1, 1, 150), (2, 1, 200)])
+
+	def test_activity_counts(self):
+		"""Test that the page counts read the rollup kept by the events"""
+		self.submit(self.insert("UAR-TEST-1", 100))
+		self.insert("UAR-TEST-2", 200)
+
+		counts = get_user_activity_counts(TEST_OWNER, from_date=TEST_DATE, to_date=TEST_DATE)
+		self.assertEqual(counts[TEST_DOCTYPE], 2)
+
+		counts = get_user_activity_counts(TEST_OWNER, from_date=TEST_DATE, to_date=TEST_DATE, document_status=1)
+		self.assertEqual(counts[TEST_DOCTYPE], 1)
@@ -0,0 +1,301 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+import hashlib
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import add_days, cint, flt, getdate, now
+
+# Tracked DocTypes and the amount summed into the rollup
+ROLLUP_DOCTYPES = {
+	"Purchase Invoice": "grand_total",
+	"Sales Order": "grand_total",
+	"Sales Invoice": "grand_total",
+	"Payment Entry": "paid_amount",
+	"Journal Entry": "total_debit",
+	"Employee Advance": "advance_amount",
+	"Expense Claim": "total_sanctioned_amount",
+}
+
+# Composite index serving the report and page lookups
+ROLLUP_INDEX = "user_date_doctype"
+ROLLUP_INDEX_FIELDS = ["user", "activity_date", "reference_doctype"]
+
+# Days of source rows recounted per backfill transaction
+BACKFILL_WINDOW_DAYS = 31
+
+# Default set by the migration patch, picked up by the hourly scheduler
+BACKFILL_PENDING_KEY = "user_activity_rollup_backfill_pending"
+BACKFILL_JOB_ID = "user_activity_rollup_backfill"
+
+
+class UserActivityRollup(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		activity_date: DF.Date | None
+		document_status: DF.Int
+		entry_count: DF.Int
+		reference_doctype: DF.Link | None
+		total_amount: DF.Currency
+		user: DF.Link | None
+	# end: auto-generated types
+
+	pass
+
+
+def rollup_name(user, doctype, activity_date, status):
+	"""Deterministic row name, the backfill computes the same MD5(CONCAT_WS('|', ...)) in SQL"""
+	key = "|".join((user, doctype, str(getdate(activity_date)), str(status)))
+	return hashlib.md5(key.encode()).hexdigest()
+
+
+def apply_deltas(doctype, user, activity_date, deltas):
+	"""Add (status, count, amount) deltas to the rollup rows of one user, DocType and day"""
+	timestamp = now()
+	rows = []
+	values = []
+	for status, count, amount in deltas:
+		rows.append("(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)")
+		values.extend((
+			rollup_name(user, doctype, activity_date, status), timestamp, timestamp,
+			frappe.session.user, frappe.session.user,
+			user, doctype, activity_date, status, count, amount,
+		))
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabUser Activity Rollup`
+			(name, creation, modified, owner, modified_by,
+			user, reference_doctype, activity_date, document_status, entry_count, total_amount)
+		VALUES {", ".join(rows)}
+		ON DUPLICATE KEY UPDATE
+			entry_count = entry_count + VALUES(entry_count),
+			total_amount = total_amount + VALUES(total_amount),
+			modified = VALUES(modified)
+		""",
+		values,
+	)
+
+
+def get_amount(doc):
+	return flt(doc.get(ROLLUP_DOCTYPES[doc.doctype]))
+
+
+def update_rollup(doc, deltas):
+	apply_deltas(doc.doctype, doc.owner, getdate(doc.creation), deltas)
+
+
+# Document events of the tracked DocTypes, each moves the document between status rows.
+# Documents are always counted as Draft on insert: inserting a submitted document also
+# fires on_submit, which moves it to Submitted.
+def after_insert(doc, method=None):
+	update_rollup(doc, [(0, 1, get_amount(doc))])
+
+
+def on_update(doc, method=None):
+	"""Carry amount edits into the row of the status the document was saved from"""
+	before = doc.get_doc_before_save()
+	if not before:
+		return
+
+	delta = get_amount(doc) - get_amount(before)
+	if delta:
+		update_rollup(doc, [(before.docstatus, 0, delta)])
+
+
+def on_submit(doc, method=None):
+	amount = get_amount(doc)
+	update_rollup(doc, [(0, -1, -amount), (1, 1, amount)])
+
+
+def on_cancel(doc, method=None):
+	amount = get_amount(doc)
+	update_rollup(doc, [(1, -1, -amount), (2, 1, amount)])
+
+
+def on_trash(doc, method=None):
+	update_rollup(doc, [(doc.docstatus, -1, -get_amount(doc))])
+
+
+def backfill_rollup(doctypes=None, from_date=None, window_days=BACKFILL_WINDOW_DAYS):
+	"""
+	Recount the rollup from the source tables, one `window_days` range of creation
+	dates per transaction. Each window replaces its rollup rows, so the backfill
+	can be rerun or resumed from `from_date` at any time.
+	"""
+	for doctype in doctypes or ROLLUP_DOCTYPES:
+		if doctype not in ROLLUP_DOCTYPES:
+			frappe.throw(_("{0} is not tracked by the User Activity Rollup").format(doctype))
+
+		# HRMS DocTypes are only present when the app is installed
+		if not frappe.db.table_exists(doctype):
+			continue
+
+		first, last = frappe.db.sql(f"SELECT MIN(creation), MAX(creation) FROM `tab{doctype}`")[0]
+		if not first:
+			continue
+
+		start = getdate(from_date or first)
+		while start <= getdate(last):
+			end = add_days(start, window_days)
+			rebuild_window(doctype, start, end)
+			frappe.db.commit()
+			start = end
+
+
+def schedule_backfill():
+	"""Flag a full backfill for the next scheduler run instead of running it now"""
+	frappe.db.set_default(BACKFILL_PENDING_KEY, 1)
+
+
+def enqueue_pending_backfill():
+	"""Hourly scheduler event: start the flagged backfill on the long queue, once"""
+	if not cint(frappe.db.get_default(BACKFILL_PENDING_KEY)):
+		return
+
+	frappe.enqueue(
+		"osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.run_pending_backfill",
+		queue="long",
+		timeout=4 * 3600,
+		job_id=BACKFILL_JOB_ID,
+		deduplicate=True,
+	)
+
+
+def run_pending_backfill():
+	backfill_rollup()
+	frappe.db.set_default(BACKFILL_PENDING_KEY, 0)
+	frappe.db.commit()
+
+
+def rebuild_window(doctype, start, end):
+	params = {
+		"doctype": doctype,
+		"start": start,
+		"end": end,
+		"timestamp": now(),
+		"session_user": frappe.session.user,
+	}
+
+	frappe.db.sql(
+		"""
+		DELETE FROM `tabUser Activity Rollup`
+		WHERE reference_doctype = %(doctype)s
+			AND activity_date >= %(start)s AND activity_date < %(end)s
+		""",
+		params,
+	)
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tabUser Activity Rollup`
+			(name, creation, modified, owner, modified_by,
+			user, reference_doctype, activity_date, document_status, entry_count, total_amount)
+		SELECT
+			MD5(CONCAT_WS('|', owner, %(doctype)s, DATE(creation), docstatus)),
+			%(timestamp)s, %(timestamp)s, %(session_user)s, %(session_user)s,
+			owner, %(doctype)s, DATE(creation), docstatus,
+			COUNT(*), COALESCE(SUM({ROLLUP_DOCTYPES[doctype]}), 0)
+		FROM `tab{doctype}`
+		WHERE creation >= %(start)s AND creation < %(end)s AND owner IS NOT NULL
+		GROUP BY owner, DATE(creation), docstatus
+		""",
+		params,
+	)
+
+
+@frappe.whitelist()
+def get_user_activity_counts(user, from_date=None, to_date=None, document_status=None):
+	"""
+	Document count per tracked DocType for one user.
+
+	Read from the rollup only where the viewer can read every document of the
+	DocType; where record filters, user permissions or owner-only access apply,
+	the documents are counted through frappe.get_list instead. DocTypes the
+	viewer cannot read are counted as 0.
+	"""
+	if user != frappe.session.user and not frappe.get_doc("Report", "User Activity Report").is_permitted():
+		frappe.throw(_("Not permitted to view activity of other users"), frappe.PermissionError)
+
+	counts = dict.fromkeys(ROLLUP_DOCTYPES, 0)
+	rollup_doctypes = []
+	for doctype in ROLLUP_DOCTYPES:
+		if not frappe.db.table_exists(doctype) or not frappe.has_permission(doctype, "read"):
+			continue
+		if is_restricted(doctype):
+			counts[doctype] = count_documents(doctype, user, from_date, to_date, document_status)
+		else:
+			rollup_doctypes.append(doctype)
+
+	if not rollup_doctypes:
+		return counts
+
+	conditions = ["user = %(user)s", "reference_doctype IN %(doctypes)s"]
+	params = {"user": user, "doctypes": rollup_doctypes}
+
+	if from_date:
+		conditions.append("activity_date >= %(from_date)s")
+		params["from_date"] = getdate(from_date)
+
+	if to_date:
+		conditions.append("activity_date <= %(to_date)s")
+		params["to_date"] = getdate(to_date)
+
+	if document_status not in (None, ""):
+		conditions.append("document_status = %(document_status)s")
+		params["document_status"] = int(document_status)
+
+	for doctype, count in frappe.db.sql(
+		f"""
+		SELECT reference_doctype, SUM(entry_count)
+		FROM `tabUser Activity Rollup`
+		WHERE {" AND ".join(conditions)}
+		GROUP BY reference_doctype
+		""",
+		params,
+	):
+		counts[doctype] = int(count or 0)
+
+	return counts
+
+
+def is_restricted(doctype, viewer=None):
+	"""Whether the viewer's list of `doctype` is narrower than the whole table"""
+	from osmani.osmani.doctype.user_record_filter.user_record_filter import get_permission_query_conditions
+
+	viewer = viewer or frappe.session.user
+	if viewer == "Administrator":
+		return False
+
+	return bool(
+		get_permission_query_conditions(doctype, viewer)
+		or frappe.get_hooks("permission_query_conditions", {}).get(doctype)
+		or frappe.permissions.get_user_permissions(viewer)
+		or frappe.permissions.get_role_permissions(doctype, viewer).get("if_owner", {}).get("read")
+	)
+
+
+def count_documents(doctype, user, from_date=None, to_date=None, document_status=None):
+	"""Count `user`'s documents like the rollup does, with the viewer's permissions applied"""
+	filters = [["owner", "=", user]]
+	if from_date:
+		filters.append(["creation", ">=", f"{getdate(from_date)} 00:00:00"])
+	if to_date:
+		filters.append(["creation", "<=", f"{getdate(to_date)} 23:59:59.999999"])
+	if document_status not in (None, ""):
+		filters.append(["docstatus", "=", cint(document_status)])
+
+	result = frappe.get_list(doctype, filters=filters, fields=["count(name) as total_count"])
+	return cint(result[0].total_count) if result else 0
+
+
+def on_doctype_update():
+	frappe.db.add_index("User Activity Rollup", ROLLUP_INDEX_FIELDS, ROLLUP_INDEX)
@@ -0,0 +1,341 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from osmani.osmani.doctype.user_record_filter.user_record_filter import (
+	NEVER_RULE,
+	build_child_condition,
+	build_prefix_condition,
+	compile_rules,
+	get_permission_query_conditions,
+	get_user_filters,
+	has_permission,
+	load_user_filters,
+	normalize_rules,
+)
+from osmani.osmani.doctype.user_record_filter_allowlist.user_record_filter_allowlist import (
+	ALLOWLIST_MIN_VALUES,
+)
+from osmani.osmani.utils.user_filter_cache import clear_filter_cache, get_filtered_doctypes
+
+TEST_USER = "test-record-filter@example.com"
+TEST_MARKER = "URF Test"
+
+
+class TestUserRecordFilter(FrappeTestCase):
+	def setUp(self):
+		"""Set up test data"""
+		if not frappe.db.exists("User", TEST_USER):
+			frappe.get_doc({
+				"doctype": "User",
+				"email": TEST_USER,
+				"first_name": "Record Filter",
+				"send_welcome_email": 0,
+				"roles": [{"role": "Accounts User"}]
+			}).insert(ignore_permissions=True)
+
+		# Registry entries added by the filters of a test are removed again in tearDown
+		self.registered = set(frappe.get_all("User Record Filter Registry", pluck="name"))
+
+	def tearDown(self):
+		"""Clean up test data"""
+		filters = frappe.get_all("User Record Filter", filters={"user": TEST_USER}, pluck="name")
+		if filters:
+			frappe.db.sql("""
+				DELETE FROM `tabUser Record Filter Detail`
+				WHERE parenttype = 'User Record Filter' AND parent IN %(filters)s
+			""", {"filters": filters})
+		frappe.db.sql("DELETE FROM `tabUser Record Filter` WHERE user = %s", TEST_USER)
+		frappe.db.sql("DELETE FROM `tabUser Record Filter Allowlist` WHERE user = %s", TEST_USER)
+
+		frappe.db.sql("DELETE FROM `tabToDo` WHERE description LIKE %s", f"{TEST_MARKER}%")
+		notes = frappe.get_all("Note", filters={"title": ["like", f"{TEST_MARKER}%"]}, pluck="name")
+		if notes:
+			frappe.db.sql("DELETE FROM `tabNote Seen By` WHERE parent IN %(notes)s", {"notes": notes})
+			frappe.db.sql("DELETE FROM `tabNote` WHERE name IN %(notes)s", {"notes": notes})
+
+		added = set(frappe.get_all("User Record Filter Registry", pluck="name")) - self.registered
+		for doctype in added:
+			frappe.db.delete("User Record Filter Registry", {"name": doctype})
+
+		frappe.db.commit()
+		clear_filter_cache()
+
+	def create_filter(self, details):
+		"""Create an active filter for the test user from (doctype, field, restriction, value) tuples"""
+		return frappe.get_doc({
+			"doctype": "User Record Filter",
+			"user": TEST_USER,
+			"active": 1,
+			"filter_details": [
+				{
+					"doctype_name": doctype,
+					"field_name": field,
+					"restriction_type": restriction_type,
+					"filter_value": value,
+					"active": 1
+				}
+				for doctype, field, restriction_type, value in details
+			]
+		}).insert()
+
+	def create_todo(self, description, **fields):
+		return frappe.get_doc(dict(
+			doctype="ToDo", description=f"{TEST_MARKER} {description}", allocated_to=TEST_USER, **fields
+		)).insert(ignore_permissions=True)
+
+	def visible(self, doctype, names):
+		"""Names among `names` the test user's permission condition lets through, queried for real"""
+		condition = get_permission_query_conditions(doctype, TEST_USER) or "1=1"
+		return set(frappe.db.sql_list(
+			f"SELECT name FROM `tab{doctype}` WHERE name IN %(names)s AND {condition}",
+			{"names": names}
+		))
+
+	def test_in_filter_hides_other_rows(self):
+		"""Test that rows outside the allowed values are hidden from queries"""
+		high = self.create_todo("high", priority="High")
+		low = self.create_todo("low", priority="Low")
+		self.create_filter([("ToDo", "priority", "in", "High, Medium")])
+
+		self.assertEqual(self.visible("ToDo", [high.name, low.name]), {high.name})
+
+	def test_has_permission_hook(self):
+		"""Test that the "*" has_permission hook denies hidden documents and has no opinion otherwise"""
+		high = self.create_todo("high", priority="High")
+		low = self.create_todo("low", priority="Low")
+		self.create_filter([("ToDo", "priority", "equals", "High")])
+
+		self.assertIn(
+			"osmani.osmani.doctype.user_record_filter.user_record_filter.has_permission",
+			frappe.get_hooks("has_permission").get("*", [])
+		)
+		self.assertIsNone(has_permission(high, "read", user=TEST_USER))
+		self.assertFalse(has_permission(low, "read", user=TEST_USER))
+		self.assertFalse(frappe.has_permission("ToDo", "read", doc=low, user=TEST_USER))
+
+		# New documents are never denied
+		self.assertIsNone(has_permission(frappe.new_doc("ToDo"), "create", user=TEST_USER))
+
+	def test_contradicting_filters_match_nothing(self):
+		"""Test that equals A together with not_in A compiles to a constant-false condition"""
+		high = self.create_todo("high", priority="High")
+		self.create_filter([
+			("ToDo", "priority", "equals", "High"),
+			("ToDo", "priority", "not_in", "High")
+		])
+
+		self.assertEqual(compile_rules("ToDo", TEST_USER), [NEVER_RULE])
+		self.assertEqual(get_permission_query_conditions("ToDo", TEST_USER), "(1=0)")
+		self.assertEqual(self.visible("ToDo", [high.name]), set())
+		self.assertFalse(has_permission(high, "read", user=TEST_USER))
+
+	def test_normalize_merges_ranges(self):
+		"""Test that range bounds on a field merge into the tightest bounds"""
+		rules = normalize_rules([
+			{"type": "greater_than_equal", "field": "amount", "value": "5"},
+			{"type": "greater_than_equal", "field": "amount", "value": "10"},
+			{"type": "less_than_equal", "field": "amount", "value": "20"},
+			{"type": "less_than_equal", "field": "amount", "value": "30"}
+		])
+		self.assertEqual(rules, [{"type": "between", "field": "amount", "value": "10, 20"}])
+
+		# A strict bound is kept as it is
+		rules = normalize_rules([
+			{"type": "greater_than", "field": "amount", "value": "10"},
+			{"type": "between", "field": "amount", "value": "0, 20"}
+		])
+		self.assertEqual(rules, [
+			{"type": "greater_than", "field": "amount", "value": "10"},
+			{"type": "less_than_equal", "field": "amount", "value": "20"}
+		])
+
+	def test_normalize_contradicting_ranges(self):
+		"""Test that empty ranges collapse into the constant-false rule"""
+		self.assertEqual(normalize_rules([
+			{"type": "greater_than", "field": "amount", "value": "20"},
+			{"type": "less_than", "field": "amount", "value": "10"}
+		]), [NEVER_RULE])
+		self.assertEqual(normalize_rules([
+			{"type": "greater_than", "field": "amount", "value": "10"},
+			{"type": "less_than_equal", "field": "amount", "value": "10"}
+		]), [NEVER_RULE])
+
+		# Bounds of different kinds cannot be compared and are left alone
+		rules = [
+			{"type": "greater_than", "field": "amount", "value": "10"},
+			{"type": "less_than", "field": "amount", "value": "2026-01-01"}
+		]
+		self.assertEqual(normalize_rules(rules), rules)
+
+	def test_normalize_intersects_in_values(self):
+		"""Test that excluded values are removed from the allowed values"""
+		any_rule = {
+			"type": "any", "field": "status", "values": ["Closed", "Open"],
+			"like": [], "starts_with": [], "allowlist": False
+		}
+		rules = normalize_rules([any_rule, {"type": "not_in", "field": "status", "values": ["closed"]}])
+		self.assertEqual(rules, [dict(any_rule, values=["Open"])])
+
+		# Allowed values outside the range are dropped, the range then adds nothing
+		rules = normalize_rules([
+			dict(any_rule, field="amount", values=["5", "15", "25"]),
+			{"type": "between", "field": "amount", "value": "10, 20"}
+		])
+		self.assertEqual(rules, [dict(any_rule, field="amount", values=["15"])])
+
+		# With patterns the NOT IN is still needed
+		patterned = dict(any_rule, like=["Clo"])
+		rules = normalize_rules([patterned, {"type": "not_in", "field": "status", "values": ["Closed"]}])
+		self.assertEqual(rules, [
+			dict(patterned, values=["Open"]),
+			{"type": "not_in", "field": "status", "values": ["Closed"]}
+		])
+
+	def test_merged_date_range_in_query(self):
+		"""Test that merged date bounds are quoted and filter rows in SQL"""
+		inside = self.create_todo("inside", date="2026-01-15")
+		before = self.create_todo("before", date="2026-01-05")
+		after = self.create_todo("after", date="2026-01-25")
+		self.create_filter([
+			("ToDo", "date", "greater_than_equal", "2026-01-10"),
+			("ToDo", "date", "less_than_equal", "2026-01-20")
+		])
+
+		condition = get_permission_query_conditions("ToDo", TEST_USER)
+		self.assertIn("BETWEEN '2026-01-10' AND '2026-01-20'", condition)
+		self.assertEqual(self.visible("ToDo", [inside.name, before.name, after.name]), {inside.name})
+
+	def test_prefix_condition(self):
+		"""Test that starts_with escapes LIKE wildcards in the prefix"""
+		literal = self.create_todo("50%_off sale")
+		wildcard = self.create_todo("500 off sale")
+		other = self.create_todo("sale 50%_off")
+		names = [literal.name, wildcard.name, other.name]
+		self.create_filter([("ToDo", "description", "starts_with", f"{TEST_MARKER} 50%_off")])
+
+		# Embedded in a query that takes values, like list views and the audit
+		self.assertEqual(self.visible("ToDo", names), {literal.name})
+
+		# And in a query without values, where the doubled % is kept as a wildcard
+		condition = build_prefix_condition("description", f"{TEST_MARKER} 50%_off")
+		escaped_names = ", ".join(frappe.db.escape(name) for name in names)
+		self.assertEqual(
+			frappe.db.sql_list(f"SELECT name FROM `tabToDo` WHERE name IN ({escaped_names}) AND {condition}"),
+			[literal.name]
+		)
+		self.assertIsNone(has_permission(literal, "read", user=TEST_USER))
+		self.assertFalse(has_permission(wildcard, "read", user=TEST_USER))
+
+	def test_child_table_condition(self):
+		"""Test that child table rules match documents with some matching row"""
+		seen = frappe.get_doc({
+			"doctype": "Note",
+			"title": f"{TEST_MARKER} seen",
+			"seen_by": [{"user": TEST_USER}, {"user": "Administrator"}]
+		}).insert(ignore_permissions=True)
+		unseen = frappe.get_doc({
+			"doctype": "Note",
+			"title": f"{TEST_MARKER} unseen",
+			"seen_by": [{"user": "Administrator"}]
+		}).insert(ignore_permissions=True)
+		self.create_filter([("Note", "seen_by.user", "equals", TEST_USER)])
+
+		rules = compile_rules("Note", TEST_USER)
+		condition = build_child_condition("Note", "seen_by", rules, TEST_USER)
+		self.assertTrue(condition.startswith("EXISTS (SELECT 1 FROM `tabNote Seen By` child"))
+		self.assertIn("child.parent = `tabNote`.`name`", condition)
+
+		self.assertEqual(self.visible("Note", [seen.name, unseen.name]), {seen.name})
+		self.assertIsNone(has_permission(seen, "read", user=TEST_USER))
+		self.assertFalse(has_permission(unseen, "read", user=TEST_USER))
+
+	def test_large_in_uses_allowlist(self):
+		"""Test that long value lists are matched through the allowlist table"""
+		allowed = [self.create_todo(f"allowed {i}") for i in range(3)]
+		hidden = self.create_todo("hidden")
+		values = [todo.name for todo in allowed] + [f"missing-{i}" for i in range(ALLOWLIST_MIN_VALUES)]
+		filter_doc = self.create_filter([("ToDo", "name", "in", ", ".join(values))])
+
+		self.assertEqual(
+			frappe.db.count("User Record Filter Allowlist", {"user_record_filter": filter_doc.name}),
+			len(values)
+		)
+		condition = get_permission_query_conditions("ToDo", TEST_USER)
+		self.assertIn("`tabUser Record Filter Allowlist`", condition)
+		self.assertNotIn("missing-1", condition)
+
+		names = [todo.name for todo in allowed] + [hidden.name]
+		self.assertEqual(self.visible("ToDo", names), {todo.name for todo in allowed})
+		self.assertIsNone(has_permission(allowed[0], "read", user=TEST_USER))
+		self.assertFalse(has_permission(hidden, "read", user=TEST_USER))
+
+		# The allowlist is cached with the compiled rules, later checks do not query it
+		with patch.object(frappe.db, "sql", side_effect=AssertionError("allowlist queried")):
+			self.assertIsNone(has_permission(allowed[1], "read", user=TEST_USER))
+			self.assertFalse(has_permission(hidden, "read", user=TEST_USER))
+
+	def test_registry(self):
+		"""Test that saving a filter registers its DocType and disabling the entry lifts the filter"""
+		low = self.create_todo("low", priority="Low")
+		self.create_filter([("ToDo", "priority", "equals", "High")])
+
+		self.assertTrue(frappe.db.exists("User Record Filter Registry", "ToDo"))
+		self.assertTrue(get_permission_query_conditions("ToDo", TEST_USER))
+
+		registry = frappe.get_doc("User Record Filter Registry", "ToDo")
+		self.addCleanup(frappe.db.set_value, "User Record Filter Registry", "ToDo", "enabled", registry.enabled)
+		registry.enabled = 0
+		registry.save()
+
+		self.assertEqual(get_permission_query_conditions("ToDo", TEST_USER), "")
+		self.assertIsNone(has_permission(low, "read", user=TEST_USER))
+
+		# DocTypes without any filter are never restricted
+		self.assertEqual(get_permission_query_conditions("Note", TEST_USER), "")
+
+	def test_invalid_range_value(self):
+		"""Test that range values Python would parse but SQL would not are rejected"""
+		for value in ("1_000", "nan", "1e5"):
+			with self.assertRaises(frappe.ValidationError):
+				self.create_filter([("ToDo", "date", "greater_than", value)])
+
+		with self.assertRaises(frappe.ValidationError):
+			self.create_filter([("ToDo", "date", "between", "10")])
+
+	def test_unfiltered_doctype_bypass(self):
+		"""Test that DocTypes no active filter references return before resolving roles or filters"""
+		filter_doc = self.create_filter([("ToDo", "priority", "equals", "High")])
+		self.assertIn("ToDo", get_filtered_doctypes())
+		self.assertNotIn("Note", get_filtered_doctypes())
+
+		note = frappe.get_doc({"doctype": "Note", "title": f"{TEST_MARKER} note"}).insert(ignore_permissions=True)
+		with patch.object(frappe, "get_roles", side_effect=AssertionError("roles resolved")), patch(
+			"osmani.osmani.doctype.user_record_filter.user_record_filter.get_compiled_rules",
+			side_effect=AssertionError("rules compiled")
+		):
+			self.assertEqual(get_permission_query_conditions("Note", TEST_USER), "")
+			self.assertIsNone(has_permission(note, "read", user=TEST_USER))
+
+		# Saving the filter starts a new version, the set is reloaded without ToDo
+		filter_doc.active = 0
+		filter_doc.save()
+		self.assertNotIn("ToDo", get_filtered_doctypes())
+
+	def test_load_user_filters_single_query(self):
+		"""Test that a user's filters and details load in one query and are then cached"""
+		self.create_filter([("ToDo", "priority", "equals", "High"), ("ToDo", "status", "in", "Open, Closed")])
+		self.create_filter([("Note", "public", "equals", "1")])
+
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			filters = load_user_filters(TEST_USER)
+		self.assertEqual(sql.call_count, 1)
+		self.assertEqual(sorted(len(f.details) for f in filters), [1, 2])
+
+		get_user_filters(TEST_USER)
+		with patch.object(frappe.db, "sql", side_effect=AssertionError("filters queried")):
+			self.assertEqual(len(get_user_filters(TEST_USER)), 2)
@@ -125,13 +125,15 @@ function set_restriction_type_options(frm, cdt, cdn, field_name, doctype_name) {
 	
 	// Additional options based on field type
 	if (['Data', 'Text', 'Small Text', 'Long Text'].includes(field_meta.fieldtype)) {
-		restriction_options.push('like', 'not_like', 'in', 'not_in');
+		restriction_options.push('starts_with', 'like', 'not_like', 'in', 'not_in');
 	} else if (['Int', 'Float', 'Currency', 'Percent'].includes(field_meta.fieldtype)) {
-		restriction_options.push('greater_than', 'less_than', 'greater_than_equal', 'less_than_equal', 'in', 'not_in');
-	} else if (['Date', 'Datetime', 'Time'].includes(field_meta.fieldtype)) {
-		restriction_options.push('greater_than', 'less_than', 'greater_than_equal', 'less_than_equal');
+		restriction_options.push('greater_than', 'less_than', 'greater_than_equal', 'less_than_equal', 'between', 'in', 'not_in');
+	} else if (['Date', 'Datetime'].includes(field_meta.fieldtype)) {
+		restriction_options.push('greater_than', 'less_than', 'greater_than_equal', 'less_than_equal', 'between', 'last_n_days');
+	} else if (field_meta.fieldtype === 'Time') {
+		restriction_options.push('greater_than', 'less_than', 'greater_than_equal', 'less_than_equal', 'between');
 	} else if (['Link', 'Select'].includes(field_meta.fieldtype)) {
-		restriction_options.push('in', 'not_in');
+		restriction_options.push('in', 'not_in', 'starts_with');
 	}
 	
 	// Update restriction type options
@@ -166,6 +168,18 @@ function set_value_field_behavior(frm, cdt, cdn, restriction_type, field_name, d
 			placeholder = 'Enter text to search (wildcards will be added automatically)';
 			description = 'Text search with automatic wildcards';
 			break;
+		case 'starts_with':
+			placeholder = 'Enter the prefix (e.g., ACC-SINV-2024-)';
+			description = 'Matches values beginning with the prefix; can use an index, unlike "like"';
+			break;
+		case 'between':
+			placeholder = 'Enter two comma-separated values (e.g., 100, 500 or 2024-01-01, 2024-12-31)';
+			description = 'Inclusive range';
+			break;
+		case 'last_n_days':
+			placeholder = 'Enter number of days (e.g., 30)';
+			description = 'Date on or after today minus N days';
+			break;
 		case 'greater_than':
 		case 'less_than':
 		case 'greater_than_equal':
@@ -227,11 +241,9 @@ function test_user_filters(frm) {
 }
 
 function clear_user_filter_cache(frm) {
-	frappe.call({
-		method: 'frappe.cache.delete_value',
-		args: {
-			key: 'user_record_filters_' + frm.doc.user
-		},
+	frm.call({
+		method: 'clear_user_filter_cache',
+		doc: frm.doc,
 		callback: function(r) {
 			frappe.show_alert({
 				message: __('Cache cleared for user {0}', [frm.doc.user]),
@@ -1,9 +1,31 @@
 # Copyright (c) 2024, Ubaid Ali and contributors
 # For license information, please see license.txt
 
+import datetime
+import re
+from decimal import Decimal
+
 import frappe
 from frappe import _
 from frappe.model.document import Document
+from frappe.utils import add_days, cint, cstr, get_datetime, getdate, today
+
+from osmani.osmani.doctype.user_record_filter_allowlist.user_record_filter_allowlist import (
+	build_allowlist_condition,
+	delete_filter_allowlist,
+	is_allowlisted,
+	sync_filter_allowlist,
+)
+from osmani.osmani.doctype.user_record_filter_registry.user_record_filter_registry import register_doctypes
+from osmani.osmani.utils.user_filter_cache import (
+	clear_filter_cache,
+	get_cached_allowlist,
+	get_cached_condition,
+	get_cached_rules,
+	get_cached_user_filters,
+	get_filtered_doctypes,
+	is_filtered_doctype,
+)
 
 
 class UserRecordFilter(Document):
@@ -44,19 +66,67 @@ class UserRecordFilter(Document):
 				frappe.throw(_("Field is required in filter details"))
 			if not detail.restriction_type:
 				frappe.throw(_("Restriction Type is required in filter details"))
+			if "." in detail.field_name:
+				self.validate_child_table_field(detail)
+			if detail.restriction_type == "between" and len(parse_between(detail.filter_value)) != 2:
+				frappe.throw(_("Between on {0} needs two comma-separated values, e.g. 100, 500").format(
+					frappe.bold(detail.field_name)
+				))
+			if detail.restriction_type in RANGE_BOUNDS or detail.restriction_type == "between":
+				self.validate_range_values(detail)
+			if detail.restriction_type == "last_n_days" and cint(detail.filter_value) <= 0:
+				frappe.throw(_("Last N Days on {0} needs a positive number of days").format(
+					frappe.bold(detail.field_name)
+				))
+				
+	def validate_range_values(self, detail):
+		"""Range values are put into the condition as numbers, so anything that only looks
+		numeric to Python (nan, inf, 1_000, 1e5) is rejected instead of being quoted"""
+		if detail.filter_value == "session_user":
+			return
+		
+		bounds = parse_between(detail.filter_value) if detail.restriction_type == "between" else [
+			cstr(detail.filter_value).strip()
+		]
+		for bound in bounds:
+			if not bound:
+				frappe.throw(_("{0} on {1} needs a value").format(
+					frappe.bold(detail.restriction_type), frappe.bold(detail.field_name)
+				))
+			if not is_numeric(bound) and looks_numeric(bound):
+				frappe.throw(_("{0} is not a valid number for {1}, use digits with an optional decimal point, e.g. 1000.50").format(
+					frappe.bold(bound), frappe.bold(detail.field_name)
+				))
+	
+	def validate_child_table_field(self, detail):
+		"""A child table field rule is "<table fieldname>.<child fieldname>", e.g. items.project"""
+		table_field, child_field = detail.field_name.split(".", 1)
+		df = frappe.get_meta(detail.doctype_name).get_field(table_field)
+		if not df or df.fieldtype not in frappe.model.table_fields:
+			frappe.throw(_("{0} is not a child table of {1}").format(
+				frappe.bold(table_field), frappe.bold(detail.doctype_name)
+			))
+		if child_field not in ("name", "idx") and not frappe.get_meta(df.options).has_field(child_field):
+			frappe.throw(_("{0} is not a field of {1}").format(frappe.bold(child_field), frappe.bold(df.options)))
 				
 	def on_update(self):
-		"""Clear cache when filter is updated"""
+		"""Register the filtered DocTypes, rebuild the allowlist and clear cache when filter is updated"""
+		register_doctypes(
+			[d.doctype_name for d in self.filter_details if d.doctype_name],
+			source="User Record Filter"
+		)
+		sync_filter_allowlist(self)
 		self.clear_user_filter_cache()
 		
 	def on_trash(self):
-		"""Clear cache when filter is deleted"""
+		"""Clear allowlist and cache when filter is deleted"""
+		delete_filter_allowlist(self.name)
 		self.clear_user_filter_cache()
 		
+	@frappe.whitelist()
 	def clear_user_filter_cache(self):
-		"""Clear cached user filters"""
-		cache_key = f"user_record_filters_{self.user}"
-		frappe.cache().delete_value(cache_key)
+		"""Clear cached user filters and compiled permission conditions on every worker"""
+		clear_filter_cache()
 
 
 @frappe.whitelist()
@@ -87,6 +157,17 @@ def get_doctype_fields(doctype):
 					"fieldtype": field.fieldtype,
 					"options": field.options
 				})
+		
+		# Add child table fields as "<table>.<field>", matched if any row matches
+		for table in meta.get_table_fields():
+			for field in frappe.get_meta(table.options).fields:
+				if field.fieldtype not in frappe.model.no_value_fields:
+					fields.append({
+						"label": f"{table.label or table.fieldname}: {field.label or field.fieldname}",
+						"value": f"{table.fieldname}.{field.fieldname}",
+						"fieldtype": field.fieldtype,
+						"options": field.options
+					})
 				
 		return fields
 	except Exception as e:
@@ -99,29 +180,62 @@ def get_user_filters(user=None):
 	"""Get active filters for a user"""
 	if not user:
 		user = frappe.session.user
-		
-	cache_key = f"user_record_filters_{user}"
-	filters = frappe.cache().get_value(cache_key)
-	
-	if filters is None:
-		filters = frappe.get_all(
-			"User Record Filter",
-			filters={"user": user, "active": 1},
-			fields=["name", "user", "description"]
-		)
-		
-		# Get filter details for each filter
-		for filter_doc in filters:
-			filter_details = frappe.get_all(
-				"User Record Filter Detail",
-				filters={"parent": filter_doc.name},
-				fields=["doctype_name", "field_name", "restriction_type", "filter_value", "active"]
+	
+	# Held until a filter is saved or deleted (see user_filter_cache)
+	return get_cached_user_filters(user, lambda: load_user_filters(user))
+
+
+def load_user_filters(user):
+	"""Load a user's active filters and their active details in one query"""
+	rows = frappe.db.sql("""
+		SELECT
+			f.name, f.user, f.description,
+			d.doctype_name, d.field_name, d.restriction_type, d.filter_value, d.active
+		FROM `tabUser Record Filter` f
+		LEFT JOIN `tabUser Record Filter Detail` d
+			ON d.parent = f.name
+			AND d.parenttype = 'User Record Filter'
+			AND d.active = 1
+		WHERE f.user = %(user)s AND f.active = 1
+		ORDER BY f.name, d.idx
+	""", {"user": user}, as_dict=True)
+	
+	filters = {}
+	for row in rows:
+		filter_doc = filters.get(row.name)
+		if not filter_doc:
+			filter_doc = filters[row.name] = frappe._dict(
+				name=row.name, user=row.user, description=row.description, details=[]
 			)
-			filter_doc["details"] = [d for d in filter_details if d.active]
-			
-		frappe.cache().set_value(cache_key, filters, expires_in_sec=300)  # Cache for 5 minutes
-		
-	return filters
+		if row.doctype_name:
+			detail = frappe._dict(
+				doctype_name=row.doctype_name,
+				field_name=row.field_name,
+				restriction_type=row.restriction_type,
+				filter_value=row.filter_value,
+				active=row.active
+			)
+			if is_allowlisted(detail):
+				# Values are matched from the allowlist table, keep them out of the cache
+				detail.update(filter_value=None, allowlist=1)
+			filter_doc["details"].append(detail)
+	
+	return list(filters.values())
+
+
+def warm_user_filter_cache(login_manager):
+	"""Build the user's filters and conditions at login (on_session_creation hook)"""
+	user = login_manager.user
+	filtered_doctypes = get_filtered_doctypes()
+	
+	doctypes = {
+		detail.doctype_name
+		for filter_doc in get_user_filters(user)
+		for detail in filter_doc.get("details", [])
+		if detail.doctype_name in filtered_doctypes
+	}
+	for doctype in doctypes:
+		get_permission_query_conditions(doctype, user)
 
 
 def get_permission_query_conditions(doctype, user=None):
@@ -131,16 +245,103 @@ def get_permission_query_conditions(doctype, user=None):
 	"""
 	if not user:
 		user = frappe.session.user
+	
+	# No active filter references this DocType, skip before resolving roles
+	if not is_filtered_doctype(doctype):
+		return ""
 		
 	# Skip for Administrator and System Manager
 	if user == "Administrator" or "System Manager" in frappe.get_roles(user):
 		return ""
-		
+	
+	return get_cached_condition(user, doctype, lambda: build_permission_query_conditions(doctype, user))
+
+
+def build_permission_query_conditions(doctype, user):
+	"""Build the permission query condition for a DocType from the user's record filters"""
+	conditions = build_condition_parts(doctype, user)
+	if conditions:
+		return "(" + " AND ".join(conditions) + ")"
+	
+	return ""
+
+
+def build_condition_parts(doctype, user):
+	"""Return the conditions that are ANDed into the permission query condition"""
+	parent_rules, child_rules = split_child_rules(get_compiled_rules(doctype, user))
+	
+	parts = [render_rule(rule, doctype, user) for rule in parent_rules]
+	for table_field, rules in child_rules.items():
+		parts.append(build_child_condition(doctype, table_field, rules, user))
+	
+	return parts
+
+
+def split_child_rules(rules):
+	"""Split rules into parent rules and {table_field: rules} for child table fields ("items.project")"""
+	parent_rules = []
+	child_rules = {}
+	for rule in rules:
+		if rule["field"] and "." in rule["field"]:
+			child_rules.setdefault(rule["field"].split(".", 1)[0], []).append(rule)
+		else:
+			parent_rules.append(rule)
+	
+	return parent_rules, child_rules
+
+
+def build_child_condition(doctype, table_field, rules, user):
+	"""
+	Correlated EXISTS over the child table: some row of `table_field` matches
+	every rule on that table. Unqualified columns inside resolve to the child row.
+	"""
+	child_doctype = frappe.get_meta(doctype).get_field(table_field).options
+	conditions = " AND ".join(
+		render_rule(rule, doctype, user, column=rule["field"].split(".", 1)[1]) for rule in rules
+	)
+	
+	return f"""EXISTS (SELECT 1 FROM `tab{child_doctype}` child
+		WHERE child.parent = `tab{doctype}`.`name`
+			AND child.parenttype = {frappe.db.escape(doctype)}
+			AND child.parentfield = {frappe.db.escape(table_field)}
+			AND {conditions})"""
+
+
+def get_compiled_rules(doctype, user):
+	return get_cached_rules(user, doctype, lambda: compile_rules(doctype, user))
+
+
+def get_allowlist_values(doctype, user):
+	"""{field: folded allowlist values} of the user's allowlist rules on a DocType, loaded
+	once per filter version so has_permission does not query the allowlist per document"""
+	return get_cached_allowlist(user, doctype, lambda: load_allowlist_values(doctype, user))
+
+
+def load_allowlist_values(doctype, user):
+	values = {}
+	for field, value in frappe.db.sql("""
+		SELECT field_name, value
+		FROM `tabUser Record Filter Allowlist`
+		WHERE user = %(user)s AND doctype_name = %(doctype)s
+	""", {"user": user, "doctype": doctype}):
+		values.setdefault(field, set()).add(fold(value))
+	
+	return {field: frozenset(field_values) for field, field_values in values.items()}
+
+
+def compile_rules(doctype, user):
+	"""
+	Compile the user's filter details for a DocType into rules that are ANDed together.
+	
+	Details on the same field are grouped: allowed values, patterns, prefixes and
+	the allowlist form one "any" rule (OR), excluded values one "not_in" rule, and
+	every other detail its own rule. The SQL condition is rendered from these rules
+	and the has_permission hook evaluates the same rules against a document.
+	"""
 	user_filters = get_user_filters(user)
 	
 	# Group details by field and operator to support OR across same field
 	field_groups = {}
-	misc_conditions = []
 	
 	def resolve_values(detail):
 		"""Return list of values for a detail, handling special tokens and lists"""
@@ -161,91 +362,377 @@ def get_permission_query_conditions(doctype, user=None):
 				continue
 			field = detail.field_name
 			grp = field_groups.setdefault(field, {
-				"equals": set(),
-				"in": set(),
+				"allow": set(),
 				"like": [],
-				"not_equals": set(),
-				"not_in": set(),
+				"starts_with": [],
+				"allowlist": False,
+				"disallow": set(),
 				"not_like": [],
 				"range": [],
 				"null_checks": []
 			})
 			rt = detail.restriction_type
+			if detail.get("allowlist"):
+				grp["allowlist"] = True
+				continue
 			values = resolve_values(detail)
-			if rt == "equals":
-				for v in values:
-					grp["equals"].add(v)
-			elif rt == "in":
-				for v in values:
-					grp["in"].add(v)
-			elif rt == "like":
-				for v in values:
-					grp["like"].append(v)
-			elif rt == "not_equals":
-				for v in values:
-					grp["not_equals"].add(v)
-			elif rt == "not_in":
-				for v in values:
-					grp["not_in"].add(v)
+			if rt in ("equals", "in"):
+				grp["allow"].update(values)
+			elif rt in ("like", "starts_with"):
+				grp[rt].extend(values)
+			elif rt in ("not_equals", "not_in"):
+				grp["disallow"].update(values)
 			elif rt == "not_like":
-				for v in values:
-					grp["not_like"].append(v)
-			elif rt in ("greater_than", "less_than", "greater_than_equal", "less_than_equal"):
-				cond = build_condition(detail, user)
-				if cond:
-					grp["range"].append(cond)
+				grp["not_like"].extend(values)
+			elif rt in ("greater_than", "less_than", "greater_than_equal", "less_than_equal", "between", "last_n_days"):
+				value = user if detail.filter_value == "session_user" else detail.filter_value
+				grp["range"].append({"type": rt, "field": field, "value": value})
 			elif rt in ("is_set", "is_not_set"):
-				cond = build_condition(detail, user)
-				if cond:
-					grp["null_checks"].append(cond)
-			else:
-				# fallback: use existing builder
-				cond = build_condition(detail, user)
-				if cond:
-					misc_conditions.append(cond)
-	
-	conditions = []
+				grp["null_checks"].append({"type": rt, "field": field})
+	
+	rules = []
 	for field, grp in field_groups.items():
 		# positives: OR together
-		or_parts = []
-		allow_values = set()
-		allow_values.update(grp["equals"]) 
-		allow_values.update(grp["in"]) 
-		if allow_values:
-			escaped = ", ".join([frappe.db.escape(v) for v in allow_values])
-			or_parts.append(f"`{field}` IN ({escaped})")
-		for pattern in grp["like"]:
-			or_parts.append(f"`{field}` LIKE {frappe.db.escape(f'%{pattern}%')}")
-		if or_parts:
-			conditions.append("(" + " OR ".join(or_parts) + ")")
+		if grp["allow"] or grp["like"] or grp["starts_with"] or grp["allowlist"]:
+			rules.append({
+				"type": "any",
+				"field": field,
+				"values": sorted(grp["allow"]),
+				"like": grp["like"],
+				"starts_with": grp["starts_with"],
+				"allowlist": grp["allowlist"]
+			})
 		
 		# negatives: AND together
-		disallow = set()
-		disallow.update(grp["not_equals"]) 
-		disallow.update(grp["not_in"]) 
-		if disallow:
-			escaped = ", ".join([frappe.db.escape(v) for v in disallow])
-			conditions.append(f"`{field}` NOT IN ({escaped})")
+		if grp["disallow"]:
+			rules.append({"type": "not_in", "field": field, "values": sorted(grp["disallow"])})
 		for pattern in grp["not_like"]:
-			conditions.append(f"`{field}` NOT LIKE {frappe.db.escape(f'%{pattern}%')}")
-		for rc in grp["range"]:
-			conditions.append(rc)
-		for nc in grp["null_checks"]:
-			conditions.append(nc)
+			rules.append({"type": "not_like", "field": field, "value": pattern})
+		rules.extend(grp["range"])
+		rules.extend(grp["null_checks"])
+	
+	return normalize_rules(rules)
+
+
+def normalize_rules(rules):
+	"""
+	Simplify compiled rules field by field: drop duplicates and rules implied by
+	others, merge range bounds into the tightest one, and collapse everything
+	into a single constant-false rule when the filters contradict each other
+	(e.g. equals A together with not_in A).
+	"""
+	by_field = {}
+	for rule in rules:
+		by_field.setdefault(rule["field"], []).append(rule)
 	
-	# add any misc conditions that were not grouped
-	conditions.extend(misc_conditions)
+	normalized = []
+	for field, field_rules in by_field.items():
+		field_rules = normalize_field_rules(field, field_rules)
+		if field_rules is None:
+			return [NEVER_RULE]
+		normalized.extend(field_rules)
 	
-	if conditions:
-		result = "(" + " AND ".join(conditions) + ")"
-		return result
+	return normalized
+
+
+def normalize_field_rules(field, rules):
+	"""Normalize the rules of one field, or return None if they can never all match"""
+	unique = []
+	for rule in rules:
+		if rule not in unique:
+			unique.append(rule)
+	rules = unique
 	
-	return ""
+	types = {rule["type"] for rule in rules}
+	if "is_not_set" in types:
+		# Every other rule needs a value
+		return None if len(types) > 1 else rules
+	if "is_set" in types and len(types) > 1:
+		rules = [rule for rule in rules if rule["type"] != "is_set"]
+	
+	any_rule = next((rule for rule in rules if rule["type"] == "any"), None)
+	not_in = next((rule for rule in rules if rule["type"] == "not_in"), None)
+	only_values = any_rule and not (any_rule["like"] or any_rule["starts_with"] or any_rule["allowlist"])
+	
+	if any_rule and not_in:
+		values = [v for v in any_rule["values"] if not any(values_equal(v, x) for x in not_in["values"])]
+		rules = [dict(rule, values=values) if rule is any_rule else rule for rule in rules]
+		any_rule = next(rule for rule in rules if rule["type"] == "any")
+		if only_values:
+			# Implied by the remaining allowed values
+			rules = [rule for rule in rules if rule["type"] != "not_in"]
+	
+	range_rules = [rule for rule in rules if rule["type"] in RANGE_BOUNDS or rule["type"] == "between"]
+	bounds = get_range_bounds(range_rules)
+	if bounds:
+		lower, upper = bounds
+		if lower and upper and (lower[0] > upper[0] or (lower[0] == upper[0] and (lower[1] or upper[1]))):
+			return None
+		
+		if only_values:
+			values = [v for v in any_rule["values"] if value_in_bounds(v, lower, upper) is not False]
+			rules = [dict(rule, values=values) if rule is any_rule else rule for rule in rules]
+			any_rule = next(rule for rule in rules if rule["type"] == "any")
+			if all(value_in_bounds(v, lower, upper) for v in values):
+				# Every allowed value is inside the range
+				bounds = (None, None)
+		
+		merged = build_range_rules(field, *bounds)
+		first = rules.index(range_rules[0])
+		rules = [rule for rule in rules[:first] if rule not in range_rules] + merged + [
+			rule for rule in rules[first:] if rule not in range_rules
+		]
+	
+	if only_values and not any_rule["values"]:
+		return None
+	
+	return rules
+
+
+# Restriction type -> (bound side, strict)
+RANGE_BOUNDS = {
+	"greater_than": ("lower", True),
+	"greater_than_equal": ("lower", False),
+	"less_than": ("upper", True),
+	"less_than_equal": ("upper", False),
+}
+
+NEVER_RULE = {"type": "never", "field": None}
+
+ISO_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+
+
+def bound_key(value):
+	"""Sortable form of a range value: numbers and ISO dates of the same length, else None"""
+	value = cstr(value).strip()
+	if is_numeric(value):
+		return ("number", float(value))
+	if ISO_DATE_PATTERN.match(value):
+		return (("date", len(value)), value)
+	return None
+
+
+def get_range_bounds(range_rules):
+	"""
+	Return the tightest (lower, upper) bounds of range rules, each as
+	((kind, key), strict, value) or None, or None if they cannot be compared.
+	"""
+	if not range_rules:
+		return None
+	
+	bounds = {"lower": [], "upper": []}
+	for rule in range_rules:
+		if rule["type"] == "between":
+			between = parse_between(rule["value"])
+			if len(between) != 2:
+				return None
+			bounds["lower"].append((between[0], False))
+			bounds["upper"].append((between[1], False))
+		else:
+			side, strict = RANGE_BOUNDS[rule["type"]]
+			bounds[side].append((rule["value"], strict))
+	
+	keyed = {}
+	for side, side_bounds in bounds.items():
+		keyed[side] = []
+		for value, strict in side_bounds:
+			key = bound_key(value)
+			if key is None:
+				return None
+			keyed[side].append((key, strict, cstr(value).strip()))
+	
+	if len({key[0] for side_bounds in keyed.values() for key, strict, value in side_bounds}) > 1:
+		return None
+	
+	# Largest lower bound and smallest upper bound; strict wins on ties
+	lower = max(keyed["lower"], key=lambda b: (b[0], b[1]), default=None)
+	upper = min(keyed["upper"], key=lambda b: (b[0], not b[1]), default=None)
+	
+	return lower, upper
+
+
+def value_in_bounds(value, lower, upper):
+	"""Whether a value lies within the bounds, or None if it cannot be compared"""
+	key = bound_key(value)
+	for bound in (lower, upper):
+		if bound and (key is None or key[0] != bound[0][0]):
+			return None
+	
+	if lower and (key < lower[0] or (key == lower[0] and lower[1])):
+		return False
+	if upper and (key > upper[0] or (key == upper[0] and upper[1])):
+		return False
+	
+	return True
+
+
+def build_range_rules(field, lower, upper):
+	if lower and upper and not lower[1] and not upper[1]:
+		return [{"type": "between", "field": field, "value": f"{lower[2]}, {upper[2]}"}]
+	
+	rules = []
+	if lower:
+		rules.append({"type": "greater_than" if lower[1] else "greater_than_equal", "field": field, "value": lower[2]})
+	if upper:
+		rules.append({"type": "less_than" if upper[1] else "less_than_equal", "field": field, "value": upper[2]})
+	
+	return rules
+
+
+def render_rule(rule, doctype, user, column=None):
+	"""Render one compiled rule as a SQL condition.
+	`column` is the child table column of a child table field rule.
+	"""
+	field = rule["field"]
+	
+	if rule["type"] == "never":
+		return "1=0"
+	
+	column = column or field
+	
+	if rule["type"] == "any":
+		or_parts = []
+		if rule["values"]:
+			escaped = ", ".join([frappe.db.escape(v) for v in rule["values"]])
+			or_parts.append(f"`{column}` IN ({escaped})")
+		for pattern in rule["like"]:
+			or_parts.append(f"`{column}` LIKE {frappe.db.escape(f'%{pattern}%')}")
+		for prefix in rule["starts_with"]:
+			or_parts.append(build_prefix_condition(column, prefix))
+		if rule["allowlist"]:
+			outer_column = f"child.`{column}`" if column != field else None
+			or_parts.append(build_allowlist_condition(doctype, field, user, outer_column))
+		return "(" + " OR ".join(or_parts) + ")"
+	
+	if rule["type"] == "not_in":
+		escaped = ", ".join([frappe.db.escape(v) for v in rule["values"]])
+		return f"`{column}` NOT IN ({escaped})"
+	
+	return build_condition(
+		frappe._dict(field_name=column, restriction_type=rule["type"], filter_value=rule.get("value")), user
+	)
+
+
+def has_permission(doc, ptype=None, user=None, **kwargs):
+	"""
+	Generic has_permission hook applied for all DocTypes via hooks.
+	Denies access to a saved document that the user's record filters would hide
+	from list views; returns None (no opinion) otherwise.
+	"""
+	if not user:
+		user = frappe.session.user
+	
+	if isinstance(doc, str) or doc.get("__islocal") or ptype == "create":
+		return None
+	
+	if not is_filtered_doctype(doc.doctype):
+		return None
+	
+	if user == "Administrator" or "System Manager" in frappe.get_roles(user):
+		return None
+	
+	compiled_rules = get_compiled_rules(doc.doctype, user)
+	allowlist = (
+		get_allowlist_values(doc.doctype, user) if any(rule.get("allowlist") for rule in compiled_rules) else {}
+	)
+	
+	parent_rules, child_rules = split_child_rules(compiled_rules)
+	if not all(rule_matches(rule, doc, allowlist) for rule in parent_rules):
+		return False
+	
+	# Like the EXISTS condition: some row of the table matches all of its rules
+	for table_field, rules in child_rules.items():
+		if not any(
+			all(rule_matches(rule, row, allowlist) for rule in rules)
+			for row in doc.get(table_field) or []
+		):
+			return False
+	
+	return None
+
+
+def rule_matches(rule, doc, allowlist=None):
+	"""Evaluate one compiled rule against a document (or child row) like the database would.
+	`allowlist` holds the folded allowlist values per field (see get_allowlist_values)."""
+	if rule["type"] == "never":
+		return False
+	
+	field = rule["field"]
+	value = doc.get(field.split(".", 1)[-1])
+	rule_type = rule["type"]
+	
+	if rule_type == "is_set":
+		return value is not None
+	if rule_type == "is_not_set":
+		return value is None
+	
+	# Any other comparison with NULL is not true in SQL
+	if value is None:
+		return False
+	
+	if rule_type == "any":
+		text = fold(value)
+		return (
+			any(values_equal(value, v) for v in rule["values"])
+			or any(fold(pattern) in text for pattern in rule["like"])
+			or any(text.startswith(fold(prefix)) for prefix in rule["starts_with"])
+			or (rule["allowlist"] and text in (allowlist or {}).get(field, ()))
+		)
+	if rule_type == "not_in":
+		return not any(values_equal(value, v) for v in rule["values"])
+	if rule_type == "not_like":
+		return fold(rule["value"]) not in fold(value)
+	if rule_type == "last_n_days":
+		days = cint(rule["value"])
+		return days <= 0 or getdate(value) >= add_days(today(), -days)
+	if rule_type == "between":
+		bounds = parse_between(rule["value"])
+		if len(bounds) != 2:
+			return True
+		return compare_values(value, bounds[0]) >= 0 and compare_values(value, bounds[1]) <= 0
+	
+	operators = {
+		"greater_than": lambda c: c > 0,
+		"less_than": lambda c: c < 0,
+		"greater_than_equal": lambda c: c >= 0,
+		"less_than_equal": lambda c: c <= 0,
+	}
+	if rule_type in operators:
+		return operators[rule_type](compare_values(value, rule["value"]))
+	
+	return True
+
+
+def fold(value):
+	"""Case-insensitive form of a value, like the default MariaDB collation"""
+	return str(value).casefold()
+
+
+def values_equal(value, expected):
+	return compare_values(value, expected) == 0
+
+
+def compare_values(value, expected):
+	"""Compare a document value with a filter value: -1, 0 or 1"""
+	if isinstance(value, datetime.datetime):
+		expected = get_datetime(expected)
+	elif isinstance(value, datetime.date):
+		expected = getdate(expected)
+	elif isinstance(value, (int, float, Decimal)) and is_numeric(expected):
+		value, expected = float(value), float(expected)
+	else:
+		value, expected = fold(value), fold(expected)
+	
+	return (value > expected) - (value < expected)
+
 
 # Wrapper for hooks: called via frappe.call with signature (user, doctype=...)
 def permission_query_all(user=None, doctype=None, **kwargs):
 	"""Generic permission query hook applied for all DocTypes via hooks.
 	Frappe calls this with user as positional arg and doctype as kwarg.
+	Hooks are static, so this dispatches at request time: DocTypes that are not
+	enabled in the User Record Filter Registry (or not referenced by any filter)
+	return after a set lookup.
 	"""
 	if not doctype:
 		return ""
@@ -265,14 +752,6 @@ def build_condition(detail, user=None):
 		roles = frappe.get_roles(user) if user else frappe.get_roles()
 		value = "', '".join(roles)
 	
-	# Helper: detect numeric
-	def is_numeric(val):
-		try:
-			float(str(val))
-			return True
-		except Exception:
-			return False
-	
 	# Build condition based on restriction type
 	if restriction_type == "equals":
 		return f"`{field}` = {frappe.db.escape(value)}"
@@ -294,17 +773,67 @@ def build_condition(detail, user=None):
 		return f"`{field}` LIKE {frappe.db.escape(f'%{value}%')}"
 	elif restriction_type == "not_like":
 		return f"`{field}` NOT LIKE {frappe.db.escape(f'%{value}%')}"
+	elif restriction_type == "starts_with":
+		return build_prefix_condition(field, value)
+	elif restriction_type == "between":
+		bounds = parse_between(value)
+		if len(bounds) != 2:
+			return ""
+		low, high = (sql_value(b) for b in bounds)
+		return f"`{field}` BETWEEN {low} AND {high}"
+	elif restriction_type == "last_n_days":
+		# Evaluated by the database on every query, so the cached condition never goes stale
+		days = cint(value)
+		if days <= 0:
+			return ""
+		return f"`{field}` >= CURDATE() - INTERVAL {days} DAY"
 	elif restriction_type == "greater_than":
-		return f"`{field}` > {value if is_numeric(value) else frappe.db.escape(value)}"
+		return f"`{field}` > {sql_value(value)}"
 	elif restriction_type == "less_than":
-		return f"`{field}` < {value if is_numeric(value) else frappe.db.escape(value)}"
+		return f"`{field}` < {sql_value(value)}"
 	elif restriction_type == "greater_than_equal":
-		return f"`{field}` >= {value if is_numeric(value) else frappe.db.escape(value)}"
+		return f"`{field}` >= {sql_value(value)}"
 	elif restriction_type == "less_than_equal":
-		return f"`{field}` <= {value if is_numeric(value) else frappe.db.escape(value)}"
+		return f"`{field}` <= {sql_value(value)}"
 	elif restriction_type == "is_set":
 		return f"`{field}` IS NOT NULL"
 	elif restriction_type == "is_not_set":
 		return f"`{field}` IS NULL"
 	
-	return ""
\ No newline at end of file
+	return ""
+
+
+# Plain decimal numbers, the only values put into a condition unquoted
+NUMBER_PATTERN = re.compile(r"^-?\d+(\.\d+)?$")
+
+
+def is_numeric(val):
+	return bool(NUMBER_PATTERN.match(cstr(val).strip()))
+
+
+def looks_numeric(val):
+	"""Whether Python would parse the value as a float (which accepts nan, inf, 1_000, 1e5)"""
+	try:
+		float(cstr(val).strip())
+		return True
+	except ValueError:
+		return False
+
+
+def sql_value(value):
+	"""A range value as SQL: decimal numbers as they are, anything else escaped"""
+	value = cstr(value).strip()
+	return value if is_numeric(value) else frappe.db.escape(value)
+
+
+def parse_between(value):
+	"""Split a between value ("low, high") into its bounds"""
+	return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def build_prefix_condition(field, prefix):
+	"""Prefix match as LIKE 'prefix%', which can use an index on the field (unlike '%value%').
+	Escaped like the other LIKE conditions, so `%` is doubled and the condition can be
+	embedded in a query that takes values"""
+	escaped = (prefix or "").replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+	return f"`{field}` LIKE {frappe.db.escape(escaped + '%')}"
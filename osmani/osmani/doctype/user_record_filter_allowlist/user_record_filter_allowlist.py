@@ -0,0 +1,92 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import now
+
+# `in` details with more values than this are matched against the allowlist
+# table instead of being compiled to an IN (...) literal
+ALLOWLIST_MIN_VALUES = 50
+
+# Composite index serving the EXISTS lookup of the permission condition
+ALLOWLIST_INDEX = "user_doctype_field_value"
+ALLOWLIST_INDEX_FIELDS = ["user", "doctype_name", "field_name", "value"]
+
+
+class UserRecordFilterAllowlist(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		doctype_name: DF.Link | None
+		field_name: DF.Data | None
+		user: DF.Link | None
+		user_record_filter: DF.Link | None
+		value: DF.Data | None
+	# end: auto-generated types
+
+	pass
+
+
+def split_values(value):
+	return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def is_allowlisted(detail):
+	"""Whether a filter detail's values live in the allowlist table"""
+	return detail.restriction_type == "in" and len(split_values(detail.filter_value)) > ALLOWLIST_MIN_VALUES
+
+
+def sync_filter_allowlist(filter_doc):
+	"""Rebuild the allowlist rows of a User Record Filter from its details"""
+	delete_filter_allowlist(filter_doc.name)
+
+	if not filter_doc.active:
+		return
+
+	rows = set()
+	for detail in filter_doc.filter_details:
+		if detail.active and is_allowlisted(detail):
+			for value in split_values(detail.filter_value):
+				rows.add((detail.doctype_name, detail.field_name, value))
+
+	if not rows:
+		return
+
+	timestamp = now()
+	frappe.db.bulk_insert(
+		"User Record Filter Allowlist",
+		["name", "creation", "modified", "owner", "modified_by",
+			"user", "doctype_name", "field_name", "value", "user_record_filter"],
+		[
+			(frappe.generate_hash(length=10), timestamp, timestamp, frappe.session.user, frappe.session.user,
+				filter_doc.user, doctype_name, field_name, value, filter_doc.name)
+			for doctype_name, field_name, value in sorted(rows)
+		],
+	)
+
+
+def delete_filter_allowlist(filter_name):
+	frappe.db.delete("User Record Filter Allowlist", {"user_record_filter": filter_name})
+
+
+def build_allowlist_condition(doctype, field, user, column=None):
+	"""Semijoin of `doctype`.`field` (or the given qualified `column`) against the user's
+	allowlist, served by ALLOWLIST_INDEX. The outer column is qualified since `field`
+	could also name a column of the allowlist table.
+	"""
+	column = column or f"`tab{doctype}`.`{field}`"
+	return f"""EXISTS (SELECT 1 FROM `tabUser Record Filter Allowlist` ura
+		WHERE ura.user = {frappe.db.escape(user)}
+			AND ura.doctype_name = {frappe.db.escape(doctype)}
+			AND ura.field_name = {frappe.db.escape(field)}
+			AND ura.value = {column})"""
+
+
+def on_doctype_update():
+	frappe.db.add_index("User Record Filter Allowlist", ALLOWLIST_INDEX_FIELDS, ALLOWLIST_INDEX)
@@ -17,8 +17,8 @@ class UserRecordFilterDetail(Document):
 		active: DF.Check
 		doctype_name: DF.Link
 		field_name: DF.Select
-		filter_value: DF.Data | None
-		restriction_type: DF.Literal["equals", "not_equals", "in", "not_in", "like", "not_like", "greater_than", "less_than", "greater_than_equal", "less_than_equal", "is_set", "is_not_set"]
+		filter_value: DF.SmallText | None
+		restriction_type: DF.Literal["equals", "not_equals", "in", "not_in", "like", "not_like", "starts_with", "greater_than", "less_than", "greater_than_equal", "less_than_equal", "between", "last_n_days", "is_set", "is_not_set"]
 	# end: auto-generated types
 
 	pass
\ No newline at end of file
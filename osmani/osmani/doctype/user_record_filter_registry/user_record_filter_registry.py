@@ -0,0 +1,59 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+
+from osmani.osmani.utils.user_filter_cache import clear_filter_cache
+
+
+class UserRecordFilterRegistry(Document):
+	# begin: auto-generated types
+	# This code is auto-generated. Do not modify anything in this block.
+
+	from typing import TYPE_CHECKING
+
+	if TYPE_CHECKING:
+		from frappe.types import DF
+
+		app: DF.Data | None
+		enabled: DF.Check
+		registered_doctype: DF.Link
+		source: DF.Literal["Manual", "Install", "User Record Filter"]
+	# end: auto-generated types
+
+	def validate(self):
+		if frappe.get_meta(self.registered_doctype).istable:
+			frappe.throw(_("Child table {0} cannot be registered, register its parent DocType").format(
+				frappe.bold(self.registered_doctype)
+			))
+
+	def on_update(self):
+		clear_filter_cache()
+
+	def on_trash(self):
+		clear_filter_cache()
+
+
+def register_doctypes(doctypes, source="Manual", app="osmani"):
+	"""Add registry entries for `doctypes` that do not have one; existing (or disabled) entries are kept"""
+	registered = set(frappe.get_all(
+		"User Record Filter Registry",
+		filters={"name": ["in", list(doctypes)]},
+		pluck="name"
+	)) if doctypes else set()
+
+	added = []
+	for doctype in sorted(set(doctypes)):
+		if doctype in registered or not frappe.db.exists("DocType", doctype):
+			continue
+		frappe.get_doc({
+			"doctype": "User Record Filter Registry",
+			"registered_doctype": doctype,
+			"app": app,
+			"source": source
+		}).insert(ignore_permissions=True)
+		added.append(doctype)
+
+	return added
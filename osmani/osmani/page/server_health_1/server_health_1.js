@@ -312,6 +312,18 @@ class ServerHealthDashboard {
 						</div>
 					</div>
 					
+					<!-- Account Freeze Checks -->
+					<div class="row mb-4">
+						<div class="col-md-12">
+							<div class="info-panel">
+								<h5><i class="fas fa-lock"></i> Account Freeze Checks</h5>
+								<div id="freeze-checks">
+									<p class="text-muted">Loading freeze check stats...</p>
+								</div>
+							</div>
+						</div>
+					</div>
+					
 					<!-- Supervisor Services -->
 					<div class="row mb-4">
 						<div class="col-md-12">
@@ -425,6 +437,9 @@ class ServerHealthDashboard {
 		
 		// Supervisor
 		this.render_supervisor(processes.supervisor);
+		
+		// Account Freeze Checks
+		this.render_freeze_checks(this.data.freeze_checks);
 	}
 	
 	format_load_badge(load, cores) {
@@ -537,6 +552,69 @@ class ServerHealthDashboard {
 		$('#supervisor-services').html(html);
 	}
 	
+	render_freeze_checks(stats) {
+		if (!stats || !stats.checks) {
+			$('#freeze-checks').html('<p class="text-muted">No freeze checks recorded yet.</p>');
+			return;
+		}
+		
+		const max_count = Math.max(...stats.latency_histogram.map(b => b.count), 1);
+		let histogram = '';
+		stats.latency_histogram.forEach(bucket => {
+			const width = (bucket.count * 100 / max_count).toFixed(1);
+			histogram += `
+				<tr>
+					<td>&le; ${bucket.le_ms === '+Inf' ? '&infin;' : bucket.le_ms + ' ms'}</td>
+					<td style="width: 60%;">
+						<div class="progress" style="height: 6px;">
+							<div class="progress-bar bg-info" style="width: ${width}%"></div>
+						</div>
+					</td>
+					<td><span class="value-badge">${bucket.count.toLocaleString()}</span></td>
+				</tr>
+			`;
+		});
+		
+		let rejected = '';
+		stats.rejected_by_rule.slice(0, 10).forEach(row => {
+			rejected += `
+				<tr>
+					<td><a href="/app/account-freeze-rule/${encodeURIComponent(row.rule)}">${row.rule}</a></td>
+					<td><span class="value-badge warning">${row.count.toLocaleString()}</span></td>
+				</tr>
+			`;
+		});
+		
+		$('#freeze-checks').html(`
+			<div class="row">
+				<div class="col-md-4">
+					<table class="table table-sm">
+						<tbody>
+							<tr><td><strong>Checks:</strong></td><td><span class="value-badge">${stats.checks.toLocaleString()}</span></td></tr>
+							<tr><td><strong>Avg Latency:</strong></td><td><span class="value-badge info">${stats.avg_latency_ms} ms</span></td></tr>
+							<tr><td><strong>Index Hit Rate:</strong></td><td><span class="value-badge success">${stats.index_hit_rate}%</span></td></tr>
+							<tr><td><strong>Index Rebuilds:</strong></td><td><span class="value-badge">${stats.index_misses.toLocaleString()}</span></td></tr>
+							<tr><td><strong>Rejected Postings:</strong></td><td><span class="value-badge warning">${stats.rejected.toLocaleString()}</span></td></tr>
+							<tr><td><strong>Since:</strong></td><td><span class="value-badge">${stats.since || '-'}</span></td></tr>
+						</tbody>
+					</table>
+				</div>
+				<div class="col-md-4">
+					<table class="table table-sm">
+						<thead><tr><th colspan="3">Latency Histogram</th></tr></thead>
+						<tbody>${histogram}</tbody>
+					</table>
+				</div>
+				<div class="col-md-4">
+					<table class="table table-sm">
+						<thead><tr><th>Freeze Rule</th><th>Rejected</th></tr></thead>
+						<tbody>${rejected || '<tr><td colspan="2" class="text-muted">None</td></tr>'}</tbody>
+					</table>
+				</div>
+			</div>
+		`);
+	}
+	
 	start_auto_refresh() {
 		this.refresh_interval = setInterval(() => {
 			this.load_data();
@@ -308,10 +308,22 @@ class UserEntriesSummary {
 			'Customer', 'Supplier'
 		];
 
-		const counts = {};
-		let total = 0;
+		// Tracked doctypes are counted from the User Activity Rollup in one call
+		const counts = await frappe.xcall(
+			'osmani.osmani.doctype.user_activity_rollup.user_activity_rollup.get_user_activity_counts',
+			{
+				user: this.user_email,
+				from_date: period.from_date,
+				to_date: period.to_date,
+				document_status: 1
+			}
+		);
 
 		for (const doctype of doctypes) {
+			if (doctype in counts) {
+				continue;
+			}
+
 			const filters = [
 				['docstatus', '=', 1],
 				['owner', '=', this.user_email]
@@ -327,9 +339,9 @@ class UserEntriesSummary {
 
 			const count = await frappe.db.count(doctype, { filters });
 			counts[doctype] = count || 0;
-			total += counts[doctype];
 		}
 
+		const total = doctypes.reduce((sum, doctype) => sum + (counts[doctype] || 0), 0);
 		counts['Total'] = total;
 		return counts;
 	}
@@ -0,0 +1,102 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import now
+
+from osmani.osmani.report.user_activity_detail import user_activity_detail
+from osmani.osmani.report.user_activity_detail.user_activity_detail import DT_FIELDS, execute
+
+TEST_OWNER = "test-activity-detail@example.com"
+TEST_DOCTYPES = ["Journal Entry", "Sales Invoice", "Sales Order"]
+
+# Every DocType has rows on every date, so pages end on equal dates and DocType boundaries
+TEST_DATES = ["2026-03-02", "2026-03-01"]
+ROWS_PER_DATE = 3
+
+
+class TestUserActivityDetail(FrappeTestCase):
+    def setUp(self):
+        """Insert activity rows of one owner directly, only the columns the report reads"""
+        timestamp = now()
+        self.expected = []
+        for doctype in TEST_DOCTYPES:
+            meta = DT_FIELDS[doctype]
+            rows = []
+            for posting_date in TEST_DATES:
+                for i in range(ROWS_PER_DATE):
+                    name = f"UAD-TEST-{posting_date}-{i}"
+                    rows.append((name, timestamp, timestamp, TEST_OWNER, TEST_OWNER, 1, posting_date, 100))
+                    self.expected.append((posting_date, doctype, name))
+
+            frappe.db.bulk_insert(
+                doctype,
+                ["name", "creation", "modified", "owner", "modified_by", "docstatus", meta["date"], meta["amount"]],
+                rows,
+            )
+
+        # Report order: date, doctype and name, all descending
+        self.expected.sort(reverse=True)
+
+    def tearDown(self):
+        """Clean up test data"""
+        for doctype in TEST_DOCTYPES:
+            frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE owner = %s", TEST_OWNER)
+        frappe.db.commit()
+
+    def get_page(self, cursor=None):
+        filters = {"user": TEST_OWNER, "doctype_list": TEST_DOCTYPES, "cursor": cursor}
+        columns, data, message = execute(filters)
+        return data, message
+
+    def read_all_pages(self):
+        """Follow the cursor of the last row of every page, like the Next Page button"""
+        rows = []
+        cursor = None
+        while True:
+            data, message = self.get_page(cursor)
+            rows.extend((str(row.posting_date), row.doctype, row.name) for row in data)
+            if not message:
+                return rows
+            last = data[-1]
+            cursor = "|".join((str(last.posting_date), last.doctype, last.name))
+
+    def test_first_page(self):
+        """Test that the first page is the newest rows, with a message when there are more"""
+        with patch.object(user_activity_detail, "PAGE_LENGTH", 4):
+            data, message = self.get_page()
+
+        self.assertEqual([(str(r.posting_date), r.doctype, r.name) for r in data], self.expected[:4])
+        self.assertTrue(message)
+
+        # A full last page has no message, so Next Page stops there
+        with patch.object(user_activity_detail, "PAGE_LENGTH", len(self.expected)):
+            data, message = self.get_page()
+
+        self.assertEqual(len(data), len(self.expected))
+        self.assertIsNone(message)
+
+    def test_cursor_pages_cover_all_rows(self):
+        """Test that paging returns every row once, in order, for page sizes ending anywhere"""
+        # 4 and 5 end pages inside a DocType, 3 and 9 exactly on a DocType or date boundary
+        for page_length in (1, 3, 4, 5, 9, len(self.expected)):
+            with self.subTest(page_length=page_length), patch.object(
+                user_activity_detail, "PAGE_LENGTH", page_length
+            ):
+                self.assertEqual(self.read_all_pages(), self.expected)
+
+    def test_cursor_on_last_row(self):
+        """Test that the cursor of the last row returns an empty page"""
+        posting_date, doctype, name = self.expected[-1]
+        data, message = self.get_page("|".join((posting_date, doctype, name)))
+
+        self.assertEqual(data, [])
+        self.assertIsNone(message)
+
+    def test_invalid_cursor(self):
+        """Test that a cursor with an unknown DocType is rejected"""
+        with self.assertRaises(frappe.ValidationError):
+            self.get_page("2026-03-01|ToDo|UAD-TEST")
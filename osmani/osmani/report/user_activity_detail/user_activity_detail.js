@@ -6,15 +6,33 @@ frappe.query_reports["User Activity Detail"] = {
         { fieldname: "doctype", label: "DocType", fieldtype: "Link", options: "DocType" },
         { fieldname: "docstatus", label: "Status", fieldtype: "Select", options: ["All", "Draft", "Submitted", "Cancelled"].join("\n"), default: "All" },
         { fieldname: "docname", label: "Document Name", fieldtype: "Data" },
+        // DocTypes selected in User Activity Report, set from the route like the other filters
+        // and kept as a filter because Frappe clears route_options after routing
+        {
+            fieldname: "doctype_list",
+            label: "Document Types",
+            fieldtype: "MultiSelectList",
+            hidden: 1,
+            get_data: () => [
+                "Purchase Invoice",
+                "Sales Order",
+                "Sales Invoice",
+                "Payment Entry",
+                "Journal Entry",
+                "Employee Advance",
+                "Expense Claim",
+            ].map(d => ({ label: d, value: d })),
+        },
+        // Keyset cursor "date|doctype|name" of the last row of the previous page (union mode)
+        { fieldname: "cursor", label: "Page Cursor", fieldtype: "Data", hidden: 1 },
     ],
     onload: function(report) {
         report.page.set_title("User Activity Detail");
 
         report.page.add_button("Back to Summary", () => {
             const f = report.get_values();
-            const route_opts = frappe.get_route_options ? frappe.get_route_options() : (frappe.route_options || {});
 
-            let dtList = route_opts.doctype_list;
+            let dtList = f.doctype_list;
             if (typeof dtList === "string" && dtList) {
                 dtList = dtList.split(",").map(s => s.trim()).filter(Boolean);
             }
@@ -35,6 +53,66 @@ frappe.query_reports["User Activity Detail"] = {
             });
         });
 
+        report.page.add_inner_button("Next Page", () => {
+            const data = report.data || [];
+            // execute() only returns a message in union mode when there are more rows
+            const has_more = Boolean(report.raw_data && report.raw_data.message);
+            if (report.get_values().doctype || !has_more || !data.length) {
+                frappe.show_alert({ message: __("No more rows"), indicator: "orange" });
+                return;
+            }
+            const last = data[data.length - 1];
+            report.set_filter_value("cursor", [last.posting_date, last.doctype, last.name].join("|"));
+        });
+
+        report.page.add_inner_button("First Page", () => {
+            report.set_filter_value("cursor", "");
+        });
+
+        // Unlimited export of union mode, built by a background job
+        report.page.add_inner_button("Export All", () => {
+            const f = report.get_values();
+            if (!f.user) {
+                frappe.msgprint(__("Please select a User to export activity."));
+                return;
+            }
+            frappe.prompt(
+                { fieldname: "file_format", label: __("Format"), fieldtype: "Select", options: "CSV\nExcel", default: "CSV" },
+                (values) => {
+                    frappe.call({
+                        method: "osmani.osmani.report.user_activity_detail.user_activity_detail.enqueue_export",
+                        args: {
+                            // The filters of the report on screen, doctype_list included
+                            filters: Object.assign({}, f, { cursor: "" }),
+                            file_format: values.file_format,
+                        },
+                        callback: () => {
+                            frappe.show_alert({ message: __("Export queued, you will be notified when the file is ready"), indicator: "blue" });
+                        },
+                    });
+                },
+                __("Export All Rows"),
+                __("Export")
+            );
+        });
+
+        if (!frappe.user_activity_export_listening) {
+            frappe.user_activity_export_listening = true;
+            frappe.realtime.on("user_activity_export_ready", (data) => {
+                frappe.msgprint({
+                    title: __("Export Ready"),
+                    indicator: "green",
+                    message: __("{0} rows exported: {1}", [
+                        data.rows,
+                        `<a href="${encodeURI(data.file_url)}" target="_blank">${frappe.utils.escape_html(data.file_name)}</a>`,
+                    ]),
+                });
+            });
+            frappe.realtime.on("user_activity_export_failed", () => {
+                frappe.msgprint({ title: __("Export Failed"), indicator: "red", message: __("See the Error Log for details.") });
+            });
+        }
+
         // Robust Export to Excel (uses built-in if available, else falls back to API)
         const download_excel = (report_name, filters) => {
             try {
@@ -1,5 +1,10 @@
+import csv
+import os
+from itertools import islice
+
 import frappe
 from frappe import _
+from frappe.utils import getdate, now_datetime
 
 
 # -------------------------------------------------------------------------
@@ -74,6 +79,9 @@ DT_FIELDS = {
 DOCSTATUS_MAP = {"Draft": 0, "Submitted": 1, "Cancelled": 2}
 DOCTYPES = list(DT_FIELDS.keys())
 
+# Rows per page in union mode, and rows shown in single DocType mode
+PAGE_LENGTH = 2000
+
 
 # -------------------------------------------------------------------------
 # Helpers
@@ -86,6 +94,143 @@ def _normalize_list(value):
     return [v.strip() for v in str(value).split(",") if v.strip()]
 
 
+def _parse_cursor(value):
+    """Parse a "date|doctype|name" keyset cursor (the last row of the previous page)"""
+    if not value:
+        return None
+    parts = str(value).split("|", 2)
+    if len(parts) != 3 or parts[1] not in DT_FIELDS:
+        frappe.throw(_("Invalid page cursor {0}").format(value))
+    return frappe._dict(date=getdate(parts[0]), doctype=parts[1], name=parts[2])
+
+
+def _keyset_condition(dt, date_field, cursor, params):
+    """
+    Condition for rows of `dt` after the cursor in (date, doctype, name) DESC order.
+    The doctype is constant within a branch, so it is compared here and every
+    branch keeps a plain range on its date column.
+    """
+    if not cursor:
+        return ""
+
+    params["cursor_date"] = cursor.date
+    params["cursor_name"] = cursor.name
+
+    if dt < cursor.doctype:
+        return f" AND t.{date_field} <= %(cursor_date)s"
+    if dt > cursor.doctype:
+        return f" AND t.{date_field} < %(cursor_date)s"
+    return (
+        f" AND (t.{date_field} < %(cursor_date)s"
+        f" OR (t.{date_field} = %(cursor_date)s AND t.name < %(cursor_name)s))"
+    )
+
+
+def _build_conditions(filters):
+    """Return the WHERE clause shared by every branch and its parameters"""
+    conditions = ["1=1"]
+    params = {}
+
+    if filters.get("from_date"):
+        conditions.append("t.creation >= %(from_date)s")
+        params["from_date"] = filters["from_date"]
+
+    if filters.get("to_date"):
+        conditions.append("t.creation <= %(to_date)s")
+        params["to_date"] = filters["to_date"]
+
+    conditions.append("t.owner = %(user)s")
+    params["user"] = filters.get("user")
+
+    if filters.get("docname"):
+        conditions.append("t.name = %(docname)s")
+        params["docname"] = filters["docname"]
+
+    if filters.get("docstatus") and filters["docstatus"] != "All":
+        conditions.append("t.docstatus = %(docstatus)s")
+        params["docstatus"] = DOCSTATUS_MAP.get(filters["docstatus"])
+
+    return " AND ".join(conditions), params
+
+
+def _target_doctypes(filters):
+    selected_list = _normalize_list(filters.get("doctype_list"))
+    return [d for d in DOCTYPES if not selected_list or d in selected_list]
+
+
+def _union_query(target_doctypes, where_clause, params, cursor=None, limit=None):
+    """
+    UNION ALL of one branch per DocType in (date, doctype, name) DESC order.
+    With a `limit` each branch returns at most one page, already in page order;
+    without one (export) the whole result is sorted once by the outer query.
+    """
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+    union_queries = []
+
+    for dt in target_doctypes:
+        meta = DT_FIELDS[dt]
+        table = f"`tab{dt}`"
+        branch_where = where_clause + _keyset_condition(dt, meta["date"], cursor, params)
+        branch_order = f"ORDER BY t.{meta['date']} DESC, t.name DESC" if limit else ""
+
+        union_queries.append(f"""
+            (SELECT
+                '{dt}' AS doctype,
+                t.name AS name,
+                t.owner AS user,
+                CONCAT_WS(' ', u.first_name, u.middle_name, u.last_name) AS user_name,
+                CASE t.docstatus
+                    WHEN 0 THEN 'Draft'
+                    WHEN 1 THEN 'Submitted'
+                    WHEN 2 THEN 'Cancelled'
+                END AS status,
+                t.{meta['date']} AS posting_date,
+                t.{meta['amount']} AS total_amount
+            FROM {table} t
+            LEFT JOIN `tabUser` u ON u.name = t.owner
+            WHERE {branch_where}
+            {branch_order}
+            {limit_clause})
+        """)
+
+    if not union_queries:
+        return None
+
+    return f"""
+        SELECT * FROM ({" UNION ALL ".join(union_queries)}) activity
+        ORDER BY posting_date DESC, doctype DESC, name DESC
+        {limit_clause}
+    """
+
+
+def _doctype_query(doctype, where_clause, limit=PAGE_LENGTH):
+    """Single DocType mode query: the newest `limit` documents with the DocType's own fields"""
+    meta = DT_FIELDS[doctype]
+    table = f"`tab{doctype}`"
+
+    select_fields = [
+        "t.name AS name",
+        f"'{doctype}' AS doctype",
+        "t.owner AS user",
+        "CONCAT_WS(' ', u.first_name, u.middle_name, u.last_name) AS user_name",
+        "CASE t.docstatus WHEN 0 THEN 'Draft' WHEN 1 THEN 'Submitted' WHEN 2 THEN 'Cancelled' END AS status",
+        f"t.{meta['date']} AS posting_date",
+        f"t.{meta['amount']} AS total_amount",
+    ]
+
+    for fieldname, fieldtype in meta["fields"]:
+        select_fields.append(f"t.{fieldname}")
+
+    return f"""
+        SELECT {", ".join(select_fields)}
+        FROM {table} t
+        LEFT JOIN `tabUser` u ON u.name = t.owner
+        WHERE {where_clause}
+        ORDER BY t.creation DESC
+        LIMIT {int(limit)}
+    """
+
+
 # -------------------------------------------------------------------------
 # Report Execution
 # -------------------------------------------------------------------------
@@ -117,14 +262,9 @@ def execute(filters=None):
 
     columns = [
         name_col,
-<<<<<<< HEAD
-        {"label": _("Document"), "fieldname": "doctype", "fieldtype": "Data", "width": 150},
-        {"label": _("User"), "fieldname": "user", "fieldtype": "Link", "options": "User", "width": 160},
-=======
         {"label": _("Document Type"), "fieldname": "doctype", "fieldtype": "Data", "width": 150},
         {"label": _("Posting Date"), "fieldname": "posting_date", "fieldtype": "Date", "width": 120},
         # {"label": _("User"), "fieldname": "user", "fieldtype": "Link", "options": "User", "width": 160},
->>>>>>> 364674b (Sync production state)
         {"label": _("User Name"), "fieldname": "user_name", "fieldtype": "Data", "width": 180},
         {"label": _("Status"), "fieldname": "status", "fieldtype": "Data", "width": 100},
         {"label": _("Total Amount"), "fieldname": "total_amount", "fieldtype": "Currency", "width": 140},
@@ -146,107 +286,186 @@ def execute(filters=None):
         frappe.msgprint(_("Please select a User to view activity."))
         return columns, []
 
+    where_clause, params = _build_conditions(filters)
+
     # ---------------------------------------------------------------------
-    # Conditions
+    # UNION MODE (no specific DocType)
     # ---------------------------------------------------------------------
-    conditions = ["1=1"]
-    params = {}
-
-    if filters.get("from_date"):
-        conditions.append("t.creation >= %(from_date)s")
-        params["from_date"] = filters["from_date"]
+    if not doctype:
+        cursor = _parse_cursor(filters.get("cursor"))
+        query = _union_query(_target_doctypes(filters), where_clause, params, cursor, PAGE_LENGTH + 1)
 
-    if filters.get("to_date"):
-        conditions.append("t.creation <= %(to_date)s")
-        params["to_date"] = filters["to_date"]
+        if not query:
+            return columns, []
 
-    conditions.append("t.owner = %(user)s")
-    params["user"] = user
+        # Fetch one extra row to know if there is a next page
+        data = frappe.db.sql(query, params, as_dict=True)
 
-    if filters.get("docname"):
-        conditions.append("t.name = %(docname)s")
-        params["docname"] = filters["docname"]
+        # The message is also how the Next Page button knows there are more rows,
+        # so it keeps working whatever PAGE_LENGTH is
+        message = None
+        if len(data) > PAGE_LENGTH:
+            data = data[:PAGE_LENGTH]
+            message = _("Showing {0} rows. Use Next Page to see older documents.").format(PAGE_LENGTH)
 
-    if filters.get("docstatus") and filters["docstatus"] != "All":
-        conditions.append("t.docstatus = %(docstatus)s")
-        params["docstatus"] = DOCSTATUS_MAP.get(filters["docstatus"])
-
-    where_clause = " AND ".join(conditions)
+        return columns, data, message
 
     # ---------------------------------------------------------------------
-    # UNION MODE (no specific DocType)
+    # SINGLE DOCTYPE MODE
     # ---------------------------------------------------------------------
-    selected_list = _normalize_list(filters.get("doctype_list"))
-    target_doctypes = [d for d in DOCTYPES if not selected_list or d in selected_list]
+    data = frappe.db.sql(_doctype_query(doctype, where_clause), params, as_dict=True)
 
-    if not doctype:
-        union_queries = []
-
-        for dt in target_doctypes:
-            meta = DT_FIELDS[dt]
-            table = f"`tab{dt}`"
-
-            union_queries.append(f"""
-                SELECT
-                    '{dt}' AS doctype,
-                    t.name AS name,
-                    t.owner AS user,
-                    CONCAT_WS(' ', u.first_name, u.middle_name, u.last_name) AS user_name,
-                    CASE t.docstatus
-                        WHEN 0 THEN 'Draft'
-                        WHEN 1 THEN 'Submitted'
-                        WHEN 2 THEN 'Cancelled'
-                    END AS status,
-                    t.{meta['date']} AS posting_date,
-                    t.{meta['amount']} AS total_amount
-                FROM {table} t
-                LEFT JOIN `tabUser` u ON u.name = t.owner
-                WHERE {where_clause}
-            """)
-
-        data = frappe.db.sql(" UNION ALL ".join(union_queries), params, as_dict=True)
-        data.sort(key=lambda row: row.get("posting_date"), reverse=True)
-
-        return columns, data[:2000]
+    return columns, data
 
-    # ---------------------------------------------------------------------
-    # SINGLE DOCTYPE MODE
-    # ---------------------------------------------------------------------
-    meta = DT_FIELDS[doctype]
-    table = f"`tab{doctype}`"
 
-<<<<<<< HEAD
-    select_parts = [
-        f"'{doctype}' AS doctype",
-=======
-    select_fields = [
->>>>>>> 364674b (Sync production state)
-        "t.name AS name",
-        f"'{doctype}' AS doctype",
-        "t.owner AS user",
-        "CONCAT_WS(' ', u.first_name, u.middle_name, u.last_name) AS user_name",
-        "CASE t.docstatus WHEN 0 THEN 'Draft' WHEN 1 THEN 'Submitted' WHEN 2 THEN 'Cancelled' END AS status",
-        f"t.{meta['date']} AS posting_date",
-        f"t.{meta['amount']} AS total_amount",
-    ]
+# -------------------------------------------------------------------------
+# Unlimited export
+# -------------------------------------------------------------------------
+# Union mode columns, in SELECT order
+EXPORT_COLUMNS = [
+    "Document Type",
+    "Name",
+    "User",
+    "User Name",
+    "Status",
+    "Posting Date",
+    "Total Amount",
+]
+EXPORT_FORMATS = ("CSV", "Excel")
+EXPORT_CHUNK_SIZE = 5000
+
+# Rows per worksheet, the XLSX limit is 1,048,576 including the header
+XLSX_SHEET_ROWS = 1000000
+
+
+@frappe.whitelist()
+def enqueue_export(filters, file_format="CSV"):
+    """Export every union mode row in the background, the file link is sent over realtime"""
+    filters = frappe._dict(frappe.parse_json(filters) or {})
+
+    if not frappe.get_doc("Report", "User Activity Detail").is_permitted():
+        frappe.throw(_("Not permitted to export User Activity Detail"), frappe.PermissionError)
+
+    if file_format not in EXPORT_FORMATS:
+        frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+    if not filters.get("user"):
+        frappe.throw(_("Please select a User to export activity."))
+
+    if filters.get("from_date") and filters.get("to_date") and filters["from_date"] > filters["to_date"]:
+        frappe.throw(_("From Date cannot be after To Date"))
 
-    for fieldname, fieldtype in meta["fields"]:
-        select_fields.append(f"t.{fieldname}")
+    # The export always uses the union columns, a selected DocType narrows it to one branch
+    if filters.get("doctype"):
+        if filters.doctype not in DT_FIELDS:
+            frappe.throw(_("DocType {0} is not supported by this report").format(filters.doctype))
+        filters.doctype_list = [filters.doctype]
+
+    frappe.enqueue(
+        "osmani.osmani.report.user_activity_detail.user_activity_detail.export_activity",
+        queue="long",
+        timeout=3600,
+        enqueue_after_commit=True,
+        filters=filters,
+        file_format=file_format,
+        user=frappe.session.user,
+    )
 
-    data = frappe.db.sql(
-        f"""
-        SELECT {", ".join(select_fields)}
-        FROM {table} t
-        LEFT JOIN `tabUser` u ON u.name = t.owner
-        WHERE {where_clause}
-        ORDER BY t.creation DESC
-        LIMIT 2000
-        """,
-        params,
-        as_dict=True,
+
+def export_activity(filters, file_format="CSV", user=None):
+    """
+    Stream the unpaginated union result into a private file.
+
+    Rows are read through an unbuffered cursor and written as they arrive, so
+    worker memory stays flat however many rows the user has; the final sort
+    is done by the database.
+    """
+    filters = frappe._dict(filters)
+    user = user or frappe.session.user
+
+    where_clause, params = _build_conditions(filters)
+    query = _union_query(_target_doctypes(filters), where_clause, params)
+    if not query:
+        return
+
+    extension = "csv" if file_format == "CSV" else "xlsx"
+    file_name = "user-activity-{0}-{1}-{2}.{3}".format(
+        frappe.scrub(filters.user),
+        now_datetime().strftime("%Y%m%d-%H%M%S"),
+        frappe.generate_hash(length=6),
+        extension,
+    )
+    path = frappe.get_site_path("private", "files", file_name)
+    write_rows = _write_csv if file_format == "CSV" else _write_xlsx
+
+    try:
+        # No other query may run on this connection until the rows are consumed
+        with frappe.db.unbuffered_cursor():
+            count = write_rows(path, frappe.db.sql(query, params, as_iterator=True))
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": f"/private/files/{file_name}",
+            "file_size": os.path.getsize(path),
+            "is_private": 1,
+            "attached_to_doctype": "Report",
+            "attached_to_name": "User Activity Detail",
+        }).insert(ignore_permissions=True)
+        frappe.db.commit()
+
+    except Exception:
+        frappe.db.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        frappe.log_error(title=_("User Activity Detail export failed for {0}").format(filters.user))
+        frappe.publish_realtime("user_activity_export_failed", {"user": filters.user}, user=user)
+        raise
+
+    frappe.publish_realtime(
+        "user_activity_export_ready",
+        {"file_url": file_doc.file_url, "file_name": file_name, "rows": count},
+        user=user,
     )
 
-    return columns, data
+
+def _header():
+    return [_(label) for label in EXPORT_COLUMNS]
+
+
+def _write_csv(path, rows):
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(_header())
+        while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+            writer.writerows(chunk)
+            count += len(chunk)
+
+    return count
+
+
+def _write_xlsx(path, rows):
+    from openpyxl import Workbook
+
+    # Write-only workbooks flush each row to a temporary file instead of keeping the sheet in memory
+    workbook = Workbook(write_only=True)
+    sheet = None
+    count = 0
+
+    while chunk := list(islice(rows, EXPORT_CHUNK_SIZE)):
+        for row in chunk:
+            if count % XLSX_SHEET_ROWS == 0:
+                sheet = workbook.create_sheet(_("Activity {0}").format(count // XLSX_SHEET_ROWS + 1))
+                sheet.append(_header())
+            sheet.append(row)
+            count += 1
+
+    if sheet is None:
+        workbook.create_sheet(_("Activity {0}").format(1)).append(_header())
+
+    workbook.save(path)
+    return count
 
 
 # import frappe
@@ -42,6 +42,12 @@ frappe.query_reports["User Activity Report"] = {
             fieldtype: "Select",
             options: ["All", "Draft", "Submitted", "Cancelled"].join("\n"),
             default: "All"
+        },
+        {
+            fieldname: "time_bucket",
+            label: "Time Bucket",
+            fieldtype: "Select",
+            options: ["", "Day", "Week"].join("\n")
         }
     ],
     onload: function(report) {
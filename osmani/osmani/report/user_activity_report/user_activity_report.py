@@ -1,5 +1,6 @@
 import frappe
 from frappe import _
+from frappe.utils import formatdate, getdate
 
 
 DOCTYPES = [
@@ -14,6 +15,12 @@ DOCTYPES = [
 
 DOCSTATUS_MAP = {"Draft": 0, "Submitted": 1, "Cancelled": 2}
 
+# Optional time bucket columns, keyed by the start date of each bucket (weeks start on Monday)
+BUCKETS = {
+    "Day": "activity_date",
+    "Week": "activity_date - INTERVAL WEEKDAY(activity_date) DAY",
+}
+
 
 def _normalize_doctype_list(value):
     if not value:
@@ -38,60 +45,79 @@ def execute(filters=None):
         columns.append({"label": _(dt), "fieldname": key, "fieldtype": "Int", "width": 130})
     columns.append({"label": _("Total"), "fieldname": "total", "fieldtype": "Int", "width": 130})
 
-    # Common conditions
-    conditions = ["1=1"]
-    params = {}
+    if not selected_doctypes:
+        return columns, []
+
+    # Counts come from the User Activity Rollup, one row per user, DocType, day and status
+    conditions = ["reference_doctype IN %(doctypes)s"]
+    params = {"doctypes": [dt for dt, key in selected_doctypes]}
 
     if filters.get("from_date"):
-        conditions.append("creation >= %(from_date)s")
+        conditions.append("activity_date >= %(from_date)s")
         params["from_date"] = filters.get("from_date")
 
     if filters.get("to_date"):
-        conditions.append("creation <= %(to_date)s")
+        conditions.append("activity_date <= %(to_date)s")
         params["to_date"] = filters.get("to_date")
 
     if filters.get("user"):
-        conditions.append("owner = %(user)s")
+        conditions.append("user = %(user)s")
         params["user"] = filters.get("user")
 
     docstatus_label = filters.get("docstatus")
     if docstatus_label and docstatus_label != "All":
-        conditions.append("docstatus = %(docstatus)s")
+        conditions.append("document_status = %(docstatus)s")
         params["docstatus"] = DOCSTATUS_MAP.get(docstatus_label, docstatus_label)
 
-    where_clause = " AND ".join(conditions)
-
-    # Aggregate per doctype with GROUP BY owner
+    bucket_expr = BUCKETS.get(filters.get("time_bucket"))
+    bucket_select = f", {bucket_expr} AS bucket" if bucket_expr else ""
+    bucket_group = ", bucket" if bucket_expr else ""
+
+    counts = ", ".join(
+        f"SUM(CASE WHEN reference_doctype = '{dt}' THEN entry_count ELSE 0 END) AS {key}"
+        for dt, key in selected_doctypes
+    )
+    res = frappe.db.sql(
+        f"""
+        SELECT user{bucket_select}, {counts}, SUM(entry_count) AS total
+        FROM `tabUser Activity Rollup`
+        WHERE {" AND ".join(conditions)}
+        GROUP BY user{bucket_group}
+        HAVING total > 0
+        """,
+        params,
+        as_dict=True,
+    )
+
+    # Fold the bucket rows of each user into one row with a column per bucket
     rows_by_user = {}
-    for dt, key in selected_doctypes:
-        table = f"`tab{dt}`"
-        res = frappe.db.sql(
-            f"""
-            SELECT owner, COUNT(*) AS cnt
-            FROM {table}
-            WHERE {where_clause}
-            GROUP BY owner
-            """,
-            params,
-            as_dict=True,
-        )
-        for r in res:
-            u = r["owner"]
-            row = rows_by_user.setdefault(u, {"user": u})
-            row[key] = r["cnt"]
-
-    # Build final data, fill missing zeros, and totals
-    data = []
-    for u, row in rows_by_user.items():
-        total = 0
+    buckets = set()
+    for r in res:
+        row = rows_by_user.setdefault(r["user"], {"user": r["user"], "total": 0})
         for dt, key in selected_doctypes:
-            val = int(row.get(key, 0) or 0)
-            row[key] = val
-            total += val
-        row["total"] = total
-        data.append(row)
+            row[key] = row.get(key, 0) + int(r[key] or 0)
+        row["total"] += int(r["total"] or 0)
+
+        if bucket_expr:
+            bucket = getdate(r["bucket"])
+            buckets.add(bucket)
+            row[_bucket_fieldname(bucket)] = int(r["total"] or 0)
+
+    for bucket in sorted(buckets):
+        columns.append({
+            "label": formatdate(bucket),
+            "fieldname": _bucket_fieldname(bucket),
+            "fieldtype": "Int",
+            "width": 110,
+        })
+
+    data = list(rows_by_user.values())
 
     # Sort by total desc then user asc
     data.sort(key=lambda x: (-x.get("total", 0), x.get("user", "")))
 
     return columns, data
+
+
+def _bucket_fieldname(bucket):
+    return "bucket_" + bucket.strftime("%Y%m%d")
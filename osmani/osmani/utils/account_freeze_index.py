@@ -0,0 +1,319 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+"""
+Per-worker in-memory index of active Account Freeze Rules.
+
+The GL Entry validate hook runs once for every GL row, so instead of querying
+`tabAccount Freeze Rule` each time the active rules are loaded once per worker
+and kept as sorted date intervals per (company, account). Company-wide locks
+are kept per company and checked first. Rules on group
+accounts apply to every descendant and are indexed by the Account nested set
+(lft/rgt). A version stamp in Redis is bumped whenever a rule or the account
+tree changes; a worker whose copy was built for an older version rebuilds it
+on the next lookup.
+"""
+
+from bisect import bisect_right
+
+import frappe
+from frappe.utils import getdate
+
+from osmani.osmani.utils.account_freeze_stats import record_index_lookup
+
+INDEX_VERSION_KEY = "account_freeze_rule_index_version"
+
+# site -> FreezeRuleIndex, kept for the lifetime of the worker process
+_indexes = {}
+
+ACTIVE_RULES_QUERY = """
+	SELECT
+		r.name, r.freeze_scope, r.company, r.account, r.from_date, r.to_date, r.reason,
+		a.lft, a.rgt, a.is_group
+	FROM `tabAccount Freeze Rule` r
+	LEFT JOIN `tabAccount` a ON a.name = r.account
+	WHERE r.active = 1
+		AND (r.freeze_scope = 'Company' OR IFNULL(r.account, '') != '')
+		AND r.from_date IS NOT NULL
+		AND r.to_date IS NOT NULL
+"""
+
+
+class DateIntervals:
+	"""Sorted, non-overlapping date intervals with binary search lookup.
+
+	Overlapping rules are merged into one interval that remembers every rule
+	it was built from, so a hit can still report the exact rule that matched.
+	"""
+
+	def __init__(self, rules):
+		self.starts = []
+		self.ends = []
+		self.rules = []
+
+		for rule in sorted(rules, key=lambda r: r.from_date):
+			if self.starts and rule.from_date <= self.ends[-1]:
+				self.ends[-1] = max(self.ends[-1], rule.to_date)
+				self.rules[-1].append(rule)
+			else:
+				self.starts.append(rule.from_date)
+				self.ends.append(rule.to_date)
+				self.rules.append([rule])
+
+	def find(self, posting_date):
+		"""Return the rule covering `posting_date`, or None"""
+		pos = bisect_right(self.starts, posting_date) - 1
+		if pos < 0 or self.ends[pos] < posting_date:
+			return None
+
+		for rule in self.rules[pos]:
+			if rule.from_date <= posting_date <= rule.to_date:
+				return rule
+
+		return None
+
+	def get_rules(self):
+		return [rule for rules in self.rules for rule in rules]
+
+	def to_list(self):
+		return [[str(start), str(end)] for start, end in zip(self.starts, self.ends)]
+
+
+class AccountTreeIntervals:
+	"""Group account rules of one company, indexed by their lft/rgt range.
+
+	Nested set ranges are either nested or disjoint, so the lft axis is cut at
+	every rule boundary and each segment keeps the date intervals of all group
+	rules covering it. Checking an account is one bisect on its lft.
+	"""
+
+	def __init__(self, rules, account_lft):
+		self.rules = rules
+		self.account_lft = account_lft
+		self.bounds = sorted({rule.lft for rule in rules} | {rule.rgt + 1 for rule in rules})
+		self.segments = []
+
+		for point in self.bounds:
+			covering = [rule for rule in rules if rule.lft <= point <= rule.rgt]
+			self.segments.append(DateIntervals(covering) if covering else None)
+
+	def get_intervals(self, account):
+		"""Return the date intervals inherited by `account` from its ancestors"""
+		lft = self.account_lft.get(account)
+		if lft is None:
+			return None
+
+		pos = bisect_right(self.bounds, lft) - 1
+		if pos < 0:
+			return None
+
+		return self.segments[pos]
+
+
+class FreezeRuleIndex:
+	def __init__(self, version, rules, accounts=None):
+		self.version = version
+
+		grouped = {}
+		group_rules = {}
+		locks = {}
+		for rule in rules:
+			if rule.freeze_scope == "Company":
+				locks.setdefault(rule.company, []).append(rule)
+			elif rule.is_group:
+				group_rules.setdefault(rule.company, []).append(rule)
+			else:
+				grouped.setdefault((rule.company, rule.account), []).append(rule)
+
+		self.intervals = {key: DateIntervals(key_rules) for key, key_rules in grouped.items()}
+		self.company_locks = {company: DateIntervals(company_rules) for company, company_rules in locks.items()}
+
+		account_lft = {}
+		for account in accounts or []:
+			account_lft.setdefault(account.company, {})[account.name] = account.lft
+
+		self.trees = {
+			company: AccountTreeIntervals(company_rules, account_lft.get(company, {}))
+			for company, company_rules in group_rules.items()
+		}
+
+	def find_company_lock(self, company, posting_date):
+		"""Return the company-wide lock covering `posting_date`, or None"""
+		locks = self.company_locks.get(company)
+		if not locks:
+			return None
+
+		return locks.find(getdate(posting_date))
+
+	def find_rule(self, company, account, posting_date):
+		"""Return the active rule freezing `account` on `posting_date`, or None.
+		A company-wide lock wins; account rules are only consulted without one.
+		"""
+		posting_date = getdate(posting_date)
+
+		lock = self.find_company_lock(company, posting_date)
+		if lock:
+			return lock
+
+		intervals = self.intervals.get((company, account))
+		if intervals:
+			rule = intervals.find(posting_date)
+			if rule:
+				return rule
+
+		tree = self.trees.get(company)
+		if tree:
+			intervals = tree.get_intervals(account)
+			if intervals:
+				return intervals.find(posting_date)
+
+		return None
+
+	def get_account_intervals(self, company=None):
+		"""Yield (company, account, DateIntervals) for every frozen account, groups expanded"""
+		for (rule_company, account), intervals in self.intervals.items():
+			if company and rule_company != company:
+				continue
+			tree = self.trees.get(rule_company)
+			if tree and account in tree.account_lft:
+				# merged with its ancestors' rules below
+				continue
+			yield rule_company, account, intervals
+
+		for tree_company, tree in self.trees.items():
+			if company and tree_company != company:
+				continue
+			for account in tree.account_lft:
+				inherited = tree.get_intervals(account)
+				own = self.intervals.get((tree_company, account))
+				if not inherited and not own:
+					continue
+				rules = (inherited.get_rules() if inherited else []) + (own.get_rules() if own else [])
+				yield tree_company, account, DateIntervals(rules)
+
+	def get_frozen_accounts(self, company, posting_date):
+		"""Return the rules freezing any account of `company` on `posting_date`.
+
+		Rules on group accounts are listed once per descendant, with `account`
+		set to the descendant and `rule_account` to the group. If the company is
+		locked, only the company-wide lock (without an account) is returned.
+		"""
+		posting_date = getdate(posting_date)
+
+		lock = self.find_company_lock(company, posting_date)
+		if lock:
+			return [lock]
+
+		frozen = []
+
+		for rule_company, account, intervals in self.get_account_intervals(company):
+			rule = intervals.find(posting_date)
+			if rule:
+				frozen.append(frappe._dict(rule, account=account, rule_account=rule.account))
+
+		return sorted(frozen, key=lambda r: r.account)
+
+	def get_calendar(self, company):
+		"""Return {account: [[from_date, to_date], ...]} of the merged intervals of the
+		company's rules on individual accounts (group rules are in get_group_calendar)"""
+		return {
+			account: intervals.to_list()
+			for (rule_company, account), intervals in self.intervals.items()
+			if rule_company == company
+		}
+
+	def get_group_calendar(self, company):
+		"""Return the company's group account rules as [{account, lft, rgt, intervals}], one
+		entry per group; an account is covered if its lft lies within lft..rgt"""
+		tree = self.trees.get(company)
+		if not tree:
+			return []
+
+		groups = {}
+		for rule in tree.rules:
+			groups.setdefault((rule.account, rule.lft, rule.rgt), []).append(rule)
+
+		return [
+			{"account": account, "lft": lft, "rgt": rgt, "intervals": DateIntervals(group_rules).to_list()}
+			for (account, lft, rgt), group_rules in sorted(groups.items(), key=lambda item: item[0][1])
+		]
+
+	def get_company_lock_calendar(self, company):
+		"""Return [[from_date, to_date], ...] of the company's company-wide locks"""
+		locks = self.company_locks.get(company)
+		return locks.to_list() if locks else []
+
+
+def load_active_rules():
+	"""Load every active freeze rule with a complete date range, with its account's lft/rgt"""
+	rules = frappe.db.sql(ACTIVE_RULES_QUERY, as_dict=True)
+
+	for rule in rules:
+		rule.from_date = getdate(rule.from_date)
+		rule.to_date = getdate(rule.to_date)
+
+	return rules
+
+
+def load_accounts(companies):
+	"""Load the nested set position of every account of `companies`"""
+	if not companies:
+		return []
+
+	return frappe.get_all(
+		"Account",
+		filters={"company": ["in", list(companies)]},
+		fields=["name", "company", "lft"],
+	)
+
+
+def get_index_version():
+	"""Return the current index version, read from Redis at most once per request"""
+	version = getattr(frappe.local, "account_freeze_index_version", None)
+	if version is None:
+		version = frappe.cache().get_value(INDEX_VERSION_KEY)
+		if version is None:
+			version = invalidate_freeze_index()
+		frappe.local.account_freeze_index_version = version
+
+	return version
+
+
+def get_freeze_index():
+	"""Return this worker's freeze rule index, rebuilding it if it is stale"""
+	version = get_index_version()
+	index = _indexes.get(frappe.local.site)
+
+	hit = bool(index) and index.version == version
+	record_index_lookup(hit)
+
+	if not hit:
+		rules = load_active_rules()
+		accounts = load_accounts({rule.company for rule in rules if rule.is_group})
+		index = FreezeRuleIndex(version, rules, accounts)
+		_indexes[frappe.local.site] = index
+
+	return index
+
+
+def invalidate_freeze_index():
+	"""Bump the index version so every worker rebuilds its index"""
+	version = frappe.generate_hash(length=12)
+	frappe.cache().set_value(INDEX_VERSION_KEY, version)
+	frappe.local.account_freeze_index_version = version
+
+	return version
+
+
+def clear_freeze_index(doc=None, method=None):
+	"""Invalidate the freeze rule index on every worker after a rule or account change.
+
+	The version is bumped right away so this worker sees its own change, and
+	again once the transaction ends so workers that rebuilt in between do not
+	keep an index loaded before the commit (or containing a rolled back change).
+	Also called via doc_events when an Account is saved, renamed or deleted,
+	since that can move lft/rgt of other accounts.
+	"""
+	invalidate_freeze_index()
+	frappe.db.after_commit.add(invalidate_freeze_index)
+	frappe.db.after_rollback.add(invalidate_freeze_index)
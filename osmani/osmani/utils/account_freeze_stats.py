@@ -0,0 +1,139 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+"""
+Counters and a latency histogram for the Account Freeze GL Entry hook.
+
+Every check is recorded in a per-request buffer on `frappe.local`, which is
+written to Redis hashes in one pipeline by the after_request / after_job
+hooks, so instrumenting the hook does not add a Redis round trip per GL row.
+"""
+
+import frappe
+from frappe.utils import now
+
+STATS_KEY = "account_freeze_check_stats"
+REJECTED_KEY = "account_freeze_check_rejected"
+LATENCY_KEY = "account_freeze_check_latency"
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 100)
+
+
+def get_buffer():
+	buffer = getattr(frappe.local, "account_freeze_stats", None)
+	if buffer is None:
+		buffer = frappe.local.account_freeze_stats = {
+			"counters": {},
+			"rejected": {},
+			"latency": {},
+		}
+
+	return buffer
+
+
+def incr(counter, amount=1):
+	counters = get_buffer()["counters"]
+	counters[counter] = counters.get(counter, 0) + amount
+
+
+def record_index_lookup(hit):
+	incr("index_hits" if hit else "index_misses")
+
+
+def record_check(elapsed_seconds):
+	"""Record one freeze check and its duration"""
+	elapsed_ms = elapsed_seconds * 1000
+	bucket = next((str(b) for b in LATENCY_BUCKETS_MS if elapsed_ms <= b), "+Inf")
+
+	latency = get_buffer()["latency"]
+	latency[bucket] = latency.get(bucket, 0) + 1
+	incr("checks")
+	incr("latency_total_us", int(elapsed_ms * 1000))
+
+
+def record_rejection(rule_name):
+	rejected = get_buffer()["rejected"]
+	rejected[rule_name] = rejected.get(rule_name, 0) + 1
+	incr("rejected")
+
+
+def flush_freeze_stats(*args, **kwargs):
+	"""Write the buffered counters to Redis. Called via after_request and after_job hooks."""
+	buffer = getattr(frappe.local, "account_freeze_stats", None)
+	if not buffer or not getattr(frappe.local, "site", None):
+		return
+
+	frappe.local.account_freeze_stats = None
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+
+	for key, values in (
+		(STATS_KEY, buffer["counters"]),
+		(REJECTED_KEY, buffer["rejected"]),
+		(LATENCY_KEY, buffer["latency"]),
+	):
+		for field, amount in values.items():
+			pipeline.hincrby(cache.make_key(key), field, amount)
+
+	pipeline.hsetnx(cache.make_key(STATS_KEY), "since", now())
+	pipeline.execute()
+
+
+def read_counts(*keys):
+	"""Read raw Redis hashes (not pickled like RedisWrapper.hgetall expects) in one round trip"""
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	for key in keys:
+		pipeline.hgetall(cache.make_key(key))
+
+	return [
+		{frappe.safe_decode(field): frappe.safe_decode(value) for field, value in (values or {}).items()}
+		for values in pipeline.execute()
+	]
+
+
+def get_freeze_check_summary():
+	"""Return the freeze check counters, rejections per rule and latency histogram"""
+	flush_freeze_stats()
+
+	stats, rejected, latency = read_counts(STATS_KEY, REJECTED_KEY, LATENCY_KEY)
+	checks = int(stats.get("checks", 0))
+	index_hits = int(stats.get("index_hits", 0))
+	index_misses = int(stats.get("index_misses", 0))
+	lookups = index_hits + index_misses
+
+	buckets = [str(b) for b in LATENCY_BUCKETS_MS] + ["+Inf"]
+
+	return {
+		"since": stats.get("since"),
+		"checks": checks,
+		"index_hits": index_hits,
+		"index_misses": index_misses,
+		"index_hit_rate": round(index_hits * 100 / lookups, 2) if lookups else 0,
+		"rejected": int(stats.get("rejected", 0)),
+		"avg_latency_ms": round(int(stats.get("latency_total_us", 0)) / 1000 / checks, 4) if checks else 0,
+		"rejected_by_rule": sorted(
+			({"rule": rule, "count": int(count)} for rule, count in rejected.items()),
+			key=lambda r: -r["count"],
+		),
+		"latency_histogram": [{"le_ms": b, "count": int(latency.get(b, 0))} for b in buckets],
+	}
+
+
+@frappe.whitelist()
+def get_freeze_check_stats():
+	"""Whitelisted stats endpoint for the freeze check hook"""
+	frappe.only_for("System Manager")
+	return get_freeze_check_summary()
+
+
+@frappe.whitelist(methods=["POST"])
+def reset_freeze_check_stats():
+	frappe.only_for("System Manager")
+	frappe.local.account_freeze_stats = None
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	for key in (STATS_KEY, REJECTED_KEY, LATENCY_KEY):
+		pipeline.delete(cache.make_key(key))
+	pipeline.execute()
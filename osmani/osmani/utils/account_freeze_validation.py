@@ -1,15 +1,25 @@
 # Copyright (c) 2026, Ubaid Ali and contributors
 # For license information, please see license.txt
 
+import hashlib
+from time import perf_counter
+
 import frappe
 from frappe import _
 from frappe.utils import getdate
 
+from osmani.osmani.utils.account_freeze_index import get_freeze_index
+from osmani.osmani.utils.account_freeze_stats import record_check, record_rejection
+
 
 def validate_frozen_account(doc, method=None):
 	"""
 	Validate if the account in GL Entry is frozen for the posting date.
 	This function is called via hooks for GL Entry validation.
+
+	While the voucher that owns the GL Entry is being submitted or cancelled,
+	the check is deferred to the voucher scope and run once for all of its
+	accounts (see `begin_voucher_freeze_check`).
 	"""
 	if not doc.account or not doc.posting_date:
 		return
@@ -22,22 +32,32 @@ def validate_frozen_account(doc, method=None):
 	company = doc.company
 	posting_date = getdate(doc.posting_date)
 	
-	# Check if there's an active freeze rule for this account and date
-	freeze_rules = frappe.get_all(
-		"Account Freeze Rule",
-		filters={
-			"account": doc.account,
-			"company": company,
-			"active": 1,
-			"from_date": ["<=", posting_date],
-			"to_date": [">=", posting_date]
-		},
-		fields=["name", "from_date", "to_date", "reason"],
-		limit=1
-	)
+	started = perf_counter()
+	scope = get_voucher_scope(doc.get("voucher_type"), doc.get("voucher_no"))
+	if scope is not None:
+		scope.add((company, doc.account, posting_date))
+		record_check(perf_counter() - started)
+		return
+	
+	# Check the in-memory rule index instead of querying for every GL row
+	rule = get_freeze_index().find_rule(company, doc.account, posting_date)
+	record_check(perf_counter() - started)
 	
-	if freeze_rules:
-		rule = freeze_rules[0]
+	if not rule:
+		return
+	
+	record_rejection(rule.name)
+	
+	if rule.freeze_scope == "Company":
+		error_message = _(
+			"Cannot post to Account {0}. Company {1} is locked from {2} to {3}."
+		).format(
+			frappe.bold(doc.account),
+			frappe.bold(company),
+			frappe.bold(rule.from_date),
+			frappe.bold(rule.to_date)
+		)
+	else:
 		error_message = _(
 			"Cannot post to Account {0}. This account is frozen from {1} to {2}."
 		).format(
@@ -46,14 +66,110 @@ def validate_frozen_account(doc, method=None):
 			frappe.bold(rule.to_date)
 		)
 		
-		if rule.reason:
-			error_message += "<br>" + _("Reason: {0}").format(rule.reason)
-		
-		error_message += "<br><br>" + _("Freeze Rule: {0}").format(
-			frappe.get_desk_link("Account Freeze Rule", rule.name)
+		if rule.account != doc.account:
+			error_message += "<br>" + _("Frozen through group account {0}").format(frappe.bold(rule.account))
+	
+	if rule.reason:
+		error_message += "<br>" + _("Reason: {0}").format(rule.reason)
+	
+	error_message += "<br><br>" + _("Freeze Rule: {0}").format(
+		frappe.get_desk_link("Account Freeze Rule", rule.name)
+	)
+	
+	frappe.throw(error_message, title=_("Account Frozen"))
+
+
+def get_voucher_scope(voucher_type, voucher_no):
+	"""Return the set of pending (company, account, posting_date) checks for a voucher, if open"""
+	if not voucher_type or not voucher_no:
+		return None
+	
+	scopes = frappe.flags.account_freeze_voucher_scopes
+	if not scopes:
+		return None
+	
+	return scopes.get((voucher_type, voucher_no))
+
+
+def begin_voucher_freeze_check(doc, method=None):
+	"""
+	Open a freeze check scope before a voucher is submitted or cancelled.
+	Called via doc_events for all DocTypes on before_submit and before_cancel.
+	"""
+	if frappe.flags.account_freeze_voucher_scopes is None:
+		frappe.flags.account_freeze_voucher_scopes = {}
+	
+	frappe.flags.account_freeze_voucher_scopes[(doc.doctype, doc.name)] = set()
+
+
+def end_voucher_freeze_check(doc, method=None):
+	"""
+	Close the voucher's freeze check scope and validate every GL Entry it posted at once.
+	Called via doc_events for all DocTypes on on_submit and on_cancel.
+	"""
+	scopes = frappe.flags.account_freeze_voucher_scopes
+	if not scopes:
+		return
+	
+	entries = scopes.pop((doc.doctype, doc.name), None)
+	if entries:
+		validate_gl_map_frozen_accounts(entries)
+
+
+def get_frozen_gl_entries(entries):
+	"""
+	Resolve the freeze status of many GL rows with one index probe per distinct row.
+	`entries` is an iterable of (company, account, posting_date) or GL Entry dicts.
+	Returns a list of (account, rule) for every frozen account, ordered by account.
+	"""
+	index = get_freeze_index()
+	distinct = set()
+	
+	for entry in entries:
+		if not isinstance(entry, tuple):
+			entry = (entry.get("company"), entry.get("account"), entry.get("posting_date"))
+		company, account, posting_date = entry
+		if account and posting_date:
+			distinct.add((company, account, getdate(posting_date)))
+	
+	frozen = {}
+	for company, account, posting_date in distinct:
+		if account in frozen:
+			continue
+		rule = index.find_rule(company, account, posting_date)
+		if rule:
+			frozen[account] = rule
+	
+	return sorted(frozen.items())
+
+
+def validate_gl_map_frozen_accounts(entries):
+	"""Throw a single error listing every frozen account in a voucher's GL rows"""
+	frozen = get_frozen_gl_entries(entries)
+	if not frozen:
+		return
+	
+	rows = []
+	for account, rule in frozen:
+		record_rejection(rule.name)
+		row = _("{0}: frozen from {1} to {2}").format(
+			frappe.bold(account),
+			frappe.bold(rule.from_date),
+			frappe.bold(rule.to_date)
 		)
-		
-		frappe.throw(error_message, title=_("Account Frozen"))
+		if rule.freeze_scope == "Company":
+			row += " - " + _("company {0} is locked").format(frappe.bold(rule.company))
+		elif rule.account != account:
+			row += " - " + _("through group account {0}").format(frappe.bold(rule.account))
+		if rule.reason:
+			row += " - " + _("Reason: {0}").format(rule.reason)
+		row += " ({0})".format(frappe.get_desk_link("Account Freeze Rule", rule.name))
+		rows.append("<li>{0}</li>".format(row))
+	
+	error_message = _("Cannot post to the following frozen accounts:")
+	error_message += "<ul>{0}</ul>".format("".join(rows))
+	
+	frappe.throw(error_message, title=_("Account Frozen"))
 
 
 def get_frozen_accounts_for_date(company, posting_date):
@@ -61,21 +177,7 @@ def get_frozen_accounts_for_date(company, posting_date):
 	Get list of frozen accounts for a specific company and date.
 	Utility function for reports or queries.
 	"""
-	posting_date = getdate(posting_date)
-	
-	frozen_accounts = frappe.get_all(
-		"Account Freeze Rule",
-		filters={
-			"company": company,
-			"active": 1,
-			"from_date": ["<=", posting_date],
-			"to_date": [">=", posting_date]
-		},
-		fields=["account", "from_date", "to_date", "reason"],
-		order_by="account"
-	)
-	
-	return frozen_accounts
+	return get_freeze_index().get_frozen_accounts(company, posting_date)
 
 
 @frappe.whitelist()
@@ -86,26 +188,81 @@ def check_account_freeze_status(account, company, posting_date):
 	"""
 	posting_date = getdate(posting_date)
 	
-	freeze_rules = frappe.get_all(
-		"Account Freeze Rule",
-		filters={
-			"account": account,
-			"company": company,
-			"active": 1,
-			"from_date": ["<=", posting_date],
-			"to_date": [">=", posting_date]
-		},
-		fields=["name", "from_date", "to_date", "reason"],
-		limit=1
-	)
+	rule = get_freeze_index().find_rule(company, account, posting_date)
 	
-	if freeze_rules:
+	if rule:
 		return {
 			"is_frozen": True,
-			"freeze_rule": freeze_rules[0]
+			"freeze_rule": rule
 		}
 	
 	return {
 		"is_frozen": False,
 		"freeze_rule": None
 	}
+
+
+@frappe.whitelist()
+def check_account_freeze_status_bulk(company, entries):
+	"""
+	Whitelisted method to check many (account, posting_date) pairs in one call.
+	`entries` is a list (or JSON string) of [account, posting_date] pairs or
+	{"account": ..., "posting_date": ...} dicts. Results keep the input order.
+	"""
+	if isinstance(entries, str):
+		entries = frappe.parse_json(entries)
+	
+	index = get_freeze_index()
+	results = []
+	
+	for entry in entries or []:
+		if isinstance(entry, dict):
+			account, posting_date = entry.get("account"), entry.get("posting_date")
+		else:
+			account, posting_date = entry
+		
+		rule = None
+		if account and posting_date:
+			rule = index.find_rule(company, account, posting_date)
+		
+		results.append({
+			"account": account,
+			"posting_date": posting_date,
+			"is_frozen": bool(rule),
+			"freeze_rule": rule
+		})
+	
+	return results
+
+
+@frappe.whitelist()
+def get_frozen_calendar(company, etag=None):
+	"""
+	Whitelisted method returning the frozen calendar of a company for client-side
+	validation: `accounts` (account -> merged date intervals), `groups` (rules on
+	group accounts as lft/rgt ranges, so the payload does not grow with the chart
+	of accounts) and `company_lock` (company-wide lock intervals).
+	Pass back the returned `etag` to get `not_modified` instead of the payload
+	while no freeze rule has changed.
+	"""
+	if not company:
+		frappe.throw(_("Company is required"))
+	
+	frappe.has_permission("Company", "read", company, throw=True)
+	
+	index = get_freeze_index()
+	current_etag = hashlib.sha1(f"{index.version}:{company}".encode()).hexdigest()[:16]
+	
+	if etag and etag == current_etag:
+		return {
+			"etag": current_etag,
+			"not_modified": True
+		}
+	
+	return {
+		"etag": current_etag,
+		"not_modified": False,
+		"accounts": index.get_calendar(company),
+		"groups": index.get_group_calendar(company),
+		"company_lock": index.get_company_lock_calendar(company)
+	}
@@ -0,0 +1,42 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+from frappe.tests.utils import FrappeTestCase
+
+from osmani.osmani.utils.user_filter_benchmark import compare_results
+
+
+def run(**medians):
+	"""Benchmark results of one profile and DocType from metric=median_ms pairs"""
+	return {
+		"results": {
+			"5_details": {
+				"Sales Invoice": dict(
+					{metric: {"median_ms": median} for metric, median in medians.items()},
+					conditions_length=120
+				)
+			}
+		}
+	}
+
+
+class TestUserFilterBenchmark(FrappeTestCase):
+	def test_compare_results(self):
+		"""Test that only metrics slower than the threshold are flagged as regressions"""
+		baseline = run(cold_build=10.0, lru_hit=0.1, get_list=5.0)
+		current = run(cold_build=13.0, lru_hit=0.11, get_list=4.0, redis_hit=0.5)
+
+		rows = {row["metric"]: row for row in compare_results(baseline, current)}
+
+		# Non-timing values and metrics missing from the baseline are skipped
+		self.assertEqual(set(rows), {"cold_build", "lru_hit", "get_list"})
+		self.assertEqual(rows["cold_build"]["change"], 0.3)
+		self.assertTrue(rows["cold_build"]["regression"])
+		self.assertFalse(rows["lru_hit"]["regression"])
+		self.assertFalse(rows["get_list"]["regression"])
+		self.assertEqual(rows["get_list"]["baseline_ms"], 5.0)
+		self.assertEqual(rows["get_list"]["current_ms"], 4.0)
+
+		# A 10% slowdown is a regression against a tighter threshold
+		rows = {row["metric"]: row for row in compare_results(baseline, current, threshold=0.05)}
+		self.assertTrue(rows["lru_hit"]["regression"])
@@ -0,0 +1,81 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+import threading
+from unittest.mock import Mock, patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from osmani.osmani.utils import user_filter_cache
+from osmani.osmani.utils.user_filter_cache import (
+	FILTER_VERSION_KEY,
+	bump_filter_version,
+	clear_local_cache,
+	get_cached_condition,
+	get_filter_version,
+)
+
+TEST_USER = "test-filter-cache@example.com"
+TEST_CONDITION = "`tabToDo`.`priority` = 'High'"
+
+
+class TestUserFilterCache(FrappeTestCase):
+	def setUp(self):
+		"""Start every test on a fresh filter version"""
+		bump_filter_version()
+
+	def tearDown(self):
+		"""Leave no entries of the test user behind"""
+		bump_filter_version()
+		clear_local_cache()
+
+	def test_lru_hit(self):
+		"""Test that a cached condition is returned without building it or reading Redis"""
+		builder = Mock(return_value=TEST_CONDITION)
+		self.assertEqual(get_cached_condition(TEST_USER, "ToDo", builder), TEST_CONDITION)
+
+		with patch.object(frappe, "cache", side_effect=AssertionError("Redis read")):
+			self.assertEqual(get_cached_condition(TEST_USER, "ToDo", builder), TEST_CONDITION)
+
+		# Another worker, without this LRU, reads it from Redis
+		clear_local_cache()
+		self.assertEqual(get_cached_condition(TEST_USER, "ToDo", builder), TEST_CONDITION)
+		builder.assert_called_once()
+
+	def test_version_bump_invalidates(self):
+		"""Test that a filter version bump makes the next lookup build the condition again"""
+		builder = Mock(return_value=TEST_CONDITION)
+		get_cached_condition(TEST_USER, "ToDo", builder)
+		version = get_filter_version()
+
+		self.assertNotEqual(bump_filter_version(), version)
+		builder.return_value = "(1=0)"
+		self.assertEqual(get_cached_condition(TEST_USER, "ToDo", builder), "(1=0)")
+		self.assertEqual(builder.call_count, 2)
+
+	def test_version_read_without_listener(self):
+		"""Test that without the subscriber a version bumped by another worker is read from Redis"""
+		with patch.object(user_filter_cache, "_listener_ready", threading.Event()), patch.object(
+			user_filter_cache, "start_version_listener"
+		):
+			version = get_filter_version()
+			frappe.cache().set_value(FILTER_VERSION_KEY, "other-worker")
+
+			# Read once per request
+			self.assertEqual(get_filter_version(), version)
+
+			frappe.local.user_record_filter_version = None
+			self.assertEqual(get_filter_version(), "other-worker")
+
+	def test_version_from_listener(self):
+		"""Test that while subscribed the published version is used without reading Redis"""
+		ready = threading.Event()
+		ready.set()
+		with patch.object(user_filter_cache, "_listener_ready", ready), patch.object(
+			user_filter_cache, "start_version_listener"
+		), patch.dict(user_filter_cache._published_versions, {frappe.local.site: "published"}), patch.object(
+			frappe, "cache", side_effect=AssertionError("Redis read")
+		):
+			frappe.local.user_record_filter_version = None
+			self.assertEqual(get_filter_version(), "published")
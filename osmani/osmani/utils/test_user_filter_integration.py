@@ -0,0 +1,130 @@
+# Copyright (c) 2026, Ubaid Ali and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from osmani.osmani.utils import user_filter_integration
+from osmani.osmani.utils.user_filter_cache import clear_filter_cache
+from osmani.osmani.utils.user_filter_integration import (
+	audit_doctype_visibility,
+	build_profile_query,
+	profile_query,
+)
+
+TEST_USER = "test-filter-integration@example.com"
+TEST_MARKER = "URF Integration Test"
+
+
+class TestUserFilterIntegration(FrappeTestCase):
+	def setUp(self):
+		"""Set up test data"""
+		if not frappe.db.exists("User", TEST_USER):
+			frappe.get_doc({
+				"doctype": "User",
+				"email": TEST_USER,
+				"first_name": "Filter Integration",
+				"send_welcome_email": 0,
+				"roles": [{"role": "Accounts User"}]
+			}).insert(ignore_permissions=True)
+
+		for priority in ("High", "Low"):
+			frappe.get_doc({
+				"doctype": "ToDo",
+				"description": f"{TEST_MARKER} {priority}",
+				"priority": priority,
+				"allocated_to": TEST_USER
+			}).insert(ignore_permissions=True)
+
+	def tearDown(self):
+		"""Clean up test data"""
+		frappe.set_user("Administrator")
+		for name in frappe.get_all("User Record Filter", filters={"user": TEST_USER}, pluck="name"):
+			frappe.delete_doc("User Record Filter", name, ignore_permissions=True, force=True)
+		frappe.db.sql("DELETE FROM `tabToDo` WHERE description LIKE %s", f"{TEST_MARKER}%")
+		frappe.db.commit()
+		clear_filter_cache()
+
+	def create_filter(self, details):
+		"""Create an active filter for the test user from (doctype, field, restriction, value) tuples"""
+		return frappe.get_doc({
+			"doctype": "User Record Filter",
+			"user": TEST_USER,
+			"active": 1,
+			"filter_details": [
+				{
+					"doctype_name": doctype,
+					"field_name": field,
+					"restriction_type": restriction_type,
+					"filter_value": value,
+					"active": 1
+				}
+				for doctype, field, restriction_type, value in details
+			]
+		}).insert()
+
+	def test_profile_query(self):
+		"""Test the profile of a query and that an unindexed condition is flagged as a full scan"""
+		profile = profile_query(build_profile_query("ToDo", "`tabToDo`.`description` LIKE '%x%'"))
+
+		self.assertEqual(set(profile), {
+			"plan", "access_type", "key", "possible_keys", "estimated_rows",
+			"actual_rows", "wall_time_ms", "full_scan"
+		})
+		self.assertEqual(profile["access_type"], "ALL")
+		self.assertTrue(profile["full_scan"])
+		self.assertIsNone(profile["actual_rows"])
+		self.assertGreaterEqual(profile["wall_time_ms"], 0)
+
+		# A primary key lookup is not a scan, and is only explained without `execute`
+		profile = profile_query(build_profile_query("ToDo", "`tabToDo`.`name` = 'x'"), execute=False)
+		self.assertFalse(profile["full_scan"])
+		self.assertIsNone(profile["wall_time_ms"])
+
+	def test_doctype_filter(self):
+		"""Test that the filter profile lists each condition and the ones forcing a scan"""
+		self.create_filter([
+			("ToDo", "description", "like", TEST_MARKER),
+			("ToDo", "name", "not_equals", "x")
+		])
+
+		# Called through the module, a bare test_* name would be collected as a test
+		result = user_filter_integration.test_doctype_filter("ToDo", user=TEST_USER)
+		self.assertTrue(result["success"])
+		self.assertEqual(len(result["condition_profiles"]), 2)
+		self.assertEqual(len(result["relevant_filters"]), 2)
+
+		like = [c for c in result["condition_profiles"] if c["leading_wildcard"]]
+		self.assertEqual(len(like), 1)
+		self.assertTrue(like[0]["full_scan"])
+		self.assertIn(like[0]["condition"], result["full_scan_conditions"])
+
+	def test_doctype_filter_requires_system_manager(self):
+		"""Test that only System Managers can run the profiler"""
+		frappe.set_user(TEST_USER)
+		with self.assertRaises(frappe.PermissionError):
+			user_filter_integration.test_doctype_filter("ToDo")
+
+	def test_audit_matches_get_list(self):
+		"""Test that the audited rows per user equal what frappe.get_list returns to that user"""
+		# Account has no query conditions of its own for Accounts Users, only the filter applies
+		self.create_filter([("Account", "root_type", "equals", "Asset")])
+		users = [TEST_USER, "Administrator"]
+		expected = {
+			user: len(frappe.get_list("Account", user=user, pluck="name", limit_page_length=0))
+			for user in users
+		}
+
+		result = audit_doctype_visibility("Account", users)
+		self.assertEqual({row["user"]: row["visible_rows"] for row in result["users"]}, expected)
+		self.assertEqual(result["total_rows"], frappe.db.count("Account"))
+		self.assertEqual(result["queries"], 1)
+		self.assertTrue(result["users"][0]["restricted"])
+
+		# Users split over chunks are counted the same, one query per chunk
+		with patch.object(user_filter_integration, "AUDIT_CHUNK_SIZE", 1):
+			result = audit_doctype_visibility("Account", users)
+		self.assertEqual({row["user"]: row["visible_rows"] for row in result["users"]}, expected)
+		self.assertEqual(result["queries"], 2)
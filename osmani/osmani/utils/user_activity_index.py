@@ -0,0 +1,89 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+"""
+Composite (owner, creation) indexes on the DocTypes tracked by the user
+activity reports, which filter on `owner = %(user)s` and a creation range.
+"""
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, today
+
+from osmani.osmani.doctype.user_activity_rollup.user_activity_rollup import ROLLUP_DOCTYPES
+from osmani.osmani.utils.user_filter_integration import profile_query
+
+ACTIVITY_INDEX = "owner_creation"
+ACTIVITY_INDEX_FIELDS = ["owner", "creation"]
+
+
+def get_index_columns(doctype, index_name=ACTIVITY_INDEX):
+	"""Columns of an index in key order, empty if the index does not exist"""
+	rows = frappe.db.sql(
+		f"SHOW INDEX FROM `tab{doctype}` WHERE Key_name = %s",
+		index_name,
+		as_dict=True,
+	)
+	return [row.Column_name for row in sorted(rows, key=lambda row: row.Seq_in_index)]
+
+
+def add_activity_indexes():
+	"""Create the (owner, creation) index on every installed tracked DocType and verify it"""
+	for doctype in ROLLUP_DOCTYPES:
+		# HRMS DocTypes are only present when the app is installed
+		if not frappe.db.table_exists(doctype):
+			continue
+
+		frappe.db.add_index(doctype, ACTIVITY_INDEX_FIELDS, ACTIVITY_INDEX)
+
+		columns = get_index_columns(doctype)
+		if columns != ACTIVITY_INDEX_FIELDS:
+			frappe.throw(
+				_("Index {0} on {1} has columns {2}, expected {3}").format(
+					ACTIVITY_INDEX, doctype, columns, ACTIVITY_INDEX_FIELDS
+				)
+			)
+
+
+def explain_activity_queries(user=None, from_date=None, to_date=None):
+	"""
+	EXPLAIN the queries User Activity Detail runs for one user and creation range
+	(the last 30 days by default): the single DocType query of every tracked
+	DocType, as built by the report, and the union mode query.
+
+	Returns one entry per query with its plan and whether every tracked table
+	is read through ACTIVITY_INDEX.
+	"""
+	from osmani.osmani.report.user_activity_detail.user_activity_detail import (
+		PAGE_LENGTH,
+		_build_conditions,
+		_doctype_query,
+		_union_query,
+	)
+
+	filters = frappe._dict(
+		user=user or frappe.session.user,
+		from_date=from_date or add_days(today(), -30),
+		to_date=to_date or today(),
+	)
+	doctypes = [doctype for doctype in ROLLUP_DOCTYPES if frappe.db.table_exists(doctype)]
+
+	queries = []
+	for doctype in doctypes:
+		where_clause, params = _build_conditions(filters)
+		queries.append((doctype, _doctype_query(doctype, where_clause), params))
+
+	where_clause, params = _build_conditions(filters)
+	queries.append((_("Union"), _union_query(doctypes, where_clause, params, limit=PAGE_LENGTH + 1), params))
+
+	results = []
+	for label, query, params in queries:
+		profile = profile_query(frappe.db.mogrify(query, params), execute=False)
+		tables = [row for row in profile["plan"] if row.get("table") == "t"]
+		results.append({
+			"query": label,
+			"plan": profile["plan"],
+			"uses_index": bool(tables) and all(row.get("key") == ACTIVITY_INDEX for row in tables),
+		})
+
+	return results
@@ -0,0 +1,391 @@
+# Copyright (c) 2026, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+"""
+Benchmark of the User Record Filter permission query overhead.
+
+Creates synthetic users with 0, 5 and 50 filter details and bulk-inserts
+Sales Invoice and GL Entry rows (all named with BENCHMARK_PREFIX), then
+measures for each user:
+
+- cold condition build time: filters reloaded from the database, rules
+  compiled and rendered without the worker LRU or Redis
+- the cache paths of get_permission_query_conditions: worker LRU hit,
+  Redis hit and full miss (new filter version)
+- end-to-end frappe.get_list latency for the first list page
+
+Results are written as a JSON baseline that `compare_results` diffs against
+a later run. Run it through `bench --site <site> benchmark-user-filters`.
+
+It only runs on sites with developer_mode or allow_tests. The rows belong to a
+dedicated benchmark company and are deleted afterwards unless kept. The users
+and filters are saved and deleted, and cache misses forced, in a private cache
+namespace, so the filter version of live workers is never bumped.
+"""
+
+import json
+import statistics
+import time
+from contextlib import contextmanager
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, now, today
+
+from osmani import __version__
+from osmani.osmani.doctype.user_record_filter.user_record_filter import (
+	build_child_condition,
+	compile_rules,
+	get_permission_query_conditions,
+	render_rule,
+	split_child_rules,
+)
+from osmani.osmani.utils import user_filter_cache
+
+BENCHMARK_PREFIX = "BENCH-"
+BENCHMARK_USER = "benchmark-filter-{0}@example.com"
+BENCHMARK_ROLE = "Accounts User"
+BENCHMARK_DOCTYPES = ("Sales Invoice", "GL Entry")
+BENCHMARK_COMPANY = "Benchmark Filter Company"
+BENCHMARK_COMPANY_ABBR = "BFC"
+
+# user_filter_cache keys and channel redirected to benchmark-only ones while seeding,
+# measuring and cleaning up, so filter version bumps never reach live workers
+BENCHMARK_CACHE_KEYS = (
+	"FILTER_VERSION_KEY",
+	"CONDITION_CACHE_KEY",
+	"FILTERED_DOCTYPES_KEY",
+	"USER_FILTERS_KEY",
+	"FILTER_VERSION_CHANNEL",
+)
+
+# Filter details per synthetic user
+DETAIL_COUNTS = (0, 5, 50)
+
+INSERT_CHUNK_SIZE = 10000
+CUSTOMERS = 500
+ACCOUNTS = 50
+
+# Metrics whose relative change beyond this is reported as a regression
+REGRESSION_THRESHOLD = 0.2
+
+
+def timed(func, iterations):
+	"""Run `func` `iterations` times and return its timings in milliseconds"""
+	timings = []
+	for _ in range(iterations):
+		start = time.perf_counter()
+		func()
+		timings.append((time.perf_counter() - start) * 1000)
+
+	return timings
+
+
+def summarize(timings):
+	timings = sorted(timings)
+	return {
+		"median_ms": round(statistics.median(timings), 4),
+		"p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+		"min_ms": round(timings[0], 4),
+		"runs": len(timings),
+	}
+
+
+def ensure_benchmark_site():
+	"""The benchmark writes hundreds of thousands of submitted rows, never run it on a live site"""
+	if not (frappe.conf.developer_mode or frappe.conf.allow_tests):
+		frappe.throw(_("The User Record Filter benchmark only runs on sites with developer_mode or allow_tests enabled"))
+
+
+def get_benchmark_company():
+	"""Return the dedicated benchmark company, created like the site's first company"""
+	if not frappe.db.exists("Company", BENCHMARK_COMPANY):
+		template = frappe.db.get_value("Company", {}, ["default_currency", "country"], as_dict=True) or {}
+		frappe.get_doc({
+			"doctype": "Company",
+			"company_name": BENCHMARK_COMPANY,
+			"abbr": BENCHMARK_COMPANY_ABBR,
+			"default_currency": template.get("default_currency") or "USD",
+			"country": template.get("country"),
+		}).insert(ignore_permissions=True)
+
+	return BENCHMARK_COMPANY
+
+
+@contextmanager
+def private_cache_namespace():
+	"""
+	Point the filter caches at benchmark-only Redis keys, version and channel, so
+	saving the benchmark users and filters and forcing misses never bump the
+	shared version, which would flush the caches of every live worker.
+	"""
+	saved = {attr: getattr(user_filter_cache, attr) for attr in BENCHMARK_CACHE_KEYS}
+	for attr, key in saved.items():
+		setattr(user_filter_cache, attr, f"{BENCHMARK_PREFIX}{key}")
+	set_private_version()
+
+	try:
+		yield
+	finally:
+		for attr, key in saved.items():
+			if attr != "FILTER_VERSION_CHANNEL":
+				frappe.cache().delete_value(getattr(user_filter_cache, attr))
+			setattr(user_filter_cache, attr, key)
+		user_filter_cache.clear_local_cache()
+		user_filter_cache._filtered_doctypes.pop(frappe.local.site, None)
+		frappe.local.user_record_filter_version = None
+
+
+def set_private_version():
+	"""Start a filter version only this process uses, every cached entry misses"""
+	frappe.local.user_record_filter_version = f"{BENCHMARK_PREFIX}{frappe.generate_hash(length=12)}"
+
+
+def insert_rows(doctype, fields, rows):
+	for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+		frappe.db.bulk_insert(doctype, fields, rows[i:i + INSERT_CHUNK_SIZE])
+	frappe.db.commit()
+
+
+def create_benchmark_rows(invoices, gl_entries):
+	"""Bulk-insert synthetic submitted Sales Invoices and GL Entries, once per site"""
+	if frappe.db.exists("Sales Invoice", f"{BENCHMARK_PREFIX}SINV-{0:08d}"):
+		return
+
+	company = get_benchmark_company()
+	timestamp = now()
+	base_date = add_days(today(), -730)
+
+	insert_rows(
+		"Sales Invoice",
+		["name", "owner", "modified_by", "creation", "modified", "docstatus", "company",
+			"customer", "posting_date", "grand_total", "status"],
+		[
+			(f"{BENCHMARK_PREFIX}SINV-{i:08d}", "Administrator", "Administrator", timestamp, timestamp, 1,
+				company, f"{BENCHMARK_PREFIX}CUST-{i % CUSTOMERS:04d}", add_days(base_date, i % 730),
+				(i % 1000) * 10, "Unpaid" if i % 3 else "Paid")
+			for i in range(invoices)
+		],
+	)
+
+	insert_rows(
+		"GL Entry",
+		["name", "owner", "modified_by", "creation", "modified", "docstatus", "company", "account",
+			"party_type", "party", "posting_date", "debit", "credit", "voucher_type", "voucher_no", "is_cancelled"],
+		[
+			(f"{BENCHMARK_PREFIX}GLE-{i:08d}", "Administrator", "Administrator", timestamp, timestamp, 1,
+				company, f"{BENCHMARK_PREFIX}ACC-{i % ACCOUNTS:03d}", "Customer",
+				f"{BENCHMARK_PREFIX}CUST-{i % CUSTOMERS:04d}", add_days(base_date, i % 730),
+				(i % 1000) * 10 if i % 2 else 0, 0 if i % 2 else (i % 1000) * 10,
+				"Sales Invoice", f"{BENCHMARK_PREFIX}SINV-{(i // 2):08d}", 0)
+			for i in range(gl_entries)
+		],
+	)
+
+
+def build_filter_details(count):
+	"""Return `count` filter details cycling through typical restrictions on both DocTypes"""
+	templates = [
+		("Sales Invoice", "customer", "in", lambda n: ", ".join(
+			f"{BENCHMARK_PREFIX}CUST-{(n * 7 + k) % CUSTOMERS:04d}" for k in range(10)
+		)),
+		("Sales Invoice", "posting_date", "last_n_days", lambda n: str(365 + n)),
+		("Sales Invoice", "grand_total", "greater_than", lambda n: str(n * 10)),
+		("GL Entry", "account", "in", lambda n: ", ".join(
+			f"{BENCHMARK_PREFIX}ACC-{(n + k) % ACCOUNTS:03d}" for k in range(5)
+		)),
+		("GL Entry", "posting_date", "between", lambda n: f"{add_days(today(), -700 + n)}, {today()}"),
+	]
+
+	details = []
+	for n in range(count):
+		doctype_name, field_name, restriction_type, value = templates[n % len(templates)]
+		details.append({
+			"doctype_name": doctype_name,
+			"field_name": field_name,
+			"restriction_type": restriction_type,
+			"filter_value": value(n),
+			"active": 1,
+		})
+
+	return details
+
+
+def create_benchmark_users():
+	"""Create one user per DETAIL_COUNTS entry with that many filter details"""
+	users = {}
+	for count in DETAIL_COUNTS:
+		user = BENCHMARK_USER.format(count)
+		if not frappe.db.exists("User", user):
+			frappe.get_doc({
+				"doctype": "User",
+				"email": user,
+				"first_name": f"Benchmark {count}",
+				"send_welcome_email": 0,
+				"roles": [{"role": BENCHMARK_ROLE}],
+			}).insert(ignore_permissions=True)
+
+		if count and not frappe.db.exists("User Record Filter", {"user": user}):
+			frappe.get_doc({
+				"doctype": "User Record Filter",
+				"user": user,
+				"active": 1,
+				"description": f"Benchmark filter with {count} details",
+				"filter_details": build_filter_details(count),
+			}).insert(ignore_permissions=True)
+
+		users[count] = user
+
+	frappe.db.commit()
+	return users
+
+
+def cold_build(doctype, user):
+	"""Build the condition from the database: the user's filters are reloaded and the
+	rules compiled and rendered without going through either cache layer"""
+	user_filter_cache.clear_local_cache()
+	frappe.cache().hdel(user_filter_cache.USER_FILTERS_KEY, user)
+
+	parent_rules, child_rules = split_child_rules(compile_rules(doctype, user))
+	parts = [render_rule(rule, doctype, user) for rule in parent_rules]
+	for table_field, rules in child_rules.items():
+		parts.append(build_child_condition(doctype, table_field, rules, user))
+
+	return parts
+
+
+def benchmark_user(user, iterations):
+	"""Measure condition build, cache paths and list latency for one user"""
+	results = {}
+	session_user = frappe.session.user
+
+	for doctype in BENCHMARK_DOCTYPES:
+		def warm():
+			get_permission_query_conditions(doctype, user)
+
+		def redis_hit():
+			user_filter_cache.clear_local_cache()
+			get_permission_query_conditions(doctype, user)
+
+		def miss():
+			set_private_version()
+			get_permission_query_conditions(doctype, user)
+
+		build = timed(lambda: cold_build(doctype, user), iterations)
+		miss_timings = timed(miss, iterations)
+		redis_timings = timed(redis_hit, iterations)
+		warm()
+		lru_timings = timed(warm, iterations)
+
+		frappe.set_user(user)
+		try:
+			get_list = lambda: frappe.get_list(doctype, fields=["name"], limit_page_length=20)
+			get_list()
+			list_timings = timed(get_list, iterations)
+		finally:
+			frappe.set_user(session_user)
+
+		results[doctype] = {
+			"condition_length": len(get_permission_query_conditions(doctype, user)),
+			"condition_build": summarize(build),
+			"cache_miss": summarize(miss_timings),
+			"cache_redis_hit": summarize(redis_timings),
+			"cache_lru_hit": summarize(lru_timings),
+			"get_list": summarize(list_timings),
+		}
+
+	return results
+
+
+def run_benchmark(invoices=100000, gl_entries=200000, iterations=50, setup=True):
+	"""Create the benchmark data (unless `setup` is off) and measure every synthetic user"""
+	ensure_benchmark_site()
+
+	if setup:
+		create_benchmark_rows(invoices, gl_entries)
+
+	results = {
+		"meta": {
+			"site": frappe.local.site,
+			"timestamp": now(),
+			"osmani_version": __version__,
+			"frappe_version": frappe.__version__,
+			"iterations": iterations,
+			"rows": {doctype: frappe.db.count(doctype) for doctype in BENCHMARK_DOCTYPES},
+		},
+		"results": {},
+	}
+
+	with private_cache_namespace():
+		if setup:
+			users = create_benchmark_users()
+		else:
+			users = {count: BENCHMARK_USER.format(count) for count in DETAIL_COUNTS}
+
+		for count, user in users.items():
+			results["results"][f"{count}_details"] = benchmark_user(user, iterations)
+
+	return results
+
+
+def cleanup_benchmark():
+	"""Delete the synthetic rows, users, filters and the benchmark company"""
+	ensure_benchmark_site()
+
+	for doctype in BENCHMARK_DOCTYPES:
+		frappe.db.delete(doctype, {"company": BENCHMARK_COMPANY, "name": ["like", f"{BENCHMARK_PREFIX}%"]})
+
+	# Deleting filters and users bumps the filter version, keep that private too
+	with private_cache_namespace():
+		for count in DETAIL_COUNTS:
+			user = BENCHMARK_USER.format(count)
+			for name in frappe.get_all("User Record Filter", filters={"user": user}, pluck="name"):
+				frappe.delete_doc("User Record Filter", name, ignore_permissions=True, force=True)
+			if frappe.db.exists("User", user):
+				frappe.delete_doc("User", user, ignore_permissions=True, force=True)
+		frappe.db.commit()
+
+	if frappe.db.exists("Company", BENCHMARK_COMPANY):
+		frappe.delete_doc("Company", BENCHMARK_COMPANY, ignore_permissions=True, force=True)
+
+	frappe.db.commit()
+
+
+def compare_results(baseline, current, threshold=REGRESSION_THRESHOLD):
+	"""
+	Compare the median timings of two benchmark runs.
+
+	Returns one row per (profile, doctype, metric) with both medians and the
+	relative change, flagging changes slower than `threshold` as regressions.
+	"""
+	rows = []
+	for profile, doctypes in current["results"].items():
+		for doctype, metrics in doctypes.items():
+			for metric, values in metrics.items():
+				if not isinstance(values, dict):
+					continue
+				before = baseline["results"].get(profile, {}).get(doctype, {}).get(metric)
+				if not before:
+					continue
+				change = (values["median_ms"] - before["median_ms"]) / before["median_ms"] if before["median_ms"] else 0
+				rows.append({
+					"profile": profile,
+					"doctype": doctype,
+					"metric": metric,
+					"baseline_ms": before["median_ms"],
+					"current_ms": values["median_ms"],
+					"change": round(change, 4),
+					"regression": change > threshold,
+				})
+
+	return rows
+
+
+def load_results(path):
+	with open(path) as f:
+		return json.load(f)
+
+
+def write_results(results, path):
+	with open(path, "w") as f:
+		json.dump(results, f, indent=1, default=str)
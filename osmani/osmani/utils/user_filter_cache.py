@@ -0,0 +1,259 @@
+# Copyright (c) 2024, Ubaid Ali and contributors
+# For license information, please see license.txt
+
+"""
+Cache of compiled User Record Filter permission conditions.
+
+`get_permission_query_conditions` runs for every list and report query, so the
+final condition string (and the compiled rules it is rendered from, which the
+has_permission hook evaluates) is cached per (user, doctype): first in a per-worker
+LRU, then in a Redis hash shared by all workers. Both are keyed by a global
+filter version that is bumped whenever a User Record Filter (or a User's roles)
+changes, so stale entries are simply never looked up again.
+
+New versions are also published on a Redis channel. Each worker runs one
+subscriber thread that records the latest version per site, so while it is
+subscribed the version is known without reading Redis; without it the version
+is read from Redis once per request. A lost subscription is logged and retried
+with a backoff, and requests read Redis until it is back.
+
+The set of DocTypes that are enabled in the User Record Filter Registry and
+referenced by any active filter detail is cached the same way, so the "*"
+permission hooks can return for every other DocType without resolving roles
+or fetching the user's filters.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import frappe
+import redis
+
+FILTER_VERSION_KEY = "user_record_filter_version"
+CONDITION_CACHE_KEY = "user_record_filter_conditions"
+FILTERED_DOCTYPES_KEY = "user_record_filter_doctypes"
+USER_FILTERS_KEY = "user_record_filter_users"
+FILTER_VERSION_CHANNEL = "osmani:user_record_filter_version"
+
+# Entries kept per worker; conditions are short strings
+LRU_SIZE = 4096
+
+# (site, version, kind, user, doctype) -> condition string, compiled rules or allowlist values,
+# shared by the request threads of a worker, so only touched under _lru_lock
+_condition_lru = OrderedDict()
+_lru_lock = threading.Lock()
+
+# site -> (version, frozenset of filtered DocTypes)
+_filtered_doctypes = {}
+
+# site -> latest version received on FILTER_VERSION_CHANNEL
+_published_versions = {}
+_listener = None
+_listener_ready = threading.Event()
+
+# Seconds before the listener reconnects, doubled after every failed attempt
+LISTENER_RETRY_DELAY = 1
+LISTENER_MAX_RETRY_DELAY = 60
+
+
+def listen_for_versions(redis_url, logger):
+	"""Subscriber thread body: record every published filter version per site,
+	reconnecting with an exponential backoff whenever the connection is lost"""
+	delay = LISTENER_RETRY_DELAY
+	while True:
+		pubsub = None
+		try:
+			pubsub = redis.Redis.from_url(redis_url).pubsub()
+			pubsub.subscribe(FILTER_VERSION_CHANNEL)
+			for message in pubsub.listen():
+				if message["type"] == "subscribe":
+					_listener_ready.set()
+					delay = LISTENER_RETRY_DELAY
+				elif message["type"] == "message":
+					site, version = frappe.safe_decode(message["data"]).split("|", 1)
+					_published_versions[site] = version
+		except Exception:
+			logger.exception(
+				"User Record Filter version listener disconnected, reconnecting in %s seconds", delay
+			)
+		finally:
+			# Versions can be missed until subscribed again, fall back to reading Redis
+			_listener_ready.clear()
+			_published_versions.clear()
+			if pubsub:
+				try:
+					pubsub.close()
+				except Exception:
+					pass
+
+		time.sleep(delay)
+		delay = min(delay * 2, LISTENER_MAX_RETRY_DELAY)
+
+
+def start_version_listener():
+	global _listener
+
+	if _listener and _listener.is_alive():
+		return
+
+	# Only long-lived web workers benefit; background jobs read the version once
+	if not getattr(frappe.local, "request", None):
+		return
+
+	redis_url = frappe.conf.redis_cache
+	if not redis_url:
+		return
+
+	_listener = threading.Thread(
+		target=listen_for_versions,
+		args=(redis_url, frappe.logger("user_record_filter")),
+		name="user-record-filter-listener",
+		daemon=True,
+	)
+	_listener.start()
+
+
+def get_filter_version():
+	"""Return the current filter version, read from Redis at most once per request
+	and not at all while this worker is subscribed to version updates"""
+	version = getattr(frappe.local, "user_record_filter_version", None)
+	if version is None:
+		start_version_listener()
+		subscribed = _listener_ready.is_set()
+		if subscribed:
+			version = _published_versions.get(frappe.local.site)
+
+		if version is None:
+			version = frappe.cache().get_value(FILTER_VERSION_KEY)
+			if version is None:
+				version = bump_filter_version()
+			elif subscribed:
+				# Subscribed before this read, so any later version is published;
+				# do not overwrite one that already arrived
+				version = _published_versions.setdefault(frappe.local.site, version)
+
+		frappe.local.user_record_filter_version = version
+
+	return version
+
+
+def bump_filter_version():
+	"""Start a new filter version and drop conditions cached for older ones"""
+	version = frappe.generate_hash(length=12)
+	frappe.cache().set_value(FILTER_VERSION_KEY, version)
+	frappe.cache().delete_key(CONDITION_CACHE_KEY)
+	frappe.cache().delete_value(FILTERED_DOCTYPES_KEY)
+	frappe.cache().delete_key(USER_FILTERS_KEY)
+	frappe.cache().publish(FILTER_VERSION_CHANNEL, f"{frappe.local.site}|{version}")
+	frappe.local.user_record_filter_version = version
+
+	return version
+
+
+def clear_filter_cache(doc=None, method=None):
+	"""Invalidate cached conditions on every worker after a filter or role change.
+
+	Bumped right away so this worker sees its own change, and again when the
+	transaction ends so workers that rebuilt in between do not keep conditions
+	built from uncommitted (or rolled back) filters. Also called via doc_events
+	when a User is saved, since conditions can depend on the user's roles.
+	"""
+	bump_filter_version()
+	frappe.db.after_commit.add(bump_filter_version)
+	frappe.db.after_rollback.add(bump_filter_version)
+
+
+def get_cached(kind, user, doctype, builder):
+	"""Return the cached `kind` entry for (user, doctype), calling `builder()` only on a miss"""
+	version = get_filter_version()
+	local_key = (frappe.local.site, version, kind, user, doctype)
+
+	with _lru_lock:
+		value = _condition_lru.get(local_key)
+		if value is not None:
+			_condition_lru.move_to_end(local_key)
+			return value
+
+	field = f"{version}|{kind}|{user}|{doctype}"
+	value = frappe.cache().hget(CONDITION_CACHE_KEY, field)
+	if value is None:
+		value = builder()
+		frappe.cache().hset(CONDITION_CACHE_KEY, field, value)
+
+	with _lru_lock:
+		_condition_lru[local_key] = value
+		if len(_condition_lru) > LRU_SIZE:
+			_condition_lru.popitem(last=False)
+
+	return value
+
+
+def get_cached_user_filters(user, builder):
+	"""Return the user's active filters, held until the next filter version bump"""
+	filters = frappe.cache().hget(USER_FILTERS_KEY, user)
+	if filters is None:
+		filters = builder()
+		frappe.cache().hset(USER_FILTERS_KEY, user, filters)
+
+	return filters
+
+
+def clear_local_cache():
+	"""Drop this worker's LRU entries, so the next lookups go to Redis"""
+	with _lru_lock:
+		_condition_lru.clear()
+
+
+def get_cached_condition(user, doctype, builder):
+	"""Return the SQL condition for (user, doctype), calling `builder()` only on a cache miss"""
+	return get_cached("condition", user, doctype, lambda: builder() or "")
+
+
+def get_cached_rules(user, doctype, builder):
+	"""Return the compiled rules for (user, doctype), calling `builder()` only on a cache miss"""
+	return get_cached("rules", user, doctype, builder)
+
+
+def get_cached_allowlist(user, doctype, builder):
+	"""Return the allowlist values of (user, doctype) matched by has_permission, calling
+	`builder()` only on a cache miss"""
+	return get_cached("allowlist", user, doctype, builder)
+
+
+def load_filtered_doctypes():
+	"""Return the enabled registry DocTypes referenced by an active detail of an active filter"""
+	return frappe.db.sql_list(
+		"""
+		SELECT DISTINCT d.doctype_name
+		FROM `tabUser Record Filter Detail` d
+		INNER JOIN `tabUser Record Filter` f ON f.name = d.parent
+		INNER JOIN `tabUser Record Filter Registry` r ON r.name = d.doctype_name
+		WHERE d.parenttype = 'User Record Filter'
+			AND f.active = 1
+			AND d.active = 1
+			AND r.enabled = 1
+		"""
+	)
+
+
+def get_filtered_doctypes():
+	"""Return the set of registered DocTypes any active User Record Filter applies to"""
+	version = get_filter_version()
+	cached = _filtered_doctypes.get(frappe.local.site)
+	if cached and cached[0] == version:
+		return cached[1]
+
+	shared = frappe.cache().get_value(FILTERED_DOCTYPES_KEY)
+	if shared and shared[0] == version:
+		doctypes = shared[1]
+	else:
+		doctypes = frozenset(load_filtered_doctypes())
+		frappe.cache().set_value(FILTERED_DOCTYPES_KEY, (version, doctypes))
+
+	_filtered_doctypes[frappe.local.site] = (version, doctypes)
+	return doctypes
+
+
+def is_filtered_doctype(doctype):
+	return doctype in get_filtered_doctypes()
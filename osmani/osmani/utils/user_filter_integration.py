@@ -8,8 +8,13 @@ This module provides helper functions to easily add user record filtering
 to existing DocTypes without modifying their core files.
 """
 
+import time
+
 import frappe
+from frappe.utils import cint
+
 from osmani.osmani.doctype.user_record_filter.user_record_filter import get_permission_query_conditions
+from osmani.osmani.doctype.user_record_filter_registry.user_record_filter_registry import register_doctypes
 
 
 def create_permission_query_function(doctype_name):
@@ -28,35 +33,27 @@ def create_permission_query_function(doctype_name):
 	return permission_query_conditions
 
 
-def register_doctype_filter(doctype_name, app_name="osmani"):
+def register_doctype_filter(doctype_name, app_name="osmani", source="Manual"):
 	"""
 	Register a DocType for user record filtering.
 	
 	This function can be called during app installation or setup
-	to automatically register DocTypes for filtering.
+	to automatically register DocTypes for filtering. The "*" permission
+	hooks only apply User Record Filters to DocTypes enabled in the
+	User Record Filter Registry.
 	
 	Args:
 		doctype_name (str): Name of the DocType to register
 		app_name (str): Name of the app (default: osmani)
+		source (str): Why the DocType was registered (Manual, Install or User Record Filter)
 	"""
 	try:
 		# Check if DocType exists
 		if not frappe.db.exists("DocType", doctype_name):
 			frappe.log_error(f"DocType {doctype_name} does not exist")
 			return False
-			
-		# Create permission query function
-		permission_func = create_permission_query_function(doctype_name)
 		
-		# Store in registry (you could extend this to use a database table)
-		registry_key = f"user_filter_registry_{app_name}"
-		registry = frappe.cache().get_value(registry_key) or {}
-		registry[doctype_name] = {
-			"app": app_name,
-			"function": permission_func,
-			"registered_on": frappe.utils.now()
-		}
-		frappe.cache().set_value(registry_key, registry)
+		register_doctypes([doctype_name], source=source, app=app_name)
 		
 		return True
 		
@@ -75,8 +72,22 @@ def get_registered_doctypes(app_name="osmani"):
 	Returns:
 		dict: Dictionary of registered DocTypes
 	"""
-	registry_key = f"user_filter_registry_{app_name}"
-	return frappe.cache().get_value(registry_key) or {}
+	entries = frappe.get_all(
+		"User Record Filter Registry",
+		filters={"app": app_name},
+		fields=["registered_doctype", "enabled", "source", "creation"],
+		order_by="registered_doctype"
+	)
+	
+	return {
+		entry.registered_doctype: {
+			"app": app_name,
+			"enabled": entry.enabled,
+			"source": entry.source,
+			"registered_on": entry.creation
+		}
+		for entry in entries
+	}
 
 
 def apply_monkey_patch(doctype_name, module_path=None):
@@ -154,33 +165,68 @@ def get_filterable_doctypes():
 		return []
 
 
+# EXPLAIN access types that read the whole table or the whole index. Only meaningful
+# for the bare condition: with ORDER BY ... LIMIT an index scan may stop after a page
+FULL_SCAN_ACCESS_TYPES = ("ALL", "index")
+
+
 @frappe.whitelist()
-def test_doctype_filter(doctype_name, user=None):
+def test_doctype_filter(doctype_name, user=None, analyze=0):
 	"""
 	Test user record filter for a specific DocType.
 	
+	Runs EXPLAIN on the rows matching all filter conditions and on each condition
+	on its own, times the query, and flags conditions that make MariaDB scan the
+	table.
+	With `analyze`, the query is run with ANALYZE to also report actual rows.
+	
 	Args:
 		doctype_name (str): Name of the DocType to test
 		user (str): User to test filters for (default: current user)
+		analyze (bool): Run ANALYZE instead of EXPLAIN (executes the query)
 		
 	Returns:
-		dict: Test results including conditions and sample query
+		dict: Test results including conditions, sample query and query plan
 	"""
+	# Runs COUNT(*) and ANALYZE (which executes the query) over the whole table
+	frappe.only_for("System Manager")
+	
 	if not user:
 		user = frappe.session.user
 		
 	try:
+		from osmani.osmani.doctype.user_record_filter.user_record_filter import (
+			build_condition_parts,
+			get_user_filters,
+		)
+		
+		frappe.get_meta(doctype_name)
+		
 		# Get permission query conditions
 		conditions = get_permission_query_conditions(doctype_name, user)
 		
-		# Build sample query
-		sample_query = f"SELECT name FROM `tab{doctype_name}`"
+		# Count the rows the conditions let through, so the plan shows how they are found
+		sample_query = build_profile_query(doctype_name, conditions)
+		profile = profile_query(sample_query, analyze=cint(analyze))
+		if not conditions:
+			# Nothing is filtered, reading every row is expected
+			profile["full_scan"] = False
+		
+		# Profile each condition alone to find the ones that force a scan
+		condition_profiles = []
 		if conditions:
-			sample_query += f" WHERE 1=1 {conditions}"
-		sample_query += " LIMIT 10"
+			for part in build_condition_parts(doctype_name, user):
+				part_profile = profile_query(build_profile_query(doctype_name, part), execute=False)
+				condition_profiles.append({
+					"condition": part,
+					"access_type": part_profile["access_type"],
+					"key": part_profile["key"],
+					"estimated_rows": part_profile["estimated_rows"],
+					"full_scan": part_profile["full_scan"],
+					"leading_wildcard": "LIKE '%" in part
+				})
 		
 		# Get user filters
-		from osmani.osmani.doctype.user_record_filter.user_record_filter import get_user_filters
 		user_filters = get_user_filters(user)
 		
 		# Filter relevant filters for this DocType
@@ -201,10 +247,15 @@ def test_doctype_filter(doctype_name, user=None):
 			"user": user,
 			"conditions": conditions or "No conditions applied",
 			"sample_query": sample_query,
+			"profile": profile,
+			"condition_profiles": condition_profiles,
+			"full_scan_conditions": [c["condition"] for c in condition_profiles if c["full_scan"]],
 			"relevant_filters": relevant_filters,
 			"total_user_filters": len(user_filters)
 		}
 		
+	except frappe.PermissionError:
+		raise
 	except Exception as e:
 		return {
 			"success": False,
@@ -214,6 +265,130 @@ def test_doctype_filter(doctype_name, user=None):
 		}
 
 
+def build_profile_query(doctype_name, conditions=None):
+	"""Return a query counting the rows of a DocType that pass `conditions`, with no
+	ORDER BY or LIMIT that would let a partial index scan look like a full one"""
+	query = f"SELECT COUNT(*) FROM `tab{doctype_name}`"
+	if conditions:
+		query += f" WHERE {conditions}"
+	
+	return query
+
+
+def profile_query(query, analyze=False, execute=True):
+	"""
+	EXPLAIN (or ANALYZE, which executes it) a query and time its execution.
+	With `execute` off, the query is only explained.
+	
+	Returns the plan rows, the access type, key and estimated (and actual) rows
+	of the first table, and whether any table is read by a full scan.
+	"""
+	if analyze:
+		# ANALYZE executes the query, time it as a whole
+		start = time.perf_counter()
+		plan = frappe.db.sql(f"ANALYZE {query}", as_dict=True)
+		wall_time_ms = (time.perf_counter() - start) * 1000
+	else:
+		plan = frappe.db.sql(f"EXPLAIN {query}", as_dict=True)
+		wall_time_ms = None
+		if execute:
+			start = time.perf_counter()
+			frappe.db.sql(query)
+			wall_time_ms = (time.perf_counter() - start) * 1000
+	
+	first = plan[0] if plan else frappe._dict()
+	
+	return {
+		"plan": plan,
+		"access_type": first.get("type"),
+		"key": first.get("key"),
+		"possible_keys": first.get("possible_keys"),
+		"estimated_rows": first.get("rows"),
+		"actual_rows": first.get("r_rows") if analyze else None,
+		"wall_time_ms": round(wall_time_ms, 3) if wall_time_ms is not None else None,
+		"full_scan": any(row.get("type") in FULL_SCAN_ACCESS_TYPES for row in plan)
+	}
+
+
+# Users whose conditions are aggregated in one pass over the table
+AUDIT_CHUNK_SIZE = 50
+
+
+@frappe.whitelist()
+def audit_doctype_visibility(doctype_name, users=None):
+	"""
+	Count how many rows of a DocType each filtered user can see.
+	
+	Instead of one query per user, each chunk of users is one pass over the
+	table with a conditional aggregate per user's compiled condition:
+	SUM(CASE WHEN <condition> THEN 1 ELSE 0 END). Only User Record Filter
+	conditions are counted, not role or User Permission restrictions.
+	
+	Args:
+		doctype_name (str): Name of the DocType to audit
+		users (list): Users to audit (default: every user with an active filter on the DocType)
+		
+	Returns:
+		dict: Total rows and visible rows per user
+	"""
+	frappe.only_for("System Manager")
+	frappe.get_meta(doctype_name)
+	
+	if isinstance(users, str):
+		users = frappe.parse_json(users)
+	
+	if not users:
+		users = frappe.db.sql_list("""
+			SELECT DISTINCT f.user
+			FROM `tabUser Record Filter` f
+			INNER JOIN `tabUser Record Filter Detail` d
+				ON d.parent = f.name AND d.parenttype = 'User Record Filter'
+			WHERE f.active = 1 AND d.active = 1 AND d.doctype_name = %s
+			ORDER BY f.user
+		""", doctype_name)
+	
+	conditions = {user: get_permission_query_conditions(doctype_name, user) for user in users}
+	
+	start = time.perf_counter()
+	total_rows = 0
+	visible = {}
+	queries = 0
+	for i in range(0, len(users), AUDIT_CHUNK_SIZE):
+		chunk = users[i:i + AUDIT_CHUNK_SIZE]
+		aggregates = ",\n".join(
+			f"SUM(CASE WHEN {conditions[user]} THEN 1 ELSE 0 END) AS `u{idx}`"
+			if conditions[user] else f"COUNT(*) AS `u{idx}`"
+			for idx, user in enumerate(chunk)
+		)
+		row = frappe.db.sql(f"""
+			SELECT COUNT(*) AS total_rows,
+				{aggregates}
+			FROM `tab{doctype_name}`
+		""", as_dict=True)[0]
+		queries += 1
+		
+		total_rows = cint(row.total_rows)
+		for idx, user in enumerate(chunk):
+			visible[user] = cint(row[f"u{idx}"])
+	
+	return {
+		"doctype": doctype_name,
+		"total_rows": total_rows,
+		"users": [
+			{
+				"user": user,
+				"visible_rows": visible[user],
+				"visible_percent": round(visible[user] * 100 / total_rows, 2) if total_rows else 0,
+				"restricted": bool(conditions[user]),
+				"conditions": conditions[user] or "No conditions applied"
+			}
+			for user in users
+		],
+		"queries": queries,
+		"elapsed_ms": round((time.perf_counter() - start) * 1000, 3)
+	}
+
+
 # Auto-registration functions for common ERPNext DocTypes
 def register_common_erpnext_doctypes():
 	"""
@@ -243,7 +418,7 @@ def register_common_erpnext_doctypes():
 	failed = []
 	
 	for doctype in common_doctypes:
-		if register_doctype_filter(doctype):
+		if register_doctype_filter(doctype, source="Install"):
 			registered.append(doctype)
 		else:
 			failed.append(doctype)
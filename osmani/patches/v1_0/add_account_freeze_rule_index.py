@@ -0,0 +1,5 @@
+from osmani.osmani.doctype.account_freeze_rule.account_freeze_rule import add_freeze_rule_index
+
+
+def execute():
+	add_freeze_rule_index()
@@ -0,0 +1,5 @@
+from osmani.osmani.utils.user_activity_index import add_activity_indexes
+
+
+def execute():
+	add_activity_indexes()
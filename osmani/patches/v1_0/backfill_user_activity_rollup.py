@@ -0,0 +1,7 @@
+from osmani.osmani.doctype.user_activity_rollup.user_activity_rollup import schedule_backfill
+
+
+def execute():
+	# Recounting every tracked DocType can take hours on large sites, so it is left to the
+	# scheduler; run `bench backfill-user-activity-rollup` to populate the rollup right away
+	schedule_backfill()
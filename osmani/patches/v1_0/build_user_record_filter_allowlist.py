@@ -0,0 +1,13 @@
+import frappe
+
+from osmani.osmani.doctype.user_record_filter_allowlist.user_record_filter_allowlist import (
+	sync_filter_allowlist,
+)
+from osmani.osmani.utils.user_filter_cache import bump_filter_version
+
+
+def execute():
+	for name in frappe.get_all("User Record Filter", pluck="name"):
+		sync_filter_allowlist(frappe.get_doc("User Record Filter", name))
+
+	bump_filter_version()
@@ -0,0 +1,13 @@
+import frappe
+
+from osmani.osmani.doctype.user_record_filter_registry.user_record_filter_registry import register_doctypes
+from osmani.osmani.utils.user_filter_integration import register_common_erpnext_doctypes
+
+
+def execute():
+	# DocTypes existing filters already apply to must stay filtered
+	register_doctypes(
+		frappe.get_all("User Record Filter Detail", distinct=True, pluck="doctype_name"),
+		source="User Record Filter"
+	)
+	register_common_erpnext_doctypes()
@@ -0,0 +1,88 @@
+// Copyright (c) 2026, Ubaid Ali and contributors
+// For license information, please see license.txt
+
+frappe.provide("osmani.account_freeze");
+
+// Client-side copy of the frozen calendar per company: account -> merged [from_date, to_date]
+// intervals, group account rules as lft/rgt ranges and the company-wide lock intervals.
+// The server returns `not_modified` while the etag is current, so reloading is cheap.
+osmani.account_freeze.calendars = {};
+
+// account -> {company, lft} of every account checked so far
+osmani.account_freeze.accounts = {};
+
+osmani.account_freeze.load_calendar = function (company) {
+	let cached = osmani.account_freeze.calendars[company];
+	return frappe
+		.xcall("osmani.osmani.utils.account_freeze_validation.get_frozen_calendar", {
+			company: company,
+			etag: cached ? cached.etag : null,
+		})
+		.then((r) => {
+			if (!r.not_modified) {
+				osmani.account_freeze.calendars[company] = {
+					etag: r.etag,
+					accounts: r.accounts || {},
+					groups: r.groups || [],
+					company_lock: r.company_lock || [],
+				};
+			}
+			return osmani.account_freeze.calendars[company];
+		});
+};
+
+// Load the company and tree position of `accounts`, then the calendars of their companies
+osmani.account_freeze.prepare = function (accounts) {
+	accounts = (accounts || []).filter(Boolean);
+	let missing = accounts.filter((account) => !(account in osmani.account_freeze.accounts));
+
+	let loaded = missing.length
+		? frappe
+				.xcall("frappe.client.get_list", {
+					doctype: "Account",
+					filters: { name: ["in", missing] },
+					fields: ["name", "company", "lft"],
+					limit_page_length: 0,
+				})
+				.then((rows) => {
+					(rows || []).forEach((row) => {
+						osmani.account_freeze.accounts[row.name] = { company: row.company, lft: row.lft };
+					});
+				})
+		: Promise.resolve();
+
+	return loaded.then(() => {
+		let companies = new Set();
+		accounts.forEach((account) => {
+			let info = osmani.account_freeze.accounts[account];
+			if (info) {
+				companies.add(info.company);
+			}
+		});
+		return Promise.all([...companies].map((company) => osmani.account_freeze.load_calendar(company)));
+	});
+};
+
+// Whether `account` is frozen on `posting_date`; the account must have been passed to prepare()
+osmani.account_freeze.is_frozen = function (account, posting_date) {
+	let info = osmani.account_freeze.accounts[account];
+	if (!account || !posting_date || !info) {
+		return false;
+	}
+
+	let calendar = osmani.account_freeze.calendars[info.company];
+	if (!calendar) {
+		return false;
+	}
+
+	let covers = ([from_date, to_date]) => from_date <= posting_date && posting_date <= to_date;
+	if (calendar.company_lock.some(covers)) {
+		return true;
+	}
+
+	if ((calendar.accounts[account] || []).some(covers)) {
+		return true;
+	}
+
+	return calendar.groups.some((group) => group.lft <= info.lft && info.lft <= group.rgt && group.intervals.some(covers));
+};